@@ -1,24 +1,99 @@
 from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 from pydantic_settings import BaseSettings
 
+# Prisma connection-string options that asyncpg rejects as unknown server settings
+PRISMA_URL_PARAMS = {"pgbouncer", "connection_limit", "pool_timeout", "schema"}
+
+
+def to_asyncpg_url(url: str) -> str:
+    """Convert a postgres:// or postgresql:// URL to asyncpg format, dropping Prisma-only params."""
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    elif url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql+asyncpg://", 1)
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in PRISMA_URL_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def asyncpg_dsn(url: str) -> str:
+    """asyncpg.connect() wants a plain postgresql:// DSN, not the SQLAlchemy dialect URL."""
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
 
 class Settings(BaseSettings):
     DATABASE_URL: str = ""
     DIRECT_URL: str = ""
     ANTHROPIC_API_KEY: str = ""
+    SLOW_QUERY_MS: float = 200.0
+
+    # Connection pool, per uvicorn worker. DB_POOL_SIZE=0 disables app-side pooling (NullPool).
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Connect through DATABASE_URL (PgBouncer, transaction pooling) instead of DIRECT_URL
+    DB_PGBOUNCER: bool = False
+
+    # Optional read replica for heavy read-only endpoints (get_read_db)
+    READ_DATABASE_URL: str = ""
+    READ_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    READ_REPLICA_CHECK_INTERVAL_SECONDS: float = 1.0
+    # After a mutation, the same client reads from the primary for this long
+    READ_YOUR_WRITES_SECONDS: float = 10.0
+
+    # Beneficiary account encoded in every boleto (Bradesco carteira layout)
+    BOLETO_BANCO: str = "237"
+    BOLETO_AGENCIA: str = "0001"
+    BOLETO_CARTEIRA: str = "09"
+    BOLETO_CONTA: str = "0000001"
+    BOLETO_BENEFICIARIO: str = "Cobrança Fácil"
+    # Rendered PDF/PNG cache (content addressed; memory and disk caps) and the batch render pool
+    BOLETO_RENDER_CACHE_DIR: str = str(Path(__file__).resolve().parent.parent.parent / "cache" / "boletos")
+    BOLETO_RENDER_CACHE_MB: int = 64
+    BOLETO_RENDER_CACHE_DISK_MB: int = 2048
+    BOLETO_RENDER_WORKERS: int = 4
+
+    # Background dunning runs (app/services/dunning_jobs.py). Every uvicorn worker runs a
+    # poller unless disabled; jobs are claimed with SKIP LOCKED so several are safe.
+    DUNNING_WORKER_ENABLED: bool = True
+    DUNNING_WORKER_CONCURRENCY: int = 1
+    DUNNING_WORKER_POLL_SECONDS: float = 2.0
+    # A RUNNING job without a heartbeat for this long is requeued
+    DUNNING_JOB_STALE_SECONDS: int = 120
+    # Sharded runs report progress at least this often, even while no shard finishes
+    DUNNING_JOB_HEARTBEAT_SECONDS: float = 30.0
+    # Only evaluate charges that changed or whose nextDunningDate arrived since the last run
+    DUNNING_INCREMENTAL: bool = True
+    # Calendar used for OVERDUE and for rules with an unknown timezone
+    DUNNING_DEFAULT_TIMEZONE: str = "America/Sao_Paulo"
+    # Processes per dunning run (1 = in-process); charges are sharded by hashtext(customerId)
+    DUNNING_RUN_WORKERS: int = 1
+    DUNNING_SHARDS_PER_WORKER: int = 4
+    # Rules/steps are cached per process; other workers' edits are noticed within this long
+    DUNNING_CONFIG_CACHE_SECONDS: float = 5.0
+
+    # LISTEN/NOTIFY cache invalidation between workers (app/core/invalidation.py); needs
+    # DIRECT_URL in PgBouncer mode, since LISTEN holds a session
+    INVALIDATION_BUS_ENABLED: bool = True
+
+    # AppState.simulatedNow is cached per process; edits from outside this API show up within this long
+    APP_CLOCK_CACHE_SECONDS: float = 5.0
+
+    # NotificationLog monthly partitions older than this are archived and dropped
+    LOG_RETENTION_MONTHS: int = 12
+    LOG_PARTITIONS_AHEAD: int = 3
+    LOG_ARCHIVE_DIR: str = str(Path(__file__).resolve().parent.parent.parent / "archive" / "notification_log")
 
     @property
     def async_database_url(self) -> str:
-        """Convert postgres:// or postgresql:// DIRECT_URL to asyncpg format."""
-        url = self.DIRECT_URL or self.DATABASE_URL
-        if url.startswith("postgresql://"):
-            url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
-        elif url.startswith("postgres://"):
-            url = url.replace("postgres://", "postgresql+asyncpg://", 1)
-        # Remove pgbouncer param if present (not needed for direct connection)
-        url = url.split("?pgbouncer")[0]
-        return url
+        """DIRECT_URL in asyncpg format, or the pooler's DATABASE_URL in PgBouncer mode."""
+        if self.DB_PGBOUNCER:
+            return to_asyncpg_url(self.DATABASE_URL or self.DIRECT_URL)
+        return to_asyncpg_url(self.DIRECT_URL or self.DATABASE_URL)
 
     model_config = {
         "env_file": str(Path(__file__).resolve().parent.parent.parent.parent / ".env"),
@@ -1,19 +1,225 @@
-from collections.abc import AsyncGenerator
+import asyncio
+import logging
+import time
+from collections.abc import AsyncGenerator, Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from uuid import uuid4
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Request
+from sqlalchemy import ColumnElement, Text, any_, event, literal, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
-from app.core.config import settings
+from app.core.config import settings, to_asyncpg_url
+from app.core.metrics import DB_POOL_WAIT, Gauge, registry
 
-engine = create_async_engine(
-    settings.async_database_url,
-    echo=False,
-    pool_size=5,
-    max_overflow=10,
-)
+logger = logging.getLogger("app.db")
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+
+def build_engine(
+    url: str,
+    pgbouncer: bool | None = None,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+    **overrides,
+) -> AsyncEngine:
+    """Engine with pool sizing from Settings; ``pool_size=0`` means NullPool.
+
+    In PgBouncer mode every transaction may land on a different server
+    connection, so asyncpg's statement caches are disabled and prepared
+    statements get unique names instead of being reused.
+    """
+    if pgbouncer is None:
+        pgbouncer = settings.DB_PGBOUNCER
+    if pool_size is None:
+        pool_size = settings.DB_POOL_SIZE
+    options: dict = {
+        "echo": False,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if pool_size > 0:
+        options.update(
+            poolclass=InstrumentedPool,
+            pool_size=pool_size,
+            max_overflow=settings.DB_MAX_OVERFLOW if max_overflow is None else max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    else:
+        options["poolclass"] = NullPool
+    if pgbouncer:
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    options.update(overrides)
+    return create_async_engine(url, **options)
+
+
+engine = build_engine(settings.async_database_url)
+
+
+def _pool_stat(name: str) -> float:
+    method = getattr(engine.pool, name, None)
+    return method() if method else 0
+
+
+registry.register(Gauge("db_pool_size", "Conexões permanentes do pool.", lambda: _pool_stat("size")))
+registry.register(Gauge("db_pool_checked_out", "Conexões em uso.", lambda: _pool_stat("checkedout")))
+registry.register(Gauge("db_pool_overflow", "Conexões abertas além do pool_size.", lambda: max(0, _pool_stat("overflow"))))
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+read_engine = build_engine(to_asyncpg_url(settings.READ_DATABASE_URL)) if settings.READ_DATABASE_URL else None
+read_session = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False) if read_engine else None
+
+LAST_WRITE_COOKIE = "cf_last_write"
+
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaLagMonitor:
+    """Caches the replica's replay lag so requests don't each pay for the check.
+
+    An idle replica that has replayed everything reports zero lag, and a
+    plain primary used as a stand-in replica always does.
+    """
+
+    def __init__(self) -> None:
+        self.lag_seconds: float = float("inf")
+        self.checked_at: float = 0.0
+        self._lock = asyncio.Lock()
+
+    async def healthy(self) -> bool:
+        if time.monotonic() - self.checked_at >= settings.READ_REPLICA_CHECK_INTERVAL_SECONDS:
+            async with self._lock:
+                if time.monotonic() - self.checked_at >= settings.READ_REPLICA_CHECK_INTERVAL_SECONDS:
+                    await self._refresh()
+        return self.lag_seconds <= settings.READ_REPLICA_MAX_LAG_SECONDS
+
+    async def _refresh(self) -> None:
+        try:
+            async with read_engine.connect() as conn:
+                self.lag_seconds = float((await conn.execute(REPLICA_LAG_SQL)).scalar() or 0)
+        except Exception:
+            logger.warning("read replica unavailable, falling back to primary", exc_info=True)
+            self.lag_seconds = float("inf")
+        self.checked_at = time.monotonic()
+
+
+replica_lag = ReplicaLagMonitor()
+registry.register(Gauge(
+    "db_replica_lag_seconds", "Atraso de replicação da réplica de leitura (-1 sem réplica).",
+    lambda: replica_lag.lag_seconds if read_engine else -1,
+))
+
+
+def wrote_recently(request: Request) -> bool:
+    """True if this client mutated something within READ_YOUR_WRITES_SECONDS."""
+    value = request.headers.get("x-last-write") or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return time.time() - float(value) < settings.READ_YOUR_WRITES_SECONDS
+    except (TypeError, ValueError):
+        return False
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    slow: int = 0
+    writes: int = 0
+
+
+# Set per request by QueryTimingMiddleware; None outside a request (scripts, workers)
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def redact_parameters(parameters) -> object:
+    """Keep the shape of bound parameters but never their values."""
+    if isinstance(parameters, dict):
+        return {k: f"<{type(v).__name__}>" for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            return [redact_parameters(parameters[0]), f"... x{len(parameters)}"]
+        return [f"<{type(v).__name__}>" for v in parameters]
+    return "<redacted>"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+    slow = elapsed_ms >= settings.SLOW_QUERY_MS
+    stats = query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        stats.slow += slow
+        stats.writes += statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE")
+    if slow:
+        logger.warning(
+            "slow query (%.1f ms): %s | params=%s",
+            elapsed_ms,
+            " ".join(statement.split()),
+            redact_parameters(parameters),
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # after_cursor_execute never fires for a failed statement; drop its start time
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+
+def in_array(column, values: Iterable[str]) -> ColumnElement[bool]:
+    """``column = ANY(:values)`` with one text[] parameter, however many values.
+
+    ``column.in_(values)`` binds a parameter per value and asyncpg refuses
+    statements with more than 32767 of them.
+    """
+    return column == any_(literal(list(values), ARRAY(Text)))
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
+
+
+async def read_session_factory(request: Request) -> async_sessionmaker[AsyncSession]:
+    """The replica's sessionmaker when it is caught up, else the primary's."""
+    if read_session is not None and not wrote_recently(request) and await replica_lag.healthy():
+        return read_session
+    return async_session
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only routes: the replica when it is caught up, else the primary."""
+    async with (await read_session_factory(request))() as session:
+        yield session
@@ -0,0 +1,31 @@
+"""Weak ETags for conditional GETs.
+
+A route fingerprints what its payload depends on (row counts, ``max(updatedAt)``,
+a cache version) with one small query, and answers ``304 Not Modified`` when
+the client's ``If-None-Match`` already holds that fingerprint; the payload
+is only loaded and serialized when it changed.
+"""
+
+import hashlib
+
+from fastapi import Request, Response
+
+
+def weak_etag(*parts: object) -> str:
+    return 'W/"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+
+def not_modified(request: Request, etag: str, cache_control: str = "no-cache") -> Response | None:
+    """A 304 if ``If-None-Match`` names ``etag`` (weak comparison), else None."""
+    header = request.headers.get("if-none-match")
+    if header:
+        tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+        if "*" in tags or etag.removeprefix("W/") in tags:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+
+def set_etag(response: Response, etag: str) -> None:
+    # no-cache: browsers keep the body but revalidate on every fetch
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
@@ -0,0 +1,168 @@
+"""Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+
+Mutating routers call ``publish`` after their commit: the event is handed
+to this process's handlers at once and sent on the ``cache_invalidation``
+channel for every other process. Each uvicorn worker runs an
+``InvalidationListener`` on a dedicated asyncpg connection (DIRECT_URL, as
+LISTEN needs a session, which PgBouncer transaction pooling doesn't keep)
+and dispatches what arrives to the handlers subscribed to its topic.
+
+Delivery is best effort: while the listener is disconnected events are
+lost, so after every reconnect all handlers are called as if everything
+changed. Caches that must never serve stale data also check a
+``CacheVersion`` counter (see app/services/cache_versions.py).
+"""
+
+import asyncio
+import enum
+import json
+import logging
+import os
+import socket
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+import asyncpg
+from sqlalchemy import func, select
+
+from app.core.config import asyncpg_dsn, settings, to_asyncpg_url
+from app.core.database import engine
+
+logger = logging.getLogger("app.invalidation")
+
+CHANNEL = "cache_invalidation"
+# NOTIFY payloads must stay under 8000 bytes; longer key lists become "everything"
+MAX_PAYLOAD = 7000
+KEEPALIVE_SECONDS = 15.0
+MIN_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+
+class Topic(str, enum.Enum):
+    # Only topics with a subscriber: a publish costs a round trip on every mutation
+    DUNNING_CONFIG = "dunning_config"
+    APP_STATE = "app_state"
+
+
+@dataclass(frozen=True)
+class Invalidation:
+    topic: Topic
+    # Ids of the changed rows; empty means anything under the topic may have changed
+    keys: tuple[str, ...] = ()
+    origin: str = ""
+
+    def to_payload(self) -> str:
+        payload = json.dumps({"topic": self.topic.value, "keys": list(self.keys), "origin": self.origin})
+        if len(payload) > MAX_PAYLOAD:
+            payload = json.dumps({"topic": self.topic.value, "keys": [], "origin": self.origin})
+        return payload
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "Invalidation":
+        data = json.loads(payload)
+        return cls(Topic(data["topic"]), tuple(data.get("keys") or ()), data.get("origin", ""))
+
+
+Handler = Callable[[Invalidation], None]
+
+
+class InvalidationBus:
+    def __init__(self) -> None:
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers: dict[Topic, list[Handler]] = defaultdict(list)
+
+    def subscribe(self, topic: Topic, handler: Handler) -> None:
+        """``handler`` runs on the event loop for every event on ``topic``; keep it quick and sync."""
+        self._handlers[topic].append(handler)
+
+    def dispatch(self, event: Invalidation) -> None:
+        for handler in self._handlers.get(event.topic, ()):
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("invalidation handler failed for %s", event.topic.value)
+
+    def dispatch_all(self) -> None:
+        for topic in list(self._handlers):
+            self.dispatch(Invalidation(topic))
+
+    async def publish(self, topic: Topic, keys: Iterable[str] = ()) -> None:
+        """Invalidate ``keys`` of ``topic`` here and in every other worker. Call after commit.
+
+        The NOTIFY goes out in a transaction of its own, on a pooled connection.
+        """
+        event = Invalidation(topic, tuple(keys), self.origin)
+        self.dispatch(event)
+        async with engine.begin() as conn:
+            await conn.execute(select(func.pg_notify(CHANNEL, event.to_payload())))
+
+
+bus = InvalidationBus()
+
+
+def listen_dsn() -> str:
+    """A session-capable libpq URL: DIRECT_URL even in PgBouncer mode."""
+    return asyncpg_dsn(to_asyncpg_url(settings.DIRECT_URL or settings.DATABASE_URL))
+
+
+class InvalidationListener:
+    """LISTENs on a dedicated connection and feeds ``bus``; reconnects with backoff."""
+
+    def __init__(self, invalidation_bus: InvalidationBus = bus, dsn: str | None = None) -> None:
+        self.bus = invalidation_bus
+        self.dsn = dsn or listen_dsn()
+        self.connected = asyncio.Event()
+        self.connects = 0
+        self._task: asyncio.Task | None = None
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            event = Invalidation.from_payload(payload)
+        except (ValueError, KeyError):
+            logger.warning("ignoring malformed invalidation payload %r", payload[:200])
+            return
+        # Our own events were dispatched when published
+        if event.origin != self.bus.origin:
+            self.bus.dispatch(event)
+
+    async def _listen(self, reconnect: bool) -> None:
+        conn = await asyncpg.connect(self.dsn)
+        try:
+            await conn.add_listener(CHANNEL, self._on_notify)
+            if reconnect:
+                # Whatever was published while we were away is lost
+                self.bus.dispatch_all()
+            self.connects += 1
+            self.connected.set()
+            # A dead peer doesn't always close the socket; a periodic query finds out
+            while True:
+                await asyncio.sleep(KEEPALIVE_SECONDS)
+                await asyncio.wait_for(conn.execute("SELECT 1"), KEEPALIVE_SECONDS)
+        finally:
+            self.connected.clear()
+            conn.terminate()
+
+    async def run_forever(self) -> None:
+        backoff = MIN_BACKOFF_SECONDS
+        while True:
+            connects = self.connects
+            try:
+                await self._listen(reconnect=connects > 0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                if self.connects != connects:
+                    backoff = MIN_BACKOFF_SECONDS
+                logger.warning("invalidation listener disconnected (%s), retrying in %.0fs", exc, backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,155 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Everything here is updated from the event loop thread only, so the hot path
+is a dict lookup plus integer/float increments — no locks. Each uvicorn
+worker exposes its own series; aggregate them in Prometheus with ``sum``.
+"""
+
+from bisect import bisect_left
+from collections.abc import Callable
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+RUN_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values: dict[tuple[str, ...], float] = {} if labels else {(): 0}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """A gauge whose value is read from ``callback`` at scrape time, or set explicitly."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float] | None = None) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.value: float = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def render(self) -> list[str]:
+        value = self.callback() if self.callback else self.value
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {_format_value(value)}",
+        ]
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self.series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: list[Counter | Gauge | Histogram] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP por rota.", ("method", "route", "status"),
+))
+HTTP_DB_QUERIES = registry.register(Counter(
+    "http_db_queries_total", "Statements SQL executados por rota.", ("method", "route"),
+))
+HTTP_DB_SECONDS = registry.register(Counter(
+    "http_db_seconds_total", "Tempo gasto no banco por rota.", ("method", "route"),
+))
+DB_POOL_WAIT = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Espera para obter uma conexão do pool.", buckets=POOL_WAIT_BUCKETS,
+))
+LLM_REQUEST_DURATION = registry.register(Histogram(
+    "llm_request_duration_seconds", "Latência das chamadas ao LLM.", ("endpoint", "model", "outcome"),
+))
+LLM_TOKENS = registry.register(Counter(
+    "llm_tokens_total", "Tokens consumidos nas chamadas ao LLM.", ("endpoint", "model", "type"),
+))
+DUNNING_RUNS = registry.register(Counter(
+    "dunning_runs_total", "Execuções da régua de cobrança.",
+))
+DUNNING_RUN_DURATION = registry.register(Histogram(
+    "dunning_run_duration_seconds", "Duração de cada execução da régua.", buckets=RUN_BUCKETS,
+))
+DUNNING_NOTIFICATIONS = registry.register(Counter(
+    "dunning_notifications_created_total", "Notificações criadas pela régua.",
+))
+DUNNING_CHARGES_PROCESSED = registry.register(Counter(
+    "dunning_charges_processed_total", "Cobranças avaliadas pela régua.",
+))
+DUNNING_LAST_RUN_NOTIFICATIONS = registry.register(Gauge(
+    "dunning_last_run_notifications", "Notificações criadas na última execução.",
+))
@@ -0,0 +1,106 @@
+import time
+from dataclasses import asdict, dataclass
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.database import LAST_WRITE_COOKIE, QueryStats, query_stats, read_engine
+from app.core.metrics import HTTP_DB_QUERIES, HTTP_DB_SECONDS, HTTP_REQUEST_DURATION
+
+
+@dataclass
+class RouteQueryStats:
+    requests: int = 0
+    queries: int = 0
+    db_ms: float = 0.0
+    max_queries: int = 0
+    slow_queries: int = 0
+
+    def snapshot(self) -> dict:
+        data = asdict(self)
+        data["db_ms"] = round(self.db_ms, 2)
+        data["avg_queries"] = round(self.queries / self.requests, 2) if self.requests else 0.0
+        data["avg_db_ms"] = round(self.db_ms / self.requests, 2) if self.requests else 0.0
+        return data
+
+
+route_query_stats: dict[str, RouteQueryStats] = {}
+_endpoint_paths: dict[object, str] = {}
+
+
+def route_label(scope: Scope) -> str:
+    """``METHOD /path/{param}`` for the matched route, so ids don't explode the key space."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        endpoint = scope.get("endpoint")
+        path = _endpoint_paths.get(endpoint)
+        if path is None and endpoint is not None:
+            for r in scope["app"].routes:
+                if getattr(r, "endpoint", None) is endpoint:
+                    path = _endpoint_paths[endpoint] = r.path
+                    break
+    return f"{scope['method']} {path or 'unmatched'}"
+
+
+class QueryTimingMiddleware:
+    """Counts SQL statements and DB time per request.
+
+    Totals go out as a ``Server-Timing`` header, are aggregated per route for
+    ``GET /api/metrics/queries`` and feed the ``/metrics`` request histograms.
+    When a read replica is configured, requests that wrote also get a
+    last-write stamp so ``get_read_db`` keeps that client on the primary.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        started = time.perf_counter()
+        status = "500"
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                total_ms = (time.perf_counter() - started) * 1000
+                header = (
+                    f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", '
+                    f"app;dur={total_ms:.1f}"
+                )
+                headers = [*message.get("headers", []), (b"server-timing", header.encode())]
+                if stats.writes and read_engine is not None:
+                    stamp = f"{time.time():.3f}"
+                    max_age = int(settings.READ_YOUR_WRITES_SECONDS) + 1
+                    headers.append((b"x-last-write", stamp.encode()))
+                    headers.append((
+                        b"set-cookie",
+                        f"{LAST_WRITE_COOKIE}={stamp}; Max-Age={max_age}; Path=/; SameSite=Lax".encode(),
+                    ))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_stats.reset(token)
+            label = route_label(scope)
+            method, path = label.split(" ", 1)
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method, path, status)
+            HTTP_DB_QUERIES.inc(method, path, amount=stats.count)
+            HTTP_DB_SECONDS.inc(method, path, amount=stats.total_ms / 1000)
+            route = route_query_stats.get(label)
+            if route is None:
+                route = route_query_stats[label] = RouteQueryStats()
+            route.requests += 1
+            route.queries += stats.count
+            route.db_ms += stats.total_ms
+            route.slow_queries += stats.slow
+            if stats.count > route.max_queries:
+                route.max_queries = stats.count
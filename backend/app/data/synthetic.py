@@ -0,0 +1,315 @@
+"""Deterministic synthetic dataset for load tests and benchmarks.
+
+Every value is derived from ``seed`` through ``_hash_index`` /
+``_get_payment_day``, so the same spec always produces the same rows.
+Rows are yielded lazily and bulk-loaded with COPY, which keeps memory flat
+for the 10M-row presets.
+
+    python -m app.data.synthetic --preset 1m --truncate
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import product
+
+from app.data.apuracao_dummy import regras_default
+from app.data.apuracao_historico_dummy import loja_base
+from app.data.cobrancas_dummy import _get_payment_day, _hash_index, meses_extenso
+
+PRESETS: dict[str, tuple[int, int]] = {
+    "10k": (500, 10_000),
+    "1m": (20_000, 1_000_000),
+    "5m": (50_000, 5_000_000),
+    "10m": (100_000, 10_000_000),
+}
+
+CIDADES = [
+    ("São Paulo", "SP"), ("Campinas", "SP"), ("Rio de Janeiro", "RJ"), ("Belo Horizonte", "MG"),
+    ("Curitiba", "PR"), ("Porto Alegre", "RS"), ("Recife", "PE"), ("Fortaleza", "CE"),
+    ("Salvador", "BA"), ("Brasília", "DF"), ("Goiânia", "GO"), ("Florianópolis", "SC"),
+]
+
+MESES = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+
+# Same régua the seed and README describe: D-5, D-1, D0, D+3, D+7
+DEFAULT_STEPS = [
+    ("BEFORE_DUE", 5, "EMAIL", "Olá {{nome}}, sua cobrança de {{valor}} vence em {{vencimento}}."),
+    ("BEFORE_DUE", 1, "WHATSAPP", "{{nome}}, lembrete: {{descricao}} vence amanhã ({{vencimento}})."),
+    ("ON_DUE", 0, "SMS", "{{nome}}, sua cobrança de {{valor}} vence hoje."),
+    ("AFTER_DUE", 3, "EMAIL", "{{nome}}, identificamos atraso em {{descricao}} ({{valor}})."),
+    ("AFTER_DUE", 7, "WHATSAPP", "{{nome}}, {{descricao}} está vencida desde {{vencimento}}. Podemos ajudar?"),
+]
+
+CUSTOMER_COLUMNS = ["id", "name", "doc", "email", "phone", "createdAt"]
+CHARGE_COLUMNS = [
+    "id", "customerId", "description", "amountCents", "dueDate", "status",
+    "categoria", "competencia", "paidAt", "createdAt", "updatedAt",
+]
+RULE_COLUMNS = ["id", "name", "active", "timezone", "createdAt"]
+STEP_COLUMNS = ["id", "ruleId", "trigger", "offsetDays", "channel", "template", "enabled", "createdAt"]
+LOG_COLUMNS = [
+    "id", "chargeId", "stepId", "channel", "status", "scheduledFor",
+    "sentAt", "renderedMessage", "metaJson", "createdAt",
+]
+LOG_KEY_COLUMNS = ["chargeId", "stepId", "createdAt"]
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    customers: int = 500
+    charges: int = 10_000
+    rules: int = 1
+    seed: str = "cobranca-facil"
+    today: datetime = field(default_factory=lambda: datetime(2026, 2, 7, 12, 0, 0))
+
+    @classmethod
+    def preset(cls, name: str, **overrides) -> "SyntheticSpec":
+        customers, charges = PRESETS[name]
+        return cls(customers=customers, charges=charges, **overrides)
+
+
+def customer_id(spec: SyntheticSpec, idx: int) -> str:
+    return f"syn{_hash_index(spec.seed, 9973):04d}c{idx:08d}"
+
+
+def charge_id(spec: SyntheticSpec, idx: int) -> str:
+    return f"syn{_hash_index(spec.seed, 9973):04d}ch{idx:010d}"
+
+
+def rule_id(spec: SyntheticSpec, idx: int) -> str:
+    return f"syn{_hash_index(spec.seed, 9973):04d}r{idx:03d}"
+
+
+def step_id(spec: SyntheticSpec, rule_idx: int, step_idx: int) -> str:
+    return f"{rule_id(spec, rule_idx)}s{step_idx:02d}"
+
+
+def _faturamento(spec: SyntheticSpec, cust_idx: int) -> int:
+    """Monthly revenue for a franchisee: a loja_base store scaled 0.4x–2.0x."""
+    seed = f"{spec.seed}-{cust_idx}"
+    loja = loja_base[_hash_index(seed + "loja", len(loja_base))]
+    mult = 0.4 + _hash_index(seed + "mult", 161) / 100
+    return round((loja["pdv"] + loja["ifood"] + loja["rappi"]) * mult)
+
+
+def _customer_name(spec: SyntheticSpec, idx: int) -> str:
+    cidade, _ = CIDADES[_hash_index(f"{spec.seed}-{idx}cidade", len(CIDADES))]
+    return f"Franquia {cidade} {idx + 1:05d}"
+
+
+def generate_customers(spec: SyntheticSpec) -> Iterator[tuple]:
+    created = spec.today - timedelta(days=730)
+    for idx in range(spec.customers):
+        seed = f"{spec.seed}-{idx}"
+        doc = f"{_hash_index(seed + 'cnpj', 100_000_000):08d}0001{_hash_index(seed + 'dv', 100):02d}"
+        yield (
+            customer_id(spec, idx),
+            _customer_name(spec, idx),
+            f"{doc[:2]}.{doc[2:5]}.{doc[5:8]}/{doc[8:12]}-{doc[12:]}",
+            f"franquia{idx + 1:05d}@franquia.com.br",
+            f"({11 + _hash_index(seed + 'ddd', 80)}) 9{_hash_index(seed + 'tel', 100_000_000):08d}",
+            created + timedelta(days=_hash_index(seed + "abertura", 365)),
+        )
+
+
+def _charge_fields(spec: SyntheticSpec, idx: int) -> dict:
+    """Charge ``idx`` belongs to customer ``idx // 2 % customers`` in cycle ``idx // (2 * customers)``.
+
+    Each cycle emits a Royalties and an FNP charge per franchisee, going back one
+    month per cycle from ``spec.today`` — the same shape as ``_gerar_cobrancas``.
+    """
+    pair, is_fnp = divmod(idx, 2)
+    cycle, cust_idx = divmod(pair, spec.customers)
+    competencia = spec.today.year * 12 + spec.today.month - 2 - cycle
+    ano, mes = divmod(competencia, 12)
+    emissao_ano, emissao_mes = divmod(competencia + 1, 12)
+    emissao = datetime(emissao_ano, emissao_mes + 1, 3, 12, 0, 0)
+    vencimento = emissao + timedelta(days=15)
+
+    faturamento = _faturamento(spec, cust_idx)
+    if is_fnp:
+        categoria, descricao = "FNP", "Fundo Nacional de Propaganda"
+        amount = round(faturamento * regras_default["marketingPercent"] / 100)
+    else:
+        categoria, descricao = "Royalties", "Cobrança de Royalties"
+        amount = round(faturamento * regras_default["royaltyPercent"] / 100)
+
+    seed = f"{spec.seed}-{cust_idx}-{cycle}-{categoria}"
+    pay_day = _get_payment_day(seed)
+    paid_at = emissao + timedelta(days=pay_day) if pay_day is not None else None
+    if paid_at is not None and paid_at > spec.today:
+        paid_at = None
+
+    if _hash_index(seed + "cancel", 1000) < 15:
+        status = "CANCELED"
+        paid_at = None
+    elif paid_at is not None:
+        status = "PAID"
+    elif vencimento < spec.today:
+        status = "OVERDUE"
+    else:
+        status = "PENDING"
+
+    return {
+        "id": charge_id(spec, idx),
+        "customerId": customer_id(spec, cust_idx),
+        "customerName": _customer_name(spec, cust_idx),
+        "description": f"{descricao} - {meses_extenso[MESES[mes]]} {ano}",
+        "amountCents": amount,
+        "dueDate": vencimento,
+        "status": status,
+        "categoria": categoria,
+        "competencia": f"{MESES[mes]}/{ano}",
+        "paidAt": paid_at,
+        "createdAt": emissao,
+    }
+
+
+def generate_charges(spec: SyntheticSpec) -> Iterator[tuple]:
+    for idx in range(spec.charges):
+        c = _charge_fields(spec, idx)
+        yield (
+            c["id"], c["customerId"], c["description"], c["amountCents"], c["dueDate"], c["status"],
+            c["categoria"], c["competencia"], c["paidAt"], c["createdAt"], c["paidAt"] or c["createdAt"],
+        )
+
+
+def generate_rules(spec: SyntheticSpec) -> Iterator[tuple]:
+    created = spec.today - timedelta(days=365)
+    for r in range(spec.rules):
+        yield (rule_id(spec, r), f"Régua Padrão {r + 1}" if spec.rules > 1 else "Régua Padrão", True, "America/Sao_Paulo", created)
+
+
+def generate_steps(spec: SyntheticSpec) -> Iterator[tuple]:
+    created = spec.today - timedelta(days=365)
+    for r in range(spec.rules):
+        for s, (trigger, offset, channel, template) in enumerate(DEFAULT_STEPS):
+            yield (step_id(spec, r, s), rule_id(spec, r), trigger, offset, channel, template, True, created)
+
+
+def generate_logs(spec: SyntheticSpec) -> Iterator[tuple]:
+    """One log per (charge, step) whose fire date passed before the charge was paid.
+
+    Like ``run_dunning``, every active rule's steps apply to every open charge.
+    """
+    for idx in range(spec.charges):
+        c = _charge_fields(spec, idx)
+        if c["status"] == "CANCELED":
+            continue
+        stop = min(spec.today, c["paidAt"]) if c["paidAt"] else spec.today
+        for r, (s, (trigger, offset, channel, template)) in product(range(spec.rules), enumerate(DEFAULT_STEPS)):
+            days = -offset if trigger == "BEFORE_DUE" else 0 if trigger == "ON_DUE" else offset
+            fire = c["dueDate"] + timedelta(days=days)
+            if fire > stop:
+                continue
+            sid = step_id(spec, r, s)
+            failed = _hash_index(f"{c['id']}-{sid}", 100) < 4
+            rendered = (
+                template
+                .replace("{{nome}}", c["customerName"])
+                .replace("{{valor}}", f"R$ {c['amountCents'] / 100:.2f}")
+                .replace("{{vencimento}}", c["dueDate"].strftime("%d/%m/%Y"))
+                .replace("{{descricao}}", c["description"])
+            )
+            yield (
+                f"{c['id']}l{r:03d}{s:02d}",
+                c["id"],
+                sid,
+                channel,
+                "FAILED" if failed else "SENT",
+                fire,
+                None if failed else fire,
+                rendered,
+                json.dumps({"trigger": trigger, "offsetDays": offset}),
+                fire,
+            )
+
+
+def generate_log_keys(spec: SyntheticSpec) -> Iterator[tuple]:
+    for log in generate_logs(spec):
+        yield (log[1], log[2], log[9])
+
+
+def log_date_range(spec: SyntheticSpec) -> tuple[datetime, datetime]:
+    """Oldest and newest NotificationLog.createdAt the spec can produce."""
+    if not spec.charges:
+        return spec.today, spec.today
+    oldest = _charge_fields(spec, spec.charges - 1)["dueDate"]
+    lead = max((offset for trigger, offset, *_ in DEFAULT_STEPS if trigger == "BEFORE_DUE"), default=0)
+    return oldest - timedelta(days=lead), spec.today
+
+
+TABLES = [
+    ("Customer", CUSTOMER_COLUMNS, generate_customers),
+    ("DunningRule", RULE_COLUMNS, generate_rules),
+    ("DunningStep", STEP_COLUMNS, generate_steps),
+    ("Charge", CHARGE_COLUMNS, generate_charges),
+    ("NotificationLog", LOG_COLUMNS, generate_logs),
+    ("NotificationLogKey", LOG_KEY_COLUMNS, generate_log_keys),
+]
+
+
+async def load(spec: SyntheticSpec, dsn: str, truncate: bool = False) -> dict[str, int]:
+    """Bulk-load ``spec`` into Postgres with COPY. Returns rows written per table."""
+    import asyncpg
+
+    from app.core.config import asyncpg_dsn
+
+    conn = await asyncpg.connect(asyncpg_dsn(dsn))
+    counts: dict[str, int] = {}
+    try:
+        async with conn.transaction():
+            if truncate:
+                await conn.execute(
+                    'TRUNCATE "NotificationLog", "NotificationLogKey", "Boleto", "Charge", "Customer", '
+                    '"DunningStep", "DunningRule" CASCADE'
+                )
+            # Monthly partitions must exist before COPY, or rows land in the default partition
+            oldest, newest = log_date_range(spec)
+            await conn.execute(
+                "SELECT notification_log_ensure_partition(m::date) "
+                "FROM generate_series(date_trunc('month', $1::timestamp), $2::timestamp, interval '1 month') m",
+                oldest, newest,
+            )
+            for table, columns, generate in TABLES:
+                started = time.perf_counter()
+                result = await conn.copy_records_to_table(table, records=generate(spec), columns=columns)
+                counts[table] = int(result.split()[-1])
+                print(f"{table}: {counts[table]} rows in {time.perf_counter() - started:.1f}s")
+        await conn.execute('ANALYZE "Customer", "Charge", "NotificationLog"')
+    finally:
+        await conn.close()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Carrega um dataset sintético determinístico no Postgres.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="10k")
+    parser.add_argument("--customers", type=int)
+    parser.add_argument("--charges", type=int)
+    parser.add_argument("--rules", type=int, default=1)
+    parser.add_argument("--seed", default="cobranca-facil")
+    parser.add_argument("--truncate", action="store_true", help="Apaga os dados existentes antes de carregar")
+    parser.add_argument("--dsn", help="Padrão: DIRECT_URL/DATABASE_URL do .env")
+    args = parser.parse_args()
+
+    customers, charges = PRESETS[args.preset]
+    spec = SyntheticSpec(
+        customers=args.customers or customers,
+        charges=args.charges or charges,
+        rules=args.rules,
+        seed=args.seed,
+    )
+
+    from app.core.config import settings
+
+    asyncio.run(load(spec, args.dsn or settings.async_database_url, truncate=args.truncate))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,19 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.invalidation import InvalidationListener
+from app.core.middleware import QueryTimingMiddleware
 from app.routers import (
     ai_dashboard,
     app_state,
+    apuracao_ciclo,
     apuracao_upload,
+    boletos,
     cadastro_upload,
     charges,
     chat,
@@ -12,13 +21,50 @@ from app.routers import (
     dunning_rules,
     dunning_run,
     dunning_steps,
+    exports,
     franqueadora,
     logs,
+    metrics,
     mia,
     simulation,
 )
+from app.services.boleto_render import render_pool
+from app.services.dunning_jobs import DunningWorker
+from app.services.log_retention import ensure_upcoming_partitions
+
+logger = logging.getLogger("app")
+
+
+async def prepare_log_partitions() -> None:
+    try:
+        async with async_session() as db:
+            await ensure_upcoming_partitions(db)
+            await db.commit()
+    except Exception:
+        # Not fatal: dunning runs create them too, and rows meanwhile go to the default partition
+        logger.warning("could not create upcoming NotificationLog partitions", exc_info=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await prepare_log_partitions()
+    # Processes only start on the first batch render
+    app.state.render_pool = render_pool(settings.BOLETO_RENDER_WORKERS)
+    listener = InvalidationListener() if settings.INVALIDATION_BUS_ENABLED else None
+    if listener:
+        listener.start()
+    worker = DunningWorker() if settings.DUNNING_WORKER_ENABLED else None
+    if worker:
+        worker.start()
+    yield
+    if worker:
+        await worker.stop()
+    if listener:
+        await listener.stop()
+    app.state.render_pool.shutdown(wait=False, cancel_futures=True)
+
 
-app = FastAPI(title="Cobrança Fácil API", version="0.1.0")
+app = FastAPI(title="Cobrança Fácil API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,7 +72,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Last-Write", "X-Next-Cursor", "Content-Disposition", "ETag"],
 )
+app.add_middleware(QueryTimingMiddleware)
 
 
 @app.get("/api/health")
@@ -36,10 +84,12 @@ async def health():
 
 app.include_router(customers.router)
 app.include_router(charges.router)
+app.include_router(boletos.router)
 app.include_router(dunning_steps.router)
 app.include_router(dunning_rules.router)
 app.include_router(dunning_run.router)
 app.include_router(logs.router)
+app.include_router(exports.router)
 app.include_router(franqueadora.router)
 app.include_router(app_state.router)
 app.include_router(simulation.router)
@@ -48,3 +98,5 @@ app.include_router(mia.router)
 app.include_router(ai_dashboard.router)
 app.include_router(cadastro_upload.router)
 app.include_router(apuracao_upload.router)
+app.include_router(apuracao_ciclo.router)
+app.include_router(metrics.router)
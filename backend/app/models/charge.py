@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
 
 from cuid2 import cuid_wrapper
-from sqlalchemy import DateTime, Enum, ForeignKey, Index, Integer, String, func
+from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, Index, Integer, String, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, ChargeStatus
@@ -21,8 +21,12 @@ class Charge(Base):
         Enum(ChargeStatus, name="ChargeStatus", create_type=False),
         default=ChargeStatus.PENDING,
     )
+    categoria: Mapped[str | None] = mapped_column(String, nullable=True)
+    competencia: Mapped[str | None] = mapped_column(String, nullable=True)
+    nfEmitida: Mapped[bool] = mapped_column(Boolean, server_default=text("false"))
     createdAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updatedAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    nextDunningDate: Mapped[date | None] = mapped_column(Date, nullable=True)
 
     customer: Mapped["Customer"] = relationship(back_populates="charges")  # noqa: F821
     boleto: Mapped["Boleto | None"] = relationship(back_populates="charge", uselist=False, cascade="all, delete-orphan")  # noqa: F821
@@ -32,4 +36,7 @@ class Charge(Base):
         Index("Charge_customerId_idx", "customerId"),
         Index("Charge_status_idx", "status"),
         Index("Charge_dueDate_idx", "dueDate"),
+        Index("Charge_competencia_customerId_categoria_idx", "competencia", "customerId", "categoria"),
+        Index("Charge_nextDunningDate_idx", "nextDunningDate"),
+        Index("Charge_updatedAt_idx", "updatedAt"),
     )
@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from cuid2 import cuid_wrapper
-from sqlalchemy import DateTime, String, func
+from sqlalchemy import DateTime, Index, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -18,5 +18,10 @@ class Customer(Base):
     email: Mapped[str] = mapped_column(String)
     phone: Mapped[str] = mapped_column(String)
     createdAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updatedAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     charges: Mapped[list["Charge"]] = relationship(back_populates="customer", cascade="all, delete-orphan")  # noqa: F821
+
+    __table_args__ = (
+        Index("Customer_updatedAt_idx", "updatedAt"),
+    )
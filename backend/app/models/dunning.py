@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
 
 from cuid2 import cuid_wrapper
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Index, Integer, String, func
+from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, Channel, DunningTrigger
@@ -45,3 +45,32 @@ class DunningStep(Base):
         Index("DunningStep_trigger_idx", "trigger"),
         Index("DunningStep_enabled_idx", "enabled"),
     )
+
+
+class DunningRunState(Base):
+    """Singleton (id=1): where the last completed run left off, for incremental runs."""
+
+    __tablename__ = "DunningRunState"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, default=1)
+    lastRunStartedAt: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    lastRunDate: Mapped[date | None] = mapped_column(Date, nullable=True)
+    configFingerprint: Mapped[str | None] = mapped_column(String, nullable=True)
+
+
+class DunningSchedule(Base):
+    """Every step still ahead of an open charge, materialized by the dunning run."""
+
+    __tablename__ = "DunningSchedule"
+
+    chargeId: Mapped[str] = mapped_column(String, ForeignKey("Charge.id", ondelete="CASCADE"), primary_key=True)
+    stepId: Mapped[str] = mapped_column(String, ForeignKey("DunningStep.id", ondelete="CASCADE"), primary_key=True)
+    fireDate: Mapped[date] = mapped_column(Date)
+    channel: Mapped[Channel] = mapped_column(
+        Enum(Channel, name="Channel", create_type=False),
+    )
+
+    __table_args__ = (
+        Index("DunningSchedule_fireDate_idx", "fireDate"),
+        Index("DunningSchedule_stepId_idx", "stepId"),
+    )
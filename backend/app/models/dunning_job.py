@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from cuid2 import cuid_wrapper
+from sqlalchemy import Boolean, DateTime, Enum, Index, Integer, String, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, DunningJobStatus
+
+cuid_generate = cuid_wrapper()
+
+
+class DunningJob(Base):
+    __tablename__ = "DunningJob"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=cuid_generate)
+    status: Mapped[DunningJobStatus] = mapped_column(
+        Enum(DunningJobStatus, name="DunningJobStatus", create_type=False),
+        default=DunningJobStatus.QUEUED,
+    )
+    paramsJson: Mapped[str] = mapped_column(String, default="{}")
+    totalCharges: Mapped[int] = mapped_column(Integer, default=0)
+    processedCharges: Mapped[int] = mapped_column(Integer, default=0)
+    notificationsCreated: Mapped[int] = mapped_column(Integer, default=0)
+    cancelRequested: Mapped[bool] = mapped_column(Boolean, default=False, server_default=text("false"))
+    error: Mapped[str | None] = mapped_column(String, nullable=True)
+    workerId: Mapped[str | None] = mapped_column(String, nullable=True)
+    heartbeatAt: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    createdAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    startedAt: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finishedAt: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("DunningJob_status_createdAt_idx", "status", "createdAt"),
+    )
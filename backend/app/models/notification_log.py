@@ -10,6 +10,8 @@ cuid_generate = cuid_wrapper()
 
 
 class NotificationLog(Base):
+    """Partitioned by month on createdAt; the table's real key is (id, createdAt)."""
+
     __tablename__ = "NotificationLog"
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=cuid_generate)
@@ -31,7 +33,24 @@ class NotificationLog(Base):
     step: Mapped["DunningStep"] = relationship(back_populates="notificationLogs")  # noqa: F821
 
     __table_args__ = (
-        Index("NotificationLog_chargeId_idx", "chargeId"),
+        Index("NotificationLog_chargeId_stepId_idx", "chargeId", "stepId"),
         Index("NotificationLog_stepId_idx", "stepId"),
         Index("NotificationLog_scheduledFor_idx", "scheduledFor"),
+        Index("NotificationLog_createdAt_id_idx", "createdAt", "id"),
+        Index("NotificationLog_status_channel_createdAt_idx", "status", "channel", "createdAt"),
+        {"postgresql_partition_by": 'RANGE ("createdAt")'},
+    )
+
+
+class NotificationLogKey(Base):
+    """One row per (charge, step) ever notified; outlives archived log partitions."""
+
+    __tablename__ = "NotificationLogKey"
+
+    chargeId: Mapped[str] = mapped_column(String, ForeignKey("Charge.id", ondelete="CASCADE"), primary_key=True)
+    stepId: Mapped[str] = mapped_column(String, ForeignKey("DunningStep.id", ondelete="CASCADE"), primary_key=True)
+    createdAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("NotificationLogKey_stepId_idx", "stepId"),
     )
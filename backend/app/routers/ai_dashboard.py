@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.models.charge import Charge
 from app.models.customer import Customer
 
@@ -54,7 +54,7 @@ def _generate_insights(context: dict | None) -> list[dict]:
 
 
 @router.post("")
-async def post_dashboard_ai(db: AsyncSession = Depends(get_db)):
+async def post_dashboard_ai(db: AsyncSession = Depends(get_read_db)):
     context = await _get_dashboard_context(db)
     insights = _generate_insights(context)
 
@@ -93,7 +93,7 @@ async def post_dashboard_ai(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("")
-async def get_dashboard_ai(db: AsyncSession = Depends(get_db)):
+async def get_dashboard_ai(db: AsyncSession = Depends(get_read_db)):
     context = await _get_dashboard_context(db)
     return {
         "success": True,
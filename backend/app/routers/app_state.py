@@ -1,23 +1,33 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.models.app_state import AppState
+from app.core.database import get_read_db
+from app.core.etag import not_modified, set_etag, weak_etag
 from app.models.charge import Charge
+from app.services.cache_versions import CHARGES, version_subquery
+from app.services.clock import clock
 
 router = APIRouter(prefix="/api/app-state", tags=["app-state"])
 
 
 @router.get("")
-async def get_app_state(db: AsyncSession = Depends(get_db)):
+async def get_app_state(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
     try:
-        result = await db.execute(select(AppState).where(AppState.id == 1))
-        app_state = result.scalar_one_or_none()
-        now = app_state.simulatedNow if app_state and app_state.simulatedNow else datetime.utcnow()
-        is_simulated = bool(app_state and app_state.simulatedNow)
+        simulated = await clock.simulated()
+        now = simulated or datetime.utcnow()
+        is_simulated = simulated is not None
+
+        # The real clock is only compared to the minute, or no poll would ever match
+        version = (await db.execute(select(
+            select(func.max(Charge.updatedAt)).scalar_subquery(),
+            version_subquery(CHARGES),
+        ))).one()
+        etag = weak_etag("app_state", simulated or now.replace(second=0, microsecond=0), *version)
+        if cached := not_modified(request, etag):
+            return cached
 
         total, pending, paid, overdue = await _get_counts(db)
         total_amount_result = await db.execute(select(func.sum(Charge.amountCents)))
@@ -28,6 +38,8 @@ async def get_app_state(db: AsyncSession = Depends(get_db)):
         )
         paid_amount = paid_amount_result.scalar() or 0
 
+        # Only now: the dummy fallback below must never be cached under this tag
+        set_etag(response, etag)
         return {
             "date": now.isoformat(),
             "isSimulated": is_simulated,
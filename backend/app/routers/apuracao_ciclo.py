@@ -0,0 +1,141 @@
+import time
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db, in_array
+from app.data.apuracao_dummy import calcular_apuracao
+from app.data.cobrancas_dummy import meses_extenso
+from app.models.charge import Charge
+from app.schemas.apuracao import ApuracaoCicloOut, ApuracaoCicloRequest, ApuracaoSkipped
+from app.schemas.charge import ChargeCreate
+from app.services.boleto import boleto_rows, insert_boletos
+from app.services.charge_ingest import insert_charges, validate_charges
+from app.services.dunning import refresh_schedule
+
+router = APIRouter(prefix="/api/apuracao", tags=["apuracao"])
+
+MESES = list(meses_extenso)
+
+# categoria -> (valor em calcular_apuracao, flag de NF, descrição)
+CATEGORIAS = {
+    "Royalties": ("royalty", "nfRoyalty", "Cobrança de Royalties"),
+    "FNP": ("marketing", "nfMarketing", "Fundo Nacional de Propaganda"),
+}
+
+
+def parse_competencia(competencia: str) -> tuple[int, int]:
+    """``"Mar/2026"`` -> ``(2026, 3)``."""
+    try:
+        mes, ano = competencia.split("/")
+        return int(ano), MESES.index(mes) + 1
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Competência inválida: {competencia}")
+
+
+def default_due_date(ano: int, mes: int) -> datetime:
+    """Emission on day 3 of the month after the competência, due 15 days later."""
+    emissao_ano, emissao_mes = divmod(ano * 12 + mes, 12)
+    return datetime(emissao_ano, emissao_mes + 1, 3, 12, 0, 0) + timedelta(days=15)
+
+
+class PhaseTimer:
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.timings[phase] = round((now - self._last) * 1000, 2)
+        self._last = now
+
+
+@router.post("/ciclo", response_model=ApuracaoCicloOut, status_code=201)
+async def gerar_ciclo(body: ApuracaoCicloRequest, db: AsyncSession = Depends(get_db)):
+    """Compute the apuração for a competência and emit its charges in one transaction.
+
+    Idempotent per (competência, franqueado, categoria): pairs that already
+    have a charge are reported in ``skipped`` instead of being duplicated, and
+    concurrent runs for the same competência are serialized by an advisory lock.
+    """
+    timer = PhaseTimer()
+    ano, mes = parse_competencia(body.competencia)
+    due = body.dueDate or default_due_date(ano, mes).isoformat()
+
+    apuracao = calcular_apuracao(
+        [f.model_dump() for f in body.franqueados],
+        body.regras.model_dump(),
+        body.nfConfig.model_dump(),
+    )
+    timer.mark("apuracao")
+
+    skipped: list[ApuracaoSkipped] = []
+    items: list[ChargeCreate] = []
+    for r in apuracao:
+        for categoria, (valor, nf, descricao) in CATEGORIAS.items():
+            if r[valor] <= 0:
+                skipped.append(ApuracaoSkipped(customerId=r["id"], categoria=categoria, reason="Valor zerado"))
+                continue
+            items.append(ChargeCreate(
+                customerId=r["id"],
+                description=f"{descricao} - {meses_extenso[MESES[mes - 1]]} {ano}",
+                amountCents=r[valor],
+                dueDate=due,
+                categoria=categoria,
+                competencia=body.competencia,
+                nfEmitida=r[nf],
+            ))
+
+    # Held until commit: a second run for the same competência waits here and then sees our rows
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"apuracao:{body.competencia}"))))
+    timer.mark("lock")
+
+    existing = set(
+        (await db.execute(
+            select(Charge.customerId, Charge.categoria).where(
+                Charge.competencia == body.competencia,
+                in_array(Charge.customerId, {i.customerId for i in items}),
+                Charge.categoria.in_(CATEGORIAS),
+            )
+        )).tuples()
+    ) if items else set()
+    pending = []
+    for item in items:
+        if (item.customerId, item.categoria) in existing:
+            skipped.append(ApuracaoSkipped(customerId=item.customerId, categoria=item.categoria, reason="Já emitida"))
+        else:
+            pending.append(item)
+    timer.mark("dedupe")
+
+    result = await validate_charges(db, pending)
+    for i, msg in result.errors:
+        skipped.append(ApuracaoSkipped(customerId=pending[i].customerId, categoria=pending[i].categoria, reason=msg))
+    timer.mark("validacao")
+
+    await insert_charges(db, result.rows)
+    timer.mark("charges")
+
+    boletos = []
+    if body.gerarBoletos:
+        charges = [(r["id"], r["dueDate"], r["amountCents"]) for r in result.rows]
+        boletos = await insert_boletos(db, await boleto_rows(db, charges))
+    timer.mark("boletos")
+
+    await refresh_schedule(db, [r["id"] for r in result.rows])
+    timer.mark("agenda")
+
+    await db.commit()
+    timer.mark("commit")
+
+
+    return ApuracaoCicloOut(
+        competencia=body.competencia,
+        chargesCreated=len(result.rows),
+        boletosCreated=len(boletos),
+        chargeIds=[r["id"] for r in result.rows],
+        skipped=skipped,
+        apuracao=apuracao,
+        timingsMs=timer.timings,
+    )
@@ -1,8 +1,11 @@
+import time
+
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 
 from app.core.config import settings
 from app.schemas.upload import ApuracaoUploadRequest
+from app.services.ai_service import record_llm_call
 
 router = APIRouter(prefix="/api/apuracao", tags=["apuracao-upload"])
 
@@ -40,6 +43,8 @@ Forneça um sumário com:
 
 Formato: texto corrido, organizado em parágrafos curtos. Seja direto e objetivo. Use valores em R$ formatados."""
 
+    started = time.perf_counter()
+    response = None
     try:
         from anthropic import Anthropic
 
@@ -49,8 +54,11 @@ Formato: texto corrido, organizado em parágrafos curtos. Seja direto e objetivo
             max_tokens=1024,
             messages=[{"role": "user", "content": prompt}],
         )
+        record_llm_call("apuracao-upload", response.model, started, response.usage.input_tokens, response.usage.output_tokens)
         text_content = next((c for c in response.content if c.type == "text"), None)
         summary = text_content.text if text_content else "Não foi possível gerar o sumário."
         return {"summary": summary}
     except Exception as e:
+        if response is None:
+            record_llm_call("apuracao-upload", "claude-haiku-4-5-20251001", started, outcome="error")
         return JSONResponse({"error": str(e)}, status_code=500)
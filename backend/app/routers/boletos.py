@@ -0,0 +1,191 @@
+import asyncio
+import zipfile
+from collections import deque
+from collections.abc import AsyncIterator
+from concurrent.futures import Executor
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_read_db, in_array
+from app.core.etag import not_modified
+from app.models.boleto import Boleto
+from app.models.charge import Charge
+from app.models.customer import Customer
+from app.schemas.charge import BoletoBatchRequest
+from app.services.boleto_render import BoletoDoc, RenderCache, render, render_key, render_many
+from app.services.charge_ingest import MAX_BULK_ROWS
+
+router = APIRouter(prefix="/api/boletos", tags=["boletos"])
+
+MEDIA_TYPES = {"pdf": "application/pdf", "png": "image/png"}
+BATCH_CHUNK = 200
+
+cache = RenderCache(
+    settings.BOLETO_RENDER_CACHE_DIR,
+    settings.BOLETO_RENDER_CACHE_MB * 1024 * 1024,
+    settings.BOLETO_RENDER_CACHE_DISK_MB * 1024 * 1024,
+)
+
+
+async def _prune_cache() -> None:
+    if cache.prune_due:
+        await asyncio.to_thread(cache.prune)
+
+
+def _docs_stmt() -> Select:
+    return (
+        select(
+            Boleto.id.label("boletoId"),
+            Boleto.chargeId,
+            Boleto.linhaDigitavel,
+            Boleto.barcodeValue,
+            Charge.amountCents,
+            Charge.dueDate,
+            Charge.description,
+            Customer.name.label("customerName"),
+            Customer.doc.label("customerDoc"),
+            Boleto.createdAt,
+        )
+        .join(Charge, Charge.id == Boleto.chargeId)
+        .join(Customer, Customer.id == Charge.customerId)
+    )
+
+
+def _doc(row) -> BoletoDoc:
+    return BoletoDoc(**row, beneficiario=settings.BOLETO_BENEFICIARIO)
+
+
+@router.get("/{charge_id}/{fmt}")
+async def get_boleto_render(
+    charge_id: str,
+    fmt: str,
+    request: Request,
+    download: bool = Query(False),
+    db: AsyncSession = Depends(get_read_db),
+):
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail="Formato não suportado")
+    row = (await db.execute(_docs_stmt().where(Boleto.chargeId == charge_id))).mappings().one_or_none()
+    if not row:
+        raise HTTPException(status_code=404, detail="Boleto não encontrado")
+
+    doc = _doc(row)
+    key = render_key(doc, fmt)
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if cached := not_modified(request, etag, headers["Cache-Control"]):
+        return cached
+
+    data = cache.get(key, fmt)
+    if data is None:
+        data = await asyncio.to_thread(render, doc, fmt)
+        cache.put(key, fmt, data)
+        await _prune_cache()
+    disposition = "attachment" if download else "inline"
+    headers["Content-Disposition"] = f'{disposition}; filename="boleto-{charge_id}.{fmt}"'
+    return Response(content=data, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+class _ZipSink:
+    """Write-only file for ZipFile that hands back what was written since the last ``take``."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+async def _render_chunk(docs: list[BoletoDoc], fmt: str, pool: Executor) -> list[bytes]:
+    """Bytes per doc, in order: cache hits as they are, misses rendered in ``pool`` and cached."""
+    keys = [render_key(d, fmt) for d in docs]
+    found = [cache.get(key, fmt) for key in keys]
+    misses = [doc for doc, data in zip(docs, found) if data is None]
+    if misses:
+        rendered = dict(await asyncio.get_running_loop().run_in_executor(pool, render_many, misses, fmt))
+        for key, data in rendered.items():
+            cache.put(key, fmt, data)
+        found = [rendered[key] if data is None else data for key, data in zip(keys, found)]
+    return found
+
+
+async def zip_stream(docs: list[BoletoDoc], fmt: str, pool: Executor, ahead: int) -> AsyncIterator[bytes]:
+    """The zip of ``docs``, yielded a chunk of entries at a time.
+
+    Up to ``ahead`` chunks render at once; only those are ever in memory.
+    """
+    sink = _ZipSink()
+    starts = iter(range(0, len(docs), BATCH_CHUNK))
+    pending: deque[tuple[list[BoletoDoc], asyncio.Future]] = deque()
+    try:
+        # Unseekable sink: entries carry data descriptors. PDFs and PNGs are already deflated
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zf:
+            while True:
+                while len(pending) < ahead and (start := next(starts, None)) is not None:
+                    chunk = docs[start:start + BATCH_CHUNK]
+                    pending.append((chunk, asyncio.ensure_future(_render_chunk(chunk, fmt, pool))))
+                if not pending:
+                    break
+                chunk, task = pending.popleft()
+                for doc, data in zip(chunk, await task):
+                    zf.writestr(f"boleto-{doc.chargeId}.{fmt}", data)
+                yield sink.take()
+        # Central directory
+        yield sink.take()
+    finally:
+        # Client gone: don't leave renders queued behind us
+        for _, task in pending:
+            task.cancel()
+        await _prune_cache()
+
+
+@router.post("/render-batch")
+async def render_batch(
+    body: BoletoBatchRequest,
+    request: Request,
+    fmt: str = Query("pdf", pattern="^(pdf|png)$"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Zip with one rendered boleto per charge (ids or the same filter as the batch generator).
+
+    Cached renders are reused; the misses are rendered in the app's process
+    pool in chunks, stored in the cache and streamed out as each chunk is done.
+    """
+    stmt = _docs_stmt()
+    if body.chargeIds is not None:
+        if len(body.chargeIds) > MAX_BULK_ROWS:
+            raise HTTPException(status_code=413, detail=f"Máximo de {MAX_BULK_ROWS} cobranças por requisição")
+        stmt = stmt.where(in_array(Boleto.chargeId, body.chargeIds))
+    elif not body.customerId and not body.competencia:
+        raise HTTPException(status_code=400, detail="Informe chargeIds, customerId ou competencia")
+    else:
+        stmt = stmt.where(Charge.status.in_(body.status))
+        if body.customerId:
+            stmt = stmt.where(Charge.customerId == body.customerId)
+        if body.competencia:
+            stmt = stmt.where(Charge.competencia == body.competencia)
+    rows = (await db.execute(stmt.order_by(Boleto.chargeId).limit(MAX_BULK_ROWS + 1))).mappings().all()
+    if len(rows) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {MAX_BULK_ROWS} boletos por requisição; refine o filtro")
+    docs = [_doc(r) for r in rows]
+    if not docs:
+        raise HTTPException(status_code=404, detail="Nenhum boleto encontrado")
+
+    name = f"boletos-{body.competencia.replace('/', '-')}" if body.competencia else "boletos"
+    return StreamingResponse(
+        zip_stream(docs, fmt, request.app.state.render_pool, settings.BOLETO_RENDER_WORKERS),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{name}.zip"'},
+    )
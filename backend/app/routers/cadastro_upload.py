@@ -1,10 +1,12 @@
 import json
 import re
+import time
 
 from fastapi import APIRouter, File, UploadFile
 from fastapi.responses import JSONResponse
 
 from app.core.config import settings
+from app.services.ai_service import record_llm_call
 
 router = APIRouter(prefix="/api/cadastro", tags=["cadastro-upload"])
 
@@ -66,6 +68,8 @@ Regras:
 - O campo "nome" é obrigatório. Pule registros sem nome
 - Retorne APENAS o JSON, sem nenhum texto antes ou depois"""
 
+    started = time.perf_counter()
+    response = None
     try:
         from anthropic import Anthropic
 
@@ -75,6 +79,7 @@ Regras:
             max_tokens=4096,
             messages=[{"role": "user", "content": prompt}],
         )
+        record_llm_call("cadastro-upload", response.model, started, response.usage.input_tokens, response.usage.output_tokens)
         text_content = next((c for c in response.content if c.type == "text"), None)
         raw_response = text_content.text if text_content else ""
 
@@ -92,4 +97,6 @@ Regras:
             "summary": parsed.get("summary", ""),
         }
     except Exception as e:
+        if response is None:
+            record_llm_call("cadastro-upload", "claude-haiku-4-5-20251001", started, outcome="error")
         return JSONResponse({"error": str(e)}, status_code=500)
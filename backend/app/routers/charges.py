@@ -1,21 +1,53 @@
-import re
+import json
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, in_array
+from app.core.etag import not_modified, set_etag, weak_etag
 from app.models.boleto import Boleto
 from app.models.charge import Charge
-from app.schemas.charge import ChargeCreate, ChargeListOut, ChargeOut, ChargeUpdate
+from app.models.customer import Customer
+from app.schemas.charge import (
+    BoletoBatchOut,
+    BoletoBatchRequest,
+    BulkRowError,
+    ChargeBulkOut,
+    ChargeCreate,
+    ChargeListOut,
+    ChargeOut,
+    ChargeUpdate,
+)
+from app.services.boleto import boleto_rows, insert_boletos
+from app.services.cache_versions import CHARGES, version_subquery
+from app.services.charge_ingest import MAX_BULK_ROWS, insert_charges, validate_charges
+from app.services.dunning import refresh_schedule
 
 router = APIRouter(prefix="/api/charges", tags=["charges"])
 
 
+async def charges_etag(db: AsyncSession) -> str:
+    """Changes with any charge written or deleted, a customer renamed or a boleto issued.
+
+    Two index lookups and the CHARGES counter; nothing here scans a table.
+    """
+    row = (await db.execute(select(
+        select(func.max(Charge.updatedAt)).scalar_subquery(),
+        select(func.max(Customer.updatedAt)).scalar_subquery(),
+        version_subquery(CHARGES),
+    ))).one()
+    return weak_etag("charges", *row)
+
+
 @router.get("", response_model=list[ChargeListOut])
-async def list_charges(db: AsyncSession = Depends(get_db)):
+async def list_charges(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    etag = await charges_etag(db)
+    if cached := not_modified(request, etag):
+        return cached
+    set_etag(response, etag)
     result = await db.execute(
         select(Charge)
         .options(selectinload(Charge.customer), selectinload(Charge.boleto))
@@ -32,13 +64,115 @@ async def create_charge(body: ChargeCreate, db: AsyncSession = Depends(get_db)):
         amountCents=body.amountCents,
         dueDate=datetime.fromisoformat(body.dueDate),
         status="PENDING",
+        categoria=body.categoria,
+        competencia=body.competencia,
+        nfEmitida=body.nfEmitida,
     )
     db.add(charge)
+    await db.flush()
+    await refresh_schedule(db, [charge.id])
     await db.commit()
     await db.refresh(charge, ["customer"])
     return charge
 
 
+async def _read_bulk_items(request: Request) -> list:
+    """JSON array body, or one JSON object per line for application/x-ndjson.
+
+    Unparseable NDJSON lines come back as ``None`` so they keep their index.
+    """
+    if "ndjson" not in request.headers.get("content-type", ""):
+        try:
+            items = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="JSON inválido")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Envie uma lista de cobranças")
+    else:
+        items = []
+        buffer = b""
+        async for chunk in request.stream():
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            items.extend(_parse_ndjson_line(line) for line in lines if line.strip())
+            if len(items) > MAX_BULK_ROWS:
+                break
+        if buffer.strip():
+            items.append(_parse_ndjson_line(buffer))
+    if len(items) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {MAX_BULK_ROWS} cobranças por requisição")
+    return items
+
+
+def _parse_ndjson_line(line: bytes) -> dict | None:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+@router.post("/bulk", response_model=ChargeBulkOut, status_code=201)
+async def create_charges_bulk(
+    request: Request,
+    response: Response,
+    atomic: bool = Query(False, description="Não cria nada se alguma linha tiver erro"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create many charges in one transaction.
+
+    Accepts a JSON array of ``ChargeCreate`` or an NDJSON stream. Invalid
+    rows are reported by index in ``errors``; the valid ones are created
+    unless ``atomic`` is set, in which case nothing is written and the
+    response is a 422.
+    """
+    result = await validate_charges(db, await _read_bulk_items(request))
+    errors = [BulkRowError(index=i, error=msg) for i, msg in result.errors]
+    if atomic and errors:
+        response.status_code = 422
+        return ChargeBulkOut(created=0, ids=[], errors=errors)
+
+    await insert_charges(db, result.rows)
+    await refresh_schedule(db, [r["id"] for r in result.rows])
+    await db.commit()
+    return ChargeBulkOut(created=len(result.rows), ids=[r["id"] for r in result.rows], errors=errors)
+
+
+@router.post("/boletos", response_model=BoletoBatchOut, status_code=201)
+async def generate_boletos(body: BoletoBatchRequest, db: AsyncSession = Depends(get_db)):
+    """Create boletos for many charges: one anti-join finds the charges still
+    without one, then a single multi-row INSERT writes them all.
+
+    A filter creates at most MAX_BULK_ROWS boletos per call and sets ``more``
+    when charges are left; those are the next call's anti-join result.
+    """
+    if body.chargeIds is not None and len(body.chargeIds) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {MAX_BULK_ROWS} cobranças por requisição")
+    if body.chargeIds is None and not body.customerId and not body.competencia:
+        raise HTTPException(status_code=400, detail="Informe chargeIds, customerId ou competencia")
+
+    stmt = (
+        select(Charge.id, Charge.dueDate, Charge.amountCents)
+        .outerjoin(Boleto, Boleto.chargeId == Charge.id)
+        .where(Boleto.id.is_(None), Charge.status.in_(body.status))
+    )
+    if body.chargeIds is not None:
+        stmt = stmt.where(in_array(Charge.id, body.chargeIds))
+    else:
+        if body.customerId:
+            stmt = stmt.where(Charge.customerId == body.customerId)
+        if body.competencia:
+            stmt = stmt.where(Charge.competencia == body.competencia)
+    eligible = list((await db.execute(stmt.order_by(Charge.id).limit(MAX_BULK_ROWS + 1))).tuples())
+    more = len(eligible) > MAX_BULK_ROWS
+    eligible = eligible[:MAX_BULK_ROWS]
+
+    created = await insert_boletos(db, await boleto_rows(db, eligible))
+    await db.commit()
+
+    done = set(created)
+    skipped = [cid for cid in body.chargeIds if cid not in done] if body.chargeIds is not None else []
+    return BoletoBatchOut(created=len(created), chargeIds=created, skippedIds=skipped, more=more)
+
+
 @router.get("/{charge_id}", response_model=ChargeOut)
 async def get_charge(charge_id: str, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
@@ -68,6 +202,7 @@ async def update_charge(charge_id: str, body: ChargeUpdate, db: AsyncSession = D
         if field == "dueDate" and value is not None:
             value = datetime.fromisoformat(value)
         setattr(charge, field, value)
+    await refresh_schedule(db, [charge.id])
     await db.commit()
     await db.refresh(charge)
     return charge
@@ -96,20 +231,10 @@ async def generate_boleto(charge_id: str, db: AsyncSession = Depends(get_db)):
     if charge.boleto:
         return charge.boleto
 
-    # Deterministic linha digitavel based on charge ID
-    hash_digits = re.sub(r"[^0-9]", "", charge_id).ljust(47, "0")[:47]
-    linha = (
-        f"23793.{hash_digits[:5]} {hash_digits[5:15]}.{hash_digits[15:20]} "
-        f"{hash_digits[20:30]}.{hash_digits[30:35]} {hash_digits[35:36]} {hash_digits[36:47]}"
-    )
-    barcode = hash_digits[:44]
-
-    boleto = Boleto(
-        chargeId=charge_id,
-        linhaDigitavel=linha,
-        barcodeValue=barcode,
-        publicUrl=f"/boleto/{charge_id}",
-    )
+    rows = await boleto_rows(db, [(charge.id, charge.dueDate, charge.amountCents)])
+    if not rows:
+        raise HTTPException(status_code=400, detail="Valor ou vencimento fora da faixa do boleto")
+    boleto = Boleto(**rows[0])
     db.add(boleto)
     await db.commit()
     await db.refresh(boleto)
@@ -1,5 +1,6 @@
 import asyncio
 import json
+import time
 
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
@@ -12,6 +13,7 @@ from app.services.ai_service import (
     build_data_context,
     get_anthropic_client,
     get_mock_response,
+    record_llm_call,
 )
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
@@ -65,6 +67,8 @@ async def chat(request: Request):
     if is_streaming:
         async def event_generator():
             if anthropic:
+                started = time.perf_counter()
+                input_tokens = output_tokens = 0
                 try:
                     stream = anthropic.messages.create(
                         model="claude-haiku-4-5-20251001",
@@ -74,14 +78,20 @@ async def chat(request: Request):
                         stream=True,
                     )
                     for event in stream:
-                        if (
+                        if event.type == "message_start":
+                            input_tokens = event.message.usage.input_tokens
+                        elif event.type == "message_delta":
+                            output_tokens = event.usage.output_tokens
+                        elif (
                             event.type == "content_block_delta"
                             and event.delta.type == "text_delta"
                         ):
                             yield {"data": json.dumps({"text": event.delta.text})}
+                    record_llm_call("chat", "claude-haiku-4-5-20251001", started, input_tokens, output_tokens)
                     yield {"data": "[DONE]"}
                     return
                 except Exception:
+                    record_llm_call("chat", "claude-haiku-4-5-20251001", started, outcome="error")
                     pass  # Fall through to mock
 
             # Mock streaming
@@ -104,6 +114,7 @@ async def chat(request: Request):
 
     # Non-streaming mode
     if anthropic:
+        started = time.perf_counter()
         try:
             response = anthropic.messages.create(
                 model="claude-haiku-4-5-20251001",
@@ -111,12 +122,15 @@ async def chat(request: Request):
                 system=system_prompt,
                 messages=claude_messages,
             )
+            record_llm_call(
+                "chat", response.model, started, response.usage.input_tokens, response.usage.output_tokens
+            )
             text_content = next((c for c in response.content if c.type == "text"), None)
             reply = text_content.text if text_content else ""
             if reply:
                 return JSONResponse({"reply": reply})
         except Exception:
-            pass
+            record_llm_call("chat", "claude-haiku-4-5-20251001", started, outcome="error")
 
     # Mock fallback
     mock = get_mock_response(last_user_message)
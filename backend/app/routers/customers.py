@@ -1,17 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.database import get_db
+from app.core.etag import not_modified, set_etag, weak_etag
+from app.models.charge import Charge
 from app.models.customer import Customer
 from app.schemas.customer import CustomerCreate, CustomerOut, CustomerUpdate
+from app.services.cache_versions import CHARGES, version_subquery
 
 router = APIRouter(prefix="/api/customers", tags=["customers"])
 
 
+async def customers_etag(db: AsyncSession) -> str:
+    """Changes with any customer or charge written or deleted (customers embed their charges)."""
+    row = (await db.execute(select(
+        select(func.max(Customer.updatedAt)).scalar_subquery(),
+        select(func.max(Charge.updatedAt)).scalar_subquery(),
+        version_subquery(CHARGES),
+    ))).one()
+    return weak_etag("customers", *row)
+
+
 @router.get("", response_model=list[CustomerOut])
-async def list_customers(db: AsyncSession = Depends(get_db)):
+async def list_customers(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    etag = await customers_etag(db)
+    if cached := not_modified(request, etag):
+        return cached
+    set_etag(response, etag)
     result = await db.execute(
         select(Customer)
         .options(selectinload(Customer.charges))
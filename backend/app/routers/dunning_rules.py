@@ -1,23 +1,26 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.database import get_db
+from app.core.invalidation import Topic, bus
 from app.models.dunning import DunningRule
 from app.schemas.dunning import DunningRuleOut, DunningRuleUpdate
+from app.services.dunning_config import dunning_config
+from app.services.dunning_jobs import enqueue_schedule_rebuild
 
 router = APIRouter(prefix="/api/dunning-rules", tags=["dunning-rules"])
 
+# Fields that move fire dates; renaming a rule leaves DunningSchedule alone
+SCHEDULE_FIELDS = {"active", "timezone"}
+
 
 @router.get("/{rule_id}", response_model=DunningRuleOut)
-async def get_rule(rule_id: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(DunningRule)
-        .where(DunningRule.id == rule_id)
-        .options(selectinload(DunningRule.steps))
-    )
-    rule = result.scalar_one_or_none()
+async def get_rule(rule_id: str):
+    rule = await dunning_config.rule(rule_id)
     if not rule:
         raise HTTPException(status_code=404, detail="Régua não encontrada")
     return rule
@@ -32,10 +35,19 @@ async def update_rule(rule_id: str, body: DunningRuleUpdate, db: AsyncSession =
     )
     rule = result.scalar_one_or_none()
     if not rule:
-        raise HTTPException(status_code=500, detail="Erro ao atualizar régua")
-    for field, value in body.model_dump(exclude_unset=True).items():
+        raise HTTPException(status_code=404, detail="Régua não encontrada")
+    if body.timezone is not None:
+        try:
+            ZoneInfo(body.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Fuso horário inválido: {body.timezone}")
+    changes = body.model_dump(exclude_unset=True)
+    for field, value in changes.items():
         setattr(rule, field, value)
     await db.commit()
+    await bus.publish(Topic.DUNNING_CONFIG, [rule.id])
+    if changes.keys() & SCHEDULE_FIELDS:
+        await enqueue_schedule_rebuild(db)
     await db.refresh(rule)
     return rule
 
@@ -45,7 +57,9 @@ async def delete_rule(rule_id: str, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(DunningRule).where(DunningRule.id == rule_id))
     rule = result.scalar_one_or_none()
     if not rule:
-        raise HTTPException(status_code=500, detail="Erro ao excluir régua")
+        raise HTTPException(status_code=404, detail="Régua não encontrada")
     await db.delete(rule)
     await db.commit()
+    await bus.publish(Topic.DUNNING_CONFIG, [rule.id])
+    await enqueue_schedule_rebuild(db)
     return {"success": True}
@@ -1,104 +1,170 @@
-import json
-from datetime import datetime
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Literal
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
-from app.models.app_state import AppState
+from app.core.database import get_db, get_read_db
+from app.models.base import Channel, DunningJobStatus
 from app.models.charge import Charge
-from app.models.dunning import DunningStep
-from app.models.notification_log import NotificationLog
-from app.schemas.dunning import DunningRunResult
+from app.models.customer import Customer
+from app.models.dunning import DunningRunState, DunningSchedule, DunningStep
+from app.models.dunning_job import DunningJob
+from app.schemas.dunning import (
+    DunningForecastDay,
+    DunningForecastOut,
+    DunningJobCreate,
+    DunningJobOut,
+    DunningPreviewOut,
+    DunningPreviewStep,
+    DunningRunResult,
+    DunningScheduleItemOut,
+)
+from app.services.clock import clock
+from app.services.dunning import run_dunning as run_dunning_pass
+from app.services.dunning_calendar import config_fingerprint, day_buckets
+from app.services.dunning_config import dunning_config
+from app.services.dunning_jobs import enqueue_job
+from app.services.dunning_preview import preview_dunning
+from app.services.dunning_schedule import OPEN_STATUSES
 
 router = APIRouter(prefix="/api/dunning", tags=["dunning-run"])
 
 
 @router.post("/run", response_model=DunningRunResult)
-async def run_dunning(db: AsyncSession = Depends(get_db)):
-    # Get current date (simulated or real)
-    app_state_result = await db.execute(select(AppState).where(AppState.id == 1))
-    app_state = app_state_result.scalar_one_or_none()
-    now = app_state.simulatedNow if app_state and app_state.simulatedNow else datetime.utcnow()
-
-    # Get enabled steps with active rules
-    steps_result = await db.execute(
-        select(DunningStep)
-        .where(DunningStep.enabled == True)  # noqa: E712
-        .options(selectinload(DunningStep.rule))
+async def run_dunning(full: bool = False, db: AsyncSession = Depends(get_db)):
+    """Synchronous run, kept for small bases; prefer ``POST /api/dunning/jobs``."""
+    stats = await run_dunning_pass(db, incremental=False if full else None)
+    return DunningRunResult(
+        success=True,
+        notificationsCreated=stats.created,
+        processedCharges=stats.processed,
+        incremental=stats.incremental,
     )
-    steps = [s for s in steps_result.scalars().all() if s.rule.active]
 
-    # Get pending/overdue charges with customers
-    charges_result = await db.execute(
-        select(Charge)
-        .where(Charge.status.in_(["PENDING", "OVERDUE"]))
-        .options(selectinload(Charge.customer))
+
+@router.get("/preview", response_model=DunningPreviewOut)
+async def preview(sample: int = Query(3, ge=0, le=20), db: AsyncSession = Depends(get_read_db)):
+    """What ``POST /run`` would send right now, computed in a READ ONLY transaction."""
+    result = await preview_dunning(db, sample_size=sample)
+    return DunningPreviewOut(
+        now=result.now,
+        overdue=result.overdue,
+        total=sum(item.count for item in result.steps),
+        byChannel=result.by_channel,
+        steps=[
+            DunningPreviewStep(
+                stepId=item.step.id,
+                ruleId=item.step.ruleId,
+                trigger=item.step.trigger.value,
+                offsetDays=item.step.offsetDays,
+                channel=item.step.channel.value,
+                timezone=item.timezone,
+                count=item.count,
+                samples=item.samples,
+            )
+            for item in result.steps
+        ],
     )
-    charges = charges_result.scalars().all()
-
-    notifications_created = 0
-
-    for charge in charges:
-        due_date = charge.dueDate
-        if due_date.tzinfo:
-            from datetime import timezone
-            now_aware = now.replace(tzinfo=timezone.utc) if now.tzinfo is None else now
-            diff_days = round((now_aware - due_date).total_seconds() / 86400)
-        else:
-            diff_days = round((now - due_date).total_seconds() / 86400)
-
-        # Mark as OVERDUE if past due
-        if diff_days > 0 and charge.status == "PENDING":
-            charge.status = "OVERDUE"
-
-        for step in steps:
-            should_trigger = False
-            if step.trigger == "BEFORE_DUE" and diff_days == -step.offsetDays:
-                should_trigger = True
-            if step.trigger == "ON_DUE" and diff_days == 0:
-                should_trigger = True
-            if step.trigger == "AFTER_DUE" and diff_days == step.offsetDays:
-                should_trigger = True
-
-            if should_trigger:
-                # Check existing log
-                existing = await db.execute(
-                    select(NotificationLog).where(
-                        NotificationLog.chargeId == charge.id,
-                        NotificationLog.stepId == step.id,
-                    )
-                )
-                if existing.scalar_one_or_none():
-                    continue
-
-                rendered = (
-                    step.template
-                    .replace("{{nome}}", charge.customer.name)
-                    .replace("{{valor}}", f"R$ {charge.amountCents / 100:.2f}")
-                    .replace("{{vencimento}}", due_date.strftime("%d/%m/%Y"))
-                    .replace("{{descricao}}", charge.description)
-                )
-
-                log = NotificationLog(
-                    chargeId=charge.id,
-                    stepId=step.id,
-                    channel=step.channel,
-                    status="SENT",
-                    scheduledFor=now,
-                    sentAt=now,
-                    renderedMessage=rendered,
-                    metaJson=json.dumps({"trigger": step.trigger, "offsetDays": step.offsetDays}),
-                )
-                db.add(log)
-                notifications_created += 1
 
+
+@router.post("/jobs", response_model=DunningJobOut, status_code=202)
+async def create_job(response: Response, body: DunningJobCreate | None = None, db: AsyncSession = Depends(get_db)):
+    """Queue a run and return immediately; a queued or running job with the same parameters is returned instead."""
+    job = await enqueue_job(db, (body or DunningJobCreate()).model_dump())
+    response.headers["Location"] = f"/api/dunning/jobs/{job.id}"
+    return job
+
+
+@router.get("/jobs", response_model=list[DunningJobOut])
+async def list_jobs(limit: int = 20, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(DunningJob).order_by(DunningJob.createdAt.desc()).limit(min(limit, 100)))
+    return result.scalars().all()
+
+
+@router.get("/jobs/{job_id}", response_model=DunningJobOut)
+async def get_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    job = await db.get(DunningJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=DunningJobOut)
+async def cancel_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    """A queued job is canceled at once; a running one stops after its current page."""
+    job = (await db.execute(select(DunningJob).where(DunningJob.id == job_id).with_for_update())).scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if job.status == DunningJobStatus.QUEUED:
+        job.status = DunningJobStatus.CANCELED
+        job.finishedAt = func.now()
+    elif job.status == DunningJobStatus.RUNNING:
+        job.cancelRequested = True
+    else:
+        raise HTTPException(status_code=409, detail="Job já finalizado")
     await db.commit()
+    await db.refresh(job)
+    return job
+
+
+@router.get("/forecast", response_model=DunningForecastOut)
+async def forecast(days: int = Query(7, ge=1, le=90), db: AsyncSession = Depends(get_read_db)):
+    """Notifications the régua will send over the next ``days`` local days, read from DunningSchedule."""
+    buckets = day_buckets(await dunning_config.active_steps(), await clock.now())
+    today = buckets[0].today
+    end = today + timedelta(days=days - 1)
+    state = await db.get(DunningRunState, 1)
+
+    rows = await db.execute(
+        select(DunningSchedule.fireDate, DunningSchedule.channel, func.count())
+        .join(Charge, Charge.id == DunningSchedule.chargeId)
+        .where(DunningSchedule.fireDate.between(today, end), Charge.status.in_(OPEN_STATUSES))
+        .group_by(DunningSchedule.fireDate, DunningSchedule.channel)
+    )
+    by_day: dict[date, dict[str, int]] = defaultdict(dict)
+    for fire_date, channel, count in rows.tuples():
+        by_day[fire_date][channel.value] = count
+    return DunningForecastOut(
+        fromDate=today,
+        toDate=end,
+        total=sum(sum(c.values()) for c in by_day.values()),
+        stale=state is None or state.configFingerprint != config_fingerprint(buckets),
+        days=[
+            DunningForecastDay(date=d, total=sum(by_day[d].values()), byChannel=by_day[d])
+            for d in (today + timedelta(days=i) for i in range(days))
+        ],
+    )
 
-    return DunningRunResult(
-        success=True,
-        notificationsCreated=notifications_created,
-        processedCharges=len(charges),
+
+@router.get("/forecast/items", response_model=list[DunningScheduleItemOut])
+async def forecast_items(
+    fireDate: date,
+    channel: Channel | Literal["all"] | None = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = (
+        select(
+            DunningSchedule.chargeId,
+            Customer.name.label("customerName"),
+            Charge.description,
+            Charge.amountCents,
+            Charge.dueDate,
+            DunningSchedule.stepId,
+            DunningStep.trigger,
+            DunningStep.offsetDays,
+            DunningSchedule.channel,
+            DunningSchedule.fireDate,
+        )
+        .join(Charge, Charge.id == DunningSchedule.chargeId)
+        .join(Customer, Customer.id == Charge.customerId)
+        .join(DunningStep, DunningStep.id == DunningSchedule.stepId)
+        .where(DunningSchedule.fireDate == fireDate, Charge.status.in_(OPEN_STATUSES))
     )
+    if channel and channel != "all":
+        stmt = stmt.where(DunningSchedule.channel == channel)
+    rows = await db.execute(stmt.order_by(DunningSchedule.chargeId, DunningSchedule.stepId).limit(limit))
+    return [DunningScheduleItemOut(**r) for r in rows.mappings()]
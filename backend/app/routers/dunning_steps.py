@@ -1,23 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.core.database import get_db
+from app.core.etag import not_modified, set_etag, weak_etag
+from app.core.invalidation import Topic, bus
 from app.models.dunning import DunningStep
 from app.schemas.dunning import DunningStepCreate, DunningStepOut, DunningStepUpdate
+from app.services.dunning_config import dunning_config
+from app.services.dunning_jobs import enqueue_schedule_rebuild
 
 router = APIRouter(prefix="/api/dunning-steps", tags=["dunning-steps"])
 
+# Fields that end up in DunningSchedule; template edits don't need a rebuild
+SCHEDULE_FIELDS = {"trigger", "offsetDays", "channel", "enabled"}
+
 
 @router.get("", response_model=list[DunningStepOut])
-async def list_steps(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(DunningStep)
-        .options(selectinload(DunningStep.rule))
-        .order_by(DunningStep.offsetDays.asc())
-    )
-    return result.scalars().all()
+async def list_steps(request: Request, response: Response):
+    steps = await dunning_config.steps()
+    # The cached config's version: no query at all
+    etag = weak_etag("dunning_steps", dunning_config.version)
+    if cached := not_modified(request, etag):
+        return cached
+    set_etag(response, etag)
+    return steps
 
 
 @router.post("", response_model=DunningStepOut, status_code=201)
@@ -32,18 +39,15 @@ async def create_step(body: DunningStepCreate, db: AsyncSession = Depends(get_db
     )
     db.add(step)
     await db.commit()
+    await bus.publish(Topic.DUNNING_CONFIG, [step.id])
+    await enqueue_schedule_rebuild(db)
     await db.refresh(step)
     return step
 
 
 @router.get("/{step_id}", response_model=DunningStepOut)
-async def get_step(step_id: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(DunningStep)
-        .where(DunningStep.id == step_id)
-        .options(selectinload(DunningStep.rule))
-    )
-    step = result.scalar_one_or_none()
+async def get_step(step_id: str):
+    step = await dunning_config.step(step_id)
     if not step:
         raise HTTPException(status_code=404, detail="Step não encontrado")
     return step
@@ -54,10 +58,14 @@ async def update_step(step_id: str, body: DunningStepUpdate, db: AsyncSession =
     result = await db.execute(select(DunningStep).where(DunningStep.id == step_id))
     step = result.scalar_one_or_none()
     if not step:
-        raise HTTPException(status_code=500, detail="Erro ao atualizar step")
-    for field, value in body.model_dump(exclude_unset=True).items():
+        raise HTTPException(status_code=404, detail="Step não encontrado")
+    changes = body.model_dump(exclude_unset=True)
+    for field, value in changes.items():
         setattr(step, field, value)
     await db.commit()
+    await bus.publish(Topic.DUNNING_CONFIG, [step.id])
+    if changes.keys() & SCHEDULE_FIELDS:
+        await enqueue_schedule_rebuild(db)
     await db.refresh(step)
     return step
 
@@ -67,7 +75,9 @@ async def delete_step(step_id: str, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(DunningStep).where(DunningStep.id == step_id))
     step = result.scalar_one_or_none()
     if not step:
-        raise HTTPException(status_code=500, detail="Erro ao excluir step")
+        raise HTTPException(status_code=404, detail="Step não encontrado")
     await db.delete(step)
     await db.commit()
+    await bus.publish(Topic.DUNNING_CONFIG, [step.id])
+    await enqueue_schedule_rebuild(db)
     return {"success": True}
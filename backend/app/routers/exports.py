@@ -0,0 +1,212 @@
+import csv
+import enum
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.database import read_session_factory
+from app.models.base import ChargeStatus
+from app.models.boleto import Boleto
+from app.models.charge import Charge
+from app.models.customer import Customer
+from app.models.dunning import DunningStep
+from app.models.notification_log import NotificationLog
+
+router = APIRouter(prefix="/api/exports", tags=["exports"])
+
+# Rows fetched per round trip from the server-side cursor
+CHUNK_ROWS = 2000
+
+STATUS_ALIASES = {
+    "vencidas": ChargeStatus.OVERDUE,
+    "pendentes": ChargeStatus.PENDING,
+    "pagas": ChargeStatus.PAID,
+    "canceladas": ChargeStatus.CANCELED,
+}
+
+CHARGE_COLUMNS = [
+    Charge.id,
+    Charge.customerId,
+    Customer.name.label("customerName"),
+    Customer.doc.label("customerDoc"),
+    Charge.description,
+    Charge.amountCents,
+    Charge.dueDate,
+    Charge.status,
+    Charge.categoria,
+    Charge.competencia,
+    Charge.createdAt,
+    Boleto.linhaDigitavel,
+]
+
+
+def _value(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if isinstance(v, enum.Enum):
+        return v.value
+    return v
+
+
+def _csv_chunk(rows: list, header: list[str] | None = None) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(header)
+    writer.writerows([_value(v) for v in row] for row in rows)
+    return buf.getvalue().encode()
+
+
+def _ndjson_chunk(rows: list, columns: list[str]) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(columns, map(_value, row))), ensure_ascii=False) + "\n" for row in rows
+    ).encode()
+
+
+async def _stream_rows(
+    factory: async_sessionmaker[AsyncSession],
+    stmt: Select,
+    fmt: str,
+    gzip: bool,
+) -> AsyncIterator[bytes]:
+    """Encode ``stmt`` chunk by chunk from a server-side cursor.
+
+    The session is opened here rather than through ``Depends`` so it lives
+    exactly as long as the response body is being sent.
+    """
+    columns = [c.name for c in stmt.selected_columns]
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    encode: Callable[[bytes], bytes] = compressor.compress if compressor else (lambda b: b)
+
+    # UTF-8 BOM so Excel opens accents correctly
+    first = encode(b"\xef\xbb\xbf" + _csv_chunk([], columns)) if fmt == "csv" else b""
+    if first:
+        yield first
+
+    async with factory() as session:
+        result = await session.stream(stmt.execution_options(yield_per=CHUNK_ROWS))
+        async for rows in result.partitions():
+            data = _csv_chunk(rows) if fmt == "csv" else _ndjson_chunk(rows, columns)
+            out = encode(data)
+            if out:
+                yield out
+
+    if compressor:
+        yield compressor.flush()
+
+
+async def _export(request: Request, stmt: Select, name: str, fmt: str) -> StreamingResponse:
+    gzip = "gzip" in request.headers.get("accept-encoding", "")
+    media_type = "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{name}-{datetime.now():%Y%m%d-%H%M}.{fmt}"',
+        "Vary": "Accept-Encoding",
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    factory = await read_session_factory(request)
+    return StreamingResponse(_stream_rows(factory, stmt, fmt, gzip), media_type=media_type, headers=headers)
+
+
+def _parse_statuses(status: str | None) -> list[ChargeStatus]:
+    if not status or status == "all":
+        return []
+    statuses = []
+    for raw in status.split(","):
+        raw = raw.strip()
+        value = STATUS_ALIASES.get(raw.lower())
+        if value is None:
+            try:
+                value = ChargeStatus(raw.upper())
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Status inválido: {raw}")
+        statuses.append(value)
+    return statuses
+
+
+def _charges_stmt(statuses: list[ChargeStatus], customer_id: str | None) -> Select:
+    stmt = (
+        select(*CHARGE_COLUMNS)
+        .join(Customer, Customer.id == Charge.customerId)
+        .outerjoin(Boleto, Boleto.chargeId == Charge.id)
+    )
+    if statuses:
+        stmt = stmt.where(Charge.status.in_(statuses))
+    if customer_id:
+        stmt = stmt.where(Charge.customerId == customer_id)
+    return stmt.order_by(Charge.dueDate, Charge.id)
+
+
+@router.get("/charges")
+async def export_charges(
+    request: Request,
+    status: str | None = Query(None, description="Ex.: OVERDUE, PENDING,OVERDUE ou vencidas"),
+    customerId: str | None = Query(None),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+):
+    stmt = _charges_stmt(_parse_statuses(status), customerId)
+    return await _export(request, stmt, "cobrancas", format)
+
+
+@router.get("/cobrancas-vencidas")
+async def export_overdue_charges(request: Request, format: str = Query("csv", pattern="^(csv|ndjson)$")):
+    """Target of the chat's ``export|cobrancas-vencidas`` action."""
+    stmt = _charges_stmt([ChargeStatus.OVERDUE], None)
+    return await _export(request, stmt, "cobrancas-vencidas", format)
+
+
+@router.get("/customers")
+async def export_customers(request: Request, format: str = Query("csv", pattern="^(csv|ndjson)$")):
+    stmt = select(
+        Customer.id, Customer.name, Customer.doc, Customer.email, Customer.phone, Customer.createdAt,
+    ).order_by(Customer.createdAt, Customer.id)
+    return await _export(request, stmt, "clientes", format)
+
+
+@router.get("/logs")
+async def export_logs(
+    request: Request,
+    channel: str | None = Query(None),
+    status: str | None = Query(None),
+    since: datetime | None = Query(None, description="createdAt >= since"),
+    until: datetime | None = Query(None, description="createdAt < until"),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+):
+    stmt = (
+        select(
+            NotificationLog.id,
+            NotificationLog.chargeId,
+            Charge.description.label("chargeDescription"),
+            Customer.name.label("customerName"),
+            NotificationLog.stepId,
+            DunningStep.trigger.label("stepTrigger"),
+            DunningStep.offsetDays.label("stepOffsetDays"),
+            NotificationLog.channel,
+            NotificationLog.status,
+            NotificationLog.scheduledFor,
+            NotificationLog.sentAt,
+            NotificationLog.renderedMessage,
+            NotificationLog.createdAt,
+        )
+        .join(Charge, Charge.id == NotificationLog.chargeId)
+        .join(Customer, Customer.id == Charge.customerId)
+        .join(DunningStep, DunningStep.id == NotificationLog.stepId)
+    )
+    if channel and channel != "all":
+        stmt = stmt.where(NotificationLog.channel == channel)
+    if status and status != "all":
+        stmt = stmt.where(NotificationLog.status == status)
+    # Bounds on createdAt let the planner skip whole monthly partitions
+    if since:
+        stmt = stmt.where(NotificationLog.createdAt >= since)
+    if until:
+        stmt = stmt.where(NotificationLog.createdAt < until)
+    stmt = stmt.order_by(NotificationLog.createdAt, NotificationLog.id)
+    return await _export(request, stmt, "logs", format)
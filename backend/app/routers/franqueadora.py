@@ -1,10 +1,11 @@
 import re
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.etag import not_modified, set_etag, weak_etag
 from app.models.franqueadora import Franqueadora
 from app.schemas.franqueadora import FranqueadoraOut, FranqueadoraUpsert
 
@@ -14,10 +15,13 @@ EMAIL_RE = re.compile(r"^[^\s@]+@[^\s@]+\.[^\s@]+$")
 
 
 @router.get("")
-async def get_franqueadora(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Franqueadora).limit(1))
-    franqueadora = result.scalar_one_or_none()
-    return franqueadora
+async def get_franqueadora(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    version = (await db.execute(select(Franqueadora.id, Franqueadora.updatedAt).limit(1))).one_or_none()
+    etag = weak_etag("franqueadora", *(version or ()))
+    if cached := not_modified(request, etag):
+        return cached
+    set_etag(response, etag)
+    return await db.get(Franqueadora, version.id) if version else None
 
 
 @router.put("", response_model=FranqueadoraOut)
@@ -1,35 +1,118 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select
+import base64
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.models.charge import Charge
+from app.models.customer import Customer
+from app.models.dunning import DunningStep
 from app.models.notification_log import NotificationLog
+from app.schemas.notification_log import NotificationLogFlatOut, NotificationLogOut
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
 
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at: datetime, log_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{log_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), log_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
 
-@router.get("")
+@router.get("", response_model=list[NotificationLogOut] | list[NotificationLogFlatOut])
 async def list_logs(
+    response: Response,
     channel: str | None = Query(None),
     status: str | None = Query(None),
-    db: AsyncSession = Depends(get_db),
+    chargeId: str | None = Query(None),
+    stepId: str | None = Query(None),
+    since: datetime | None = Query(None, description="createdAt >= since"),
+    until: datetime | None = Query(None, description="createdAt < until"),
+    cursor: str | None = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    view: str = Query("full", pattern="^(full|flat)$"),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    stmt = (
-        select(NotificationLog)
-        .options(
+    """Newest-first log feed, keyset-paginated on (createdAt, id).
+
+    The body stays a plain array; the cursor for the next page comes in the
+    ``X-Next-Cursor`` header and is absent on the last page. ``view=flat``
+    returns one row per log with charge, customer and step columns from a
+    single join instead of nested objects.
+    """
+    if view == "flat":
+        stmt = (
+            select(
+                NotificationLog.id,
+                NotificationLog.chargeId,
+                NotificationLog.stepId,
+                NotificationLog.channel,
+                NotificationLog.status,
+                NotificationLog.scheduledFor,
+                NotificationLog.sentAt,
+                NotificationLog.renderedMessage,
+                NotificationLog.createdAt,
+                Charge.description.label("chargeDescription"),
+                Charge.amountCents,
+                Charge.dueDate,
+                Charge.status.label("chargeStatus"),
+                Charge.customerId,
+                Customer.name.label("customerName"),
+                DunningStep.trigger,
+                DunningStep.offsetDays,
+            )
+            .join(Charge, Charge.id == NotificationLog.chargeId)
+            .join(Customer, Customer.id == Charge.customerId)
+            .join(DunningStep, DunningStep.id == NotificationLog.stepId)
+        )
+    else:
+        stmt = select(NotificationLog).options(
             selectinload(NotificationLog.charge).selectinload(Charge.customer),
             selectinload(NotificationLog.step),
         )
-        .order_by(NotificationLog.createdAt.desc())
-        .limit(100)
-    )
 
     if channel and channel != "all":
         stmt = stmt.where(NotificationLog.channel == channel)
     if status and status != "all":
         stmt = stmt.where(NotificationLog.status == status)
+    if chargeId:
+        stmt = stmt.where(NotificationLog.chargeId == chargeId)
+    if stepId:
+        stmt = stmt.where(NotificationLog.stepId == stepId)
+    if since:
+        stmt = stmt.where(NotificationLog.createdAt >= since)
+    if until:
+        stmt = stmt.where(NotificationLog.createdAt < until)
+    if cursor:
+        created_at, log_id = decode_cursor(cursor)
+        # The planner can't prune partitions from a row comparison; the plain
+        # createdAt bound lets it skip every month newer than the cursor.
+        stmt = stmt.where(
+            NotificationLog.createdAt <= created_at,
+            tuple_(NotificationLog.createdAt, NotificationLog.id) < (created_at, log_id),
+        )
 
+    # One extra row tells us whether there is a next page
+    stmt = stmt.order_by(NotificationLog.createdAt.desc(), NotificationLog.id.desc()).limit(limit + 1)
     result = await db.execute(stmt)
-    return result.scalars().all()
+
+    if view == "flat":
+        rows = [NotificationLogFlatOut.model_validate(r) for r in result.mappings().all()]
+    else:
+        rows = [NotificationLogOut.model_validate(r) for r in result.scalars().all()]
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].createdAt, rows[-1].id)
+    return rows
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.middleware import route_query_stats
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/api/metrics/queries")
+async def query_metrics():
+    routes = sorted(route_query_stats.items(), key=lambda item: item[1].queries, reverse=True)
+    return {
+        "slowQueryThresholdMs": settings.SLOW_QUERY_MS,
+        "routes": {label: stats.snapshot() for label, stats in routes},
+    }
@@ -3,7 +3,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.models.charge import Charge
 from app.models.customer import Customer
 from app.schemas.chat import MiaRequest
@@ -42,7 +42,7 @@ async def _get_context_data(db: AsyncSession) -> dict | None:
 
 
 @router.post("")
-async def mia_chat(body: MiaRequest, db: AsyncSession = Depends(get_db)):
+async def mia_chat(body: MiaRequest, db: AsyncSession = Depends(get_read_db)):
     if not body.message:
         return {"error": "Message is required"}, 400
 
@@ -1,30 +1,42 @@
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.invalidation import Topic, bus
 from app.models.app_state import AppState
-from app.schemas.simulation import SimulateRequest, SimulateResetResult, SimulateResult
+from app.schemas.simulation import (
+    FastForwardDay,
+    FastForwardRequest,
+    FastForwardResult,
+    SimulateRequest,
+    SimulateResetResult,
+    SimulateResult,
+)
+from app.services.clock import clock
+from app.services.dunning_simulation import fast_forward
 
 router = APIRouter(prefix="/api/simulate", tags=["simulation"])
 
+# Read-and-advance in one statement, so concurrent calls can't both start from the same date
+ADVANCE_CLOCK_SQL = text("""
+    INSERT INTO "AppState" (id, "simulatedNow") VALUES (1, timezone('UTC', now()) + make_interval(days => :days))
+    ON CONFLICT (id) DO UPDATE
+    SET "simulatedNow" = COALESCE("AppState"."simulatedNow", timezone('UTC', now())) + make_interval(days => :days)
+    RETURNING "simulatedNow"
+""")
+
 
 @router.post("", response_model=SimulateResult)
 async def simulate(body: SimulateRequest, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(AppState).where(AppState.id == 1))
-    app_state = result.scalar_one_or_none()
-    current_date = app_state.simulatedNow if app_state and app_state.simulatedNow else datetime.utcnow()
-    new_date = current_date + timedelta(days=body.days)
-
-    if app_state:
-        app_state.simulatedNow = new_date
-    else:
-        app_state = AppState(id=1, simulatedNow=new_date)
-        db.add(app_state)
-
+    new_date = (await db.execute(ADVANCE_CLOCK_SQL, {"days": body.days})).scalar_one()
+    current_date = new_date - timedelta(days=body.days)
     await db.commit()
+    await bus.publish(Topic.APP_STATE)
+    clock.set_simulated(new_date)
 
     return SimulateResult(
         success=True,
@@ -36,15 +48,40 @@ async def simulate(body: SimulateRequest, db: AsyncSession = Depends(get_db)):
 
 @router.post("/reset", response_model=SimulateResetResult)
 async def simulate_reset(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(AppState).where(AppState.id == 1))
-    app_state = result.scalar_one_or_none()
-
-    if app_state:
-        app_state.simulatedNow = None
-    else:
-        app_state = AppState(id=1, simulatedNow=None)
-        db.add(app_state)
-
+    await db.execute(
+        pg_insert(AppState)
+        .values(id=1, simulatedNow=None)
+        .on_conflict_do_update(index_elements=[AppState.id], set_={"simulatedNow": None})
+    )
     await db.commit()
+    await bus.publish(Topic.APP_STATE)
+    clock.set_simulated(None)
 
     return SimulateResetResult(success=True, date=datetime.utcnow().isoformat())
+
+
+@router.post("/fast-forward", response_model=FastForwardResult)
+async def simulate_fast_forward(body: FastForwardRequest):
+    """Replay the daily dunning run over ``days`` simulated days in one transaction."""
+    start, timeline = await fast_forward(body.days, commit=body.commit, batch_size=body.batchSize)
+    if body.commit:
+        await bus.publish(Topic.APP_STATE)
+    return FastForwardResult(
+        success=True,
+        committed=body.commit,
+        previousDate=start.isoformat(),
+        newDate=(start + timedelta(days=body.days)).isoformat(),
+        daysAdvanced=body.days,
+        notificationsCreated=sum(day.created for day in timeline),
+        days=[
+            FastForwardDay(
+                date=day.date,
+                now=day.now,
+                processedCharges=day.processed,
+                notificationsCreated=day.created,
+                byChannel=day.by_channel,
+                incremental=day.incremental,
+            )
+            for day in timeline
+        ],
+    )
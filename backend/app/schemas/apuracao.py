@@ -0,0 +1,45 @@
+from pydantic import BaseModel, Field
+
+
+class ApuracaoFranqueado(BaseModel):
+    id: str  # Customer.id
+    nome: str
+    total: int  # faturamento da competência, em centavos
+    mesAnterior: int = 0
+
+
+class ApuracaoRegras(BaseModel):
+    royaltyPercent: float = 5
+    marketingPercent: float = 2
+
+
+class ApuracaoNfConfig(BaseModel):
+    royalty: bool = True
+    marketing: bool = False
+    exceçõesRoyalty: list[str] = []
+    exceçõesMarketing: list[str] = []
+
+
+class ApuracaoCicloRequest(BaseModel):
+    competencia: str = Field(description='Ex.: "Mar/2026"')
+    franqueados: list[ApuracaoFranqueado]
+    regras: ApuracaoRegras = ApuracaoRegras()
+    nfConfig: ApuracaoNfConfig = ApuracaoNfConfig()
+    dueDate: str | None = None  # ISO; padrão: dia 3 do mês seguinte + 15 dias
+    gerarBoletos: bool = False
+
+
+class ApuracaoSkipped(BaseModel):
+    customerId: str
+    categoria: str
+    reason: str
+
+
+class ApuracaoCicloOut(BaseModel):
+    competencia: str
+    chargesCreated: int
+    boletosCreated: int
+    chargeIds: list[str]
+    skipped: list[ApuracaoSkipped]
+    apuracao: list[dict]
+    timingsMs: dict[str, float]
@@ -2,12 +2,46 @@ from datetime import datetime
 
 from pydantic import BaseModel
 
+from app.models.base import ChargeStatus
+
 
 class ChargeCreate(BaseModel):
     customerId: str
     description: str
     amountCents: int
     dueDate: str  # ISO date string
+    categoria: str | None = None
+    competencia: str | None = None  # "Mar/2026"
+    nfEmitida: bool = False
+
+
+class BulkRowError(BaseModel):
+    index: int
+    error: str
+
+
+class ChargeBulkOut(BaseModel):
+    created: int
+    ids: list[str]
+    errors: list[BulkRowError]
+
+
+class BoletoBatchRequest(BaseModel):
+    """Either explicit ``chargeIds`` or a filter (customerId and/or competencia); the filter is ignored when ids are given."""
+
+    chargeIds: list[str] | None = None
+    customerId: str | None = None
+    competencia: str | None = None
+    status: list[ChargeStatus] = [ChargeStatus.PENDING, ChargeStatus.OVERDUE]
+
+
+class BoletoBatchOut(BaseModel):
+    created: int
+    chargeIds: list[str]
+    # Requested ids left out: unknown, paid/canceled or already with a boleto
+    skippedIds: list[str]
+    # A filter matched more than MAX_BULK_ROWS charges; repeat the request for the rest
+    more: bool = False
 
 
 class ChargeUpdate(BaseModel):
@@ -61,6 +95,8 @@ class ChargeListOut(BaseModel):
     amountCents: int
     dueDate: datetime
     status: str
+    categoria: str | None = None
+    competencia: str | None = None
     createdAt: datetime
     updatedAt: datetime
     customer: CustomerBrief | None = None
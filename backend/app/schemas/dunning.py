@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class DunningStepCreate(BaseModel):
@@ -65,3 +65,85 @@ class DunningRunResult(BaseModel):
     success: bool
     notificationsCreated: int
     processedCharges: int
+    incremental: bool = False
+
+
+class DunningJobCreate(BaseModel):
+    batchSize: int = Field(2000, ge=100, le=20000)
+    # None = DUNNING_RUN_WORKERS
+    workers: int | None = Field(None, ge=1, le=32)
+    # Re-read every open charge instead of only those changed or due since the last run
+    full: bool = False
+    # False: only rebuild DunningSchedule / nextDunningDate, send nothing
+    notify: bool = True
+
+
+class DunningJobOut(BaseModel):
+    id: str
+    status: str
+    totalCharges: int
+    processedCharges: int
+    notificationsCreated: int
+    cancelRequested: bool
+    error: str | None = None
+    workerId: str | None = None
+    heartbeatAt: datetime | None = None
+    createdAt: datetime
+    startedAt: datetime | None = None
+    finishedAt: datetime | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class DunningForecastDay(BaseModel):
+    date: date
+    total: int
+    byChannel: dict[str, int]
+
+
+class DunningForecastOut(BaseModel):
+    fromDate: date
+    toDate: date
+    total: int
+    # Steps changed since the schedule was last built; a rebuild job is on its way
+    stale: bool
+    days: list[DunningForecastDay]
+
+
+class DunningScheduleItemOut(BaseModel):
+    chargeId: str
+    customerName: str
+    description: str
+    amountCents: int
+    dueDate: datetime
+    stepId: str
+    trigger: str
+    offsetDays: int
+    channel: str
+    fireDate: date
+
+
+class DunningPreviewSample(BaseModel):
+    chargeId: str
+    customerName: str
+    renderedMessage: str
+
+
+class DunningPreviewStep(BaseModel):
+    stepId: str
+    ruleId: str
+    trigger: str
+    offsetDays: int
+    channel: str
+    timezone: str
+    count: int
+    samples: list[DunningPreviewSample]
+
+
+class DunningPreviewOut(BaseModel):
+    now: datetime
+    # PENDING charges the run would mark OVERDUE
+    overdue: int
+    total: int
+    byChannel: dict[str, int]
+    steps: list[DunningPreviewStep]
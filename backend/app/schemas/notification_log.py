@@ -54,4 +54,26 @@ class NotificationLogOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class NotificationLogFlatOut(BaseModel):
+    id: str
+    chargeId: str
+    stepId: str
+    channel: str
+    status: str
+    scheduledFor: datetime
+    sentAt: datetime | None = None
+    renderedMessage: str
+    createdAt: datetime
+    chargeDescription: str
+    amountCents: int
+    dueDate: datetime
+    chargeStatus: str
+    customerId: str
+    customerName: str
+    trigger: str
+    offsetDays: int
+
+    model_config = {"from_attributes": True}
+
+
 ChargeBrief.model_rebuild()
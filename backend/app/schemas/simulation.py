@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from datetime import date, datetime
+
+from pydantic import BaseModel, Field
 
 
 class SimulateRequest(BaseModel):
@@ -15,3 +17,29 @@ class SimulateResult(BaseModel):
 class SimulateResetResult(BaseModel):
     success: bool
     date: str
+
+
+class FastForwardRequest(BaseModel):
+    days: int = Field(30, ge=1, le=366)
+    # False: what-if, everything is rolled back; True: keep the notifications and the advanced clock
+    commit: bool = False
+    batchSize: int = Field(2000, ge=100, le=20000)
+
+
+class FastForwardDay(BaseModel):
+    date: date
+    now: datetime
+    processedCharges: int
+    notificationsCreated: int
+    byChannel: dict[str, int]
+    incremental: bool
+
+
+class FastForwardResult(BaseModel):
+    success: bool
+    committed: bool
+    previousDate: str
+    newDate: str
+    daysAdvanced: int
+    notificationsCreated: int
+    days: list[FastForwardDay]
@@ -1,4 +1,7 @@
+import time
+
 from app.core.config import settings
+from app.core.metrics import LLM_REQUEST_DURATION, LLM_TOKENS
 from app.data.clientes_dummy import franqueados_dummy, get_franqueados_stats
 from app.data.cobrancas_dummy import cobrancas_dummy, get_cobrancas_stats
 from app.data.apuracao_historico_dummy import ciclos_historico
@@ -13,6 +16,22 @@ def get_anthropic_client():
     return Anthropic(api_key=key)
 
 
+def record_llm_call(
+    endpoint: str,
+    model: str,
+    started: float,
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    outcome: str = "ok",
+) -> None:
+    """Feed /metrics with the latency and token usage of one LLM call."""
+    LLM_REQUEST_DURATION.observe(time.perf_counter() - started, endpoint, model, outcome)
+    if input_tokens:
+        LLM_TOKENS.inc(endpoint, model, "input", amount=input_tokens)
+    if output_tokens:
+        LLM_TOKENS.inc(endpoint, model, "output", amount=output_tokens)
+
+
 JULIA_SYSTEM_PROMPT = """Você é Júlia, a Agente Menlo IA — analista de dados especializada em redes de franquias e gestão de cobranças.
 
 **Persona:**
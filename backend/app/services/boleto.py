@@ -0,0 +1,60 @@
+"""Boleto numbering and bulk creation."""
+
+from datetime import datetime, timezone
+
+from cuid2 import cuid_wrapper
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.models.boleto import Boleto
+from app.services.febraban import BoletoEncoder
+
+cuid_generate = cuid_wrapper()
+
+encoder = BoletoEncoder(settings.BOLETO_BANCO, settings.BOLETO_AGENCIA, settings.BOLETO_CARTEIRA, settings.BOLETO_CONTA)
+
+NEXT_NOSSO_NUMEROS_SQL = text("""SELECT nextval('"Boleto_nossoNumero_seq"') FROM generate_series(1, :n)""")
+
+
+async def next_nosso_numeros(db, n: int) -> list[int]:
+    """Reserve ``n`` nosso números in one round trip."""
+    if n <= 0:
+        return []
+    return list((await db.execute(NEXT_NOSSO_NUMEROS_SQL, {"n": n})).scalars())
+
+
+async def boleto_rows(db, charges: list[tuple[str, datetime, int]]) -> list[dict]:
+    """Boleto rows for ``(chargeId, dueDate, amountCents)`` tuples, numbered in one pass.
+
+    Charges the FEBRABAN layout can't represent (amount or due date out of
+    range) are left out.
+    """
+    now = datetime.now(timezone.utc)
+    rows = []
+    for (charge_id, due, amount), nosso in zip(charges, await next_nosso_numeros(db, len(charges))):
+        try:
+            code, linha = encoder.encode(due, amount, nosso)
+        except ValueError:
+            continue
+        rows.append({
+            "id": cuid_generate(),
+            "chargeId": charge_id,
+            "linhaDigitavel": linha,
+            "barcodeValue": code,
+            "publicUrl": f"/boleto/{charge_id}",
+            "createdAt": now,
+        })
+    return rows
+
+
+async def insert_boletos(db, rows: list[dict]) -> list[str]:
+    """Multi-row INSERT of ``rows``; returns the chargeIds actually inserted.
+
+    Charges that got a boleto concurrently are skipped by the unique
+    chargeId instead of failing the batch. Does not commit.
+    """
+    if not rows:
+        return []
+    stmt = insert(Boleto.__table__).on_conflict_do_nothing(index_elements=["chargeId"]).returning(Boleto.chargeId)
+    return list((await db.execute(stmt, rows)).scalars())
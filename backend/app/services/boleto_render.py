@@ -0,0 +1,291 @@
+"""Boleto rendering: PDF ficha de compensação and PNG barcode, stdlib only.
+
+The barcode is Interleaved 2 of 5 (ITF-25) with a 1:3 narrow/wide ratio, as
+FEBRABAN requires. The PDF is written by hand (Helvetica, one A4 page,
+Flate-compressed content) and is byte-for-byte deterministic, so its hash
+can serve as the cache key and ETag. The PNG holds just the barcode, for
+embedding in e-mails and WhatsApp messages.
+
+Renders are cached by ``render_key`` in a bounded in-memory LRU and on
+disk, where the least recently used files are pruned past a size cap. The key covers the boleto id, every field printed on it and
+``RENDER_VERSION``, so changing a charge or the layout yields a new key
+instead of a stale hit.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import astuple, dataclass
+from datetime import datetime
+from pathlib import Path
+
+# Bump whenever the layout changes to invalidate every cached render
+RENDER_VERSION = 1
+
+# Narrow (n) / wide (w) element widths per digit
+ITF_PATTERNS = [
+    "nnwwn", "wnnnw", "nwnnw", "wwnnn", "nnwnw",
+    "wnwnn", "nwwnn", "nnnww", "wnnwn", "nwnwn",
+]
+WIDE = 3
+
+BANKS = {"237": ("Bradesco", "2"), "001": ("Banco do Brasil", "9"), "341": ("Itaú", "7")}
+
+
+@dataclass(frozen=True)
+class BoletoDoc:
+    boletoId: str
+    chargeId: str
+    linhaDigitavel: str
+    barcodeValue: str
+    amountCents: int
+    dueDate: datetime
+    description: str
+    customerName: str
+    customerDoc: str
+    beneficiario: str
+    createdAt: datetime
+
+
+def render_key(doc: BoletoDoc, fmt: str) -> str:
+    raw = "\x1f".join(str(v) for v in (RENDER_VERSION, fmt, *astuple(doc)))
+    return hashlib.sha256(raw.encode()).hexdigest()[:40]
+
+
+def itf_modules(digits: str) -> list[tuple[bool, int]]:
+    """``(is_bar, width in narrow units)`` runs for an even-length digit string."""
+    if len(digits) % 2 or not digits.isdigit():
+        raise ValueError("ITF-25 requer um número par de dígitos")
+    runs = [(True, 1), (False, 1), (True, 1), (False, 1)]
+    for i in range(0, len(digits), 2):
+        bars = ITF_PATTERNS[int(digits[i])]
+        spaces = ITF_PATTERNS[int(digits[i + 1])]
+        for b, s in zip(bars, spaces):
+            runs.append((True, WIDE if b == "w" else 1))
+            runs.append((False, WIDE if s == "w" else 1))
+    runs += [(True, WIDE), (False, 1), (True, 1)]
+    return runs
+
+
+def _brl(cents: int) -> str:
+    return f"R$ {cents / 100:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _pdf_text(value: str) -> str:
+    raw = value.encode("cp1252", "replace").decode("latin-1")
+    return raw.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf_content(doc: BoletoDoc) -> bytes:
+    ops: list[str] = []
+
+    def text(x: float, y: float, value: str, size: float = 9, bold: bool = False) -> None:
+        ops.append(f"BT /{'F2' if bold else 'F1'} {size} Tf {x:.2f} {y:.2f} Td ({_pdf_text(value)}) Tj ET")
+
+    def box(x: float, y: float, w: float, h: float, label: str, value: str, bold: bool = False) -> None:
+        ops.append(f"{x:.2f} {y:.2f} {w:.2f} {h:.2f} re S")
+        text(x + 3, y + h - 9, label, 6)
+        text(x + 3, y + 5, value, 9, bold)
+
+    bank = doc.barcodeValue[:3]
+    bank_name, bank_dv = BANKS.get(bank, (bank, ""))
+    left, width, top = 40.0, 515.0, 800.0
+
+    # Recibo do pagador
+    text(left, top, bank_name, 13, True)
+    text(left + 120, top, f"{bank}-{bank_dv}" if bank_dv else bank, 13, True)
+    text(left + 190, top, doc.linhaDigitavel, 10, True)
+    ops.append("0.5 w")
+    row = 26.0
+    y = top - 12 - row
+    box(left, y, 385, row, "Beneficiário", doc.beneficiario)
+    box(left + 385, y, width - 385, row, "Vencimento", doc.dueDate.strftime("%d/%m/%Y"), True)
+    y -= row
+    box(left, y, 385, row, "Pagador", f"{doc.customerName} - {doc.customerDoc}")
+    box(left + 385, y, width - 385, row, "Valor do documento", _brl(doc.amountCents), True)
+    y -= row
+    box(left, y, width, row, "Descrição", doc.description)
+
+    # Ficha de compensação
+    y -= 40
+    ops.append(f"[3 3] 0 d {left:.2f} {y + 20:.2f} m {left + width:.2f} {y + 20:.2f} l S [] 0 d")
+    text(left, y, bank_name, 13, True)
+    text(left + 120, y, f"{bank}-{bank_dv}" if bank_dv else bank, 13, True)
+    text(left + 190, y, doc.linhaDigitavel, 10, True)
+    y -= 12 + row
+    box(left, y, 385, row, "Local de pagamento", "Pagável em qualquer banco até o vencimento")
+    box(left + 385, y, width - 385, row, "Vencimento", doc.dueDate.strftime("%d/%m/%Y"), True)
+    y -= row
+    box(left, y, 385, row, "Beneficiário", doc.beneficiario)
+    box(left + 385, y, width - 385, row, "Nosso número", doc.barcodeValue[25:36])
+    y -= row
+    box(left, y, 130, row, "Data do documento", doc.createdAt.strftime("%d/%m/%Y"))
+    box(left + 130, y, 255, row, "Número do documento", doc.chargeId)
+    box(left + 385, y, width - 385, row, "(=) Valor do documento", _brl(doc.amountCents), True)
+    y -= row * 2
+    box(left, y, width, row * 2, "Instruções", doc.description)
+    y -= row * 1.5
+    box(left, y, width, row * 1.5, "Pagador", f"{doc.customerName} - {doc.customerDoc}")
+
+    # ITF-25, about 103 mm wide and 13 mm tall
+    narrow = 0.72
+    height = 37.0
+    x = left
+    y -= height + 15
+    for is_bar, units in itf_modules(doc.barcodeValue):
+        w = units * narrow
+        if is_bar:
+            ops.append(f"{x:.2f} {y:.2f} {w:.2f} {height:.2f} re")
+        x += w
+    ops.append("f")
+    return "\n".join(ops).encode("latin-1")
+
+
+def render_pdf(doc: BoletoDoc) -> bytes:
+    content = zlib.compress(_pdf_content(doc), 6)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def render_png(doc: BoletoDoc, scale: int = 2, height: int = 100) -> bytes:
+    """8-bit grayscale PNG of the barcode with a 10-module quiet zone on each side."""
+    quiet = 10 * scale
+    row = bytearray(b"\xff" * quiet)
+    for is_bar, units in itf_modules(doc.barcodeValue):
+        row += (b"\x00" if is_bar else b"\xff") * (units * scale)
+    row += b"\xff" * quiet
+    raw = (b"\x00" + bytes(row)) * height
+    header = struct.pack(">IIBBBBB", len(row), height, 8, 0, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"IDAT", zlib.compress(raw, 9))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+RENDERERS = {"pdf": render_pdf, "png": render_png}
+
+
+def render(doc: BoletoDoc, fmt: str) -> bytes:
+    return RENDERERS[fmt](doc)
+
+
+def render_many(docs: list[BoletoDoc], fmt: str) -> list[tuple[str, bytes]]:
+    """Process-pool entry point: ``(render_key, bytes)`` per doc."""
+    return [(render_key(doc, fmt), render(doc, fmt)) for doc in docs]
+
+
+def render_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool for ``render_many``; the app opens one in its lifespan."""
+    # spawn: workers only import this module, never the app or its DB engine
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class RenderCache:
+    """Content-addressed cache: an in-memory LRU in front of a directory on disk.
+
+    Disk hits refresh the file's mtime; ``prune`` drops the oldest files once
+    the directory outgrows ``max_disk_bytes`` and is due again after a tenth
+    of that has been written (the first time, right away).
+    """
+
+    def __init__(self, directory: str | Path, max_memory_bytes: int, max_disk_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._written: int | None = None
+
+    def _path(self, key: str, fmt: str) -> Path:
+        return self.directory / key[:2] / f"{key}.{fmt}"
+
+    def get(self, key: str, fmt: str) -> bytes | None:
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            return data
+        path = self._path(key, fmt)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def put(self, key: str, fmt: str, data: bytes) -> None:
+        path = self._path(key, fmt)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{fmt}.tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+            if self._written is not None:
+                self._written += len(data)
+        self._remember(key, data)
+
+    @property
+    def prune_due(self) -> bool:
+        return self._written is None or self._written >= self.max_disk_bytes // 10
+
+    def prune(self) -> int:
+        """Delete the least recently used files until the directory fits; returns how many went."""
+        self._written = 0
+        files = []
+        # Other processes share the directory: anything may vanish under us
+        for path in self.directory.glob("*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
@@ -0,0 +1,44 @@
+"""Change counters that let every process tell whether its cached copy is current.
+
+``CacheVersion`` holds one counter per cached dataset, bumped by statement
+triggers on the underlying tables (see the 20261019_08 migration) in the
+writing transaction, whoever the writer is. Readers compare it with the
+number their cache was built from, reading the counter before the data: a
+write landing in between only costs one more reload. Changes no trigger
+sees are bumped by the writer with ``bump_version``.
+"""
+
+from sqlalchemy import ScalarSelect, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.cache_version import CacheVersion
+
+# DunningRule, DunningStep
+DUNNING_CONFIG = "dunning_config"
+# What max(Charge/Customer.updatedAt) misses: Charge and Customer inserts and deletes,
+# any Boleto write (triggers, 20261019_11/12 migrations) and the run turning charges OVERDUE
+CHARGES = "charges"
+
+
+async def read_version(db: AsyncSession, name: str) -> int:
+    """0 until the first write."""
+    version = (await db.execute(select(CacheVersion.version).where(CacheVersion.name == name))).scalar_one_or_none()
+    return version or 0
+
+
+def version_subquery(name: str) -> ScalarSelect[int]:
+    """``read_version`` as a scalar subquery, to fold into another query."""
+    return select(func.coalesce(func.max(CacheVersion.version), 0)).where(CacheVersion.name == name).scalar_subquery()
+
+
+async def bump_version(db: AsyncSession, name: str) -> None:
+    """Same upsert as the trigger function, in the caller's transaction. Does not commit."""
+    await db.execute(
+        insert(CacheVersion)
+        .values(name=name, version=1)
+        .on_conflict_do_update(
+            index_elements=[CacheVersion.name],
+            set_={"version": CacheVersion.version + 1, "updatedAt": func.now()},
+        )
+    )
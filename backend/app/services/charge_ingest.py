@@ -0,0 +1,105 @@
+"""Batch validation and insertion of charges.
+
+Shared by ``POST /api/charges/bulk`` and the apuração cycle endpoint: rows
+are checked in one pass (a single query resolves every customerId) and
+written with SQLAlchemy's batched multi-row INSERT inside the caller's
+transaction, so a burst of thousands of charges costs a handful of round
+trips instead of a commit + refresh per charge.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from cuid2 import cuid_wrapper
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import in_array
+from app.models.base import ChargeStatus
+from app.models.charge import Charge
+from app.models.customer import Customer
+from app.schemas.charge import ChargeCreate
+
+cuid_generate = cuid_wrapper()
+
+MAX_BULK_ROWS = 50_000
+
+
+@dataclass
+class IngestResult:
+    rows: list[dict] = field(default_factory=list)
+    # (index in the input, message)
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+
+def _first_error(exc: ValidationError) -> str:
+    err = exc.errors()[0]
+    loc = ".".join(str(p) for p in err["loc"])
+    return f"{loc}: {err['msg']}" if loc else err["msg"]
+
+
+async def validate_charges(db: AsyncSession, items: list[dict | ChargeCreate | None]) -> IngestResult:
+    """Turn raw items into Charge rows ready for ``insert_charges``.
+
+    Invalid items (``None`` stands for an unparseable line) are reported by
+    input index and left out; the rest keep their input order.
+    """
+    result = IngestResult()
+    parsed: list[tuple[int, ChargeCreate, datetime]] = []
+    for i, item in enumerate(items):
+        if item is None:
+            result.errors.append((i, "JSON inválido"))
+            continue
+        try:
+            body = item if isinstance(item, ChargeCreate) else ChargeCreate.model_validate(item)
+        except ValidationError as exc:
+            result.errors.append((i, _first_error(exc)))
+            continue
+        if body.amountCents <= 0:
+            result.errors.append((i, "amountCents deve ser maior que zero"))
+            continue
+        if not body.description.strip():
+            result.errors.append((i, "description é obrigatória"))
+            continue
+        try:
+            due = datetime.fromisoformat(body.dueDate)
+        except ValueError:
+            result.errors.append((i, f"dueDate inválida: {body.dueDate}"))
+            continue
+        parsed.append((i, body, due))
+
+    customer_ids = {body.customerId for _, body, _ in parsed}
+    known: set[str] = set()
+    if customer_ids:
+        known = set((await db.execute(select(Customer.id).where(in_array(Customer.id, customer_ids)))).scalars())
+
+    now = datetime.now(timezone.utc)
+    for i, body, due in parsed:
+        if body.customerId not in known:
+            result.errors.append((i, f"Cliente não encontrado: {body.customerId}"))
+            continue
+        result.rows.append({
+            "id": cuid_generate(),
+            "customerId": body.customerId,
+            "description": body.description,
+            "amountCents": body.amountCents,
+            "dueDate": due,
+            "status": ChargeStatus.PENDING,
+            "categoria": body.categoria,
+            "competencia": body.competencia,
+            "nfEmitida": body.nfEmitida,
+            "createdAt": now,
+            "updatedAt": now,
+        })
+    result.errors.sort()
+    return result
+
+
+async def insert_charges(db: AsyncSession, rows: list[dict]) -> None:
+    """Multi-row INSERT of ``rows``; SQLAlchemy batches them into VALUES lists.
+
+    Rows must all have the same keys. Does not commit.
+    """
+    if rows:
+        await db.execute(insert(Charge), rows)
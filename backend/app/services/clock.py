@@ -0,0 +1,76 @@
+"""The application's effective "now": ``AppState.simulatedNow`` when set, else real UTC.
+
+The simulated instant is cached per process. The simulate endpoints publish
+``Topic.APP_STATE`` so every worker drops it at once; writers outside this
+API (the Next.js routes) are picked up within APP_CLOCK_CACHE_SECONDS.
+Callers that act on the time, like a dunning run, resolve it once with
+``fresh=True`` and pass that single instant down.
+
+Tests can pin the clock without a database::
+
+    with clock.override(datetime(2026, 3, 1, 12)):
+        ...
+"""
+
+import asyncio
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.invalidation import Topic, bus
+from app.models.app_state import AppState
+
+
+class Clock:
+    def __init__(self) -> None:
+        self._simulated: datetime | None = None
+        self._checked_at: float | None = None
+        self._override: datetime | None = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._checked_at = None
+
+    def set_simulated(self, value: datetime | None) -> None:
+        """Record a value this process just committed, sparing the next read."""
+        self._simulated = value
+        self._checked_at = time.monotonic()
+
+    def _stale(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= settings.APP_CLOCK_CACHE_SECONDS
+
+    async def simulated(self, fresh: bool = False) -> datetime | None:
+        """The simulated instant, or None when the clock is real."""
+        if self._override is not None:
+            return self._override
+        if fresh or self._stale():
+            async with self._lock:
+                if fresh or self._stale():
+                    async with async_session() as db:
+                        value = (await db.execute(
+                            select(AppState.simulatedNow).where(AppState.id == 1)
+                        )).scalar_one_or_none()
+                    self.set_simulated(value)
+        return self._simulated
+
+    async def now(self, fresh: bool = False) -> datetime:
+        """Naive UTC, as AppState and Prisma store it."""
+        return await self.simulated(fresh) or datetime.utcnow()
+
+    @contextmanager
+    def override(self, value: datetime) -> Iterator[None]:
+        """Test hook: ``now()`` returns ``value`` and nothing is read until the block exits."""
+        previous, self._override = self._override, value
+        try:
+            yield
+        finally:
+            self._override = previous
+
+
+clock = Clock()
+bus.subscribe(Topic.APP_STATE, lambda event: clock.invalidate())
@@ -0,0 +1,448 @@
+"""Dunning run: match enabled steps against open charges and log notifications.
+
+Charges are read in keyset pages of ``batch_size`` ids and each page is
+written and committed on its own, so a long run never holds locks across
+pages and can report progress or stop between them. A (charge, step) pair
+is claimed in ``NotificationLogKey`` with ``ON CONFLICT DO NOTHING`` before
+its log row is written, which keeps concurrent or repeated runs from
+notifying the same pair twice.
+
+Steps fire on calendar days in their rule's timezone (see
+``dunning_calendar``): each page's query returns, per timezone, the number
+of days between local today and the charge's local due date, so matching is
+a dict lookup on an integer offset.
+
+Each evaluated charge also gets its upcoming fires written to
+``DunningSchedule`` and their minimum (or the day it turns OVERDUE) to
+``nextDunningDate``, which is what the daily run looks up. An incremental run only
+reads charges whose next date has arrived or that changed (``updatedAt``)
+since the previous completed run started. Any change to the active steps'
+timing, found by comparing a fingerprint of them, forces a full pass, and so
+does a simulated clock that went backwards.
+
+With ``workers > 1`` the open charges are split into shards by
+``hashtext(customerId)`` and each shard runs in a spawned process with its
+own event loop and connection. A customer's charges always land in the same
+shard, so shards never touch the same rows.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from cuid2 import cuid_wrapper
+from sqlalchemy import func, insert, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session, engine, in_array
+from app.core.metrics import (
+    DUNNING_CHARGES_PROCESSED,
+    DUNNING_LAST_RUN_NOTIFICATIONS,
+    DUNNING_NOTIFICATIONS,
+    DUNNING_RUN_DURATION,
+    DUNNING_RUNS,
+)
+from app.models.base import ChargeStatus, NotificationStatus
+from app.models.boleto import Boleto  # noqa: F401  (Charge.boleto target, for shard processes and the CLI worker)
+from app.models.charge import Charge
+from app.models.customer import Customer
+from app.models.dunning import DunningRunState
+from app.models.notification_log import NotificationLog, NotificationLogKey
+from app.services.dunning_calendar import (
+    DayBucket,
+    config_fingerprint,
+    day_buckets,
+    local_due_days,
+    next_dunning_date,
+    upcoming_fires,
+)
+from app.services.cache_versions import CHARGES, bump_version
+from app.services.clock import clock
+from app.services.dunning_config import dunning_config
+from app.services.dunning_schedule import OPEN_STATUSES, prune_schedule, replace_schedule
+from app.services.log_retention import ensure_upcoming_partitions
+
+cuid_generate = cuid_wrapper()
+
+DEFAULT_BATCH_SIZE = 2000
+# Two bind parameters per key row; asyncpg allows 32767 per statement
+KEY_CHUNK = 10_000
+
+# (total, processed, notificationsCreated) -> False to stop after the current page
+ProgressCallback = Callable[[int, int, int], Awaitable[bool]]
+
+# Leaves updatedAt alone: a new nextDunningDate is not a change to the charge
+SET_NEXT_DUNNING_DATE_SQL = text("""
+    UPDATE "Charge" AS c SET "nextDunningDate" = v.next
+    FROM unnest(CAST(:ids AS text[]), CAST(:dates AS date[])) AS v(id, next)
+    WHERE c.id = v.id
+""")
+
+
+@dataclass
+class RunStats:
+    processed: int
+    created: int
+    # False when on_progress asked to stop early
+    completed: bool
+    incremental: bool
+
+
+# Shard pools by size; a pool is only shut down once no run is using it
+_pools: dict[int, ProcessPoolExecutor] = {}
+_pool_users: Counter[int] = Counter()
+
+
+@contextmanager
+def shard_pool(workers: int) -> Iterator[ProcessPoolExecutor]:
+    """A process pool of ``workers``, shared with concurrent runs of the same size."""
+    pool = _pools.get(workers)
+    if pool is None:
+        # Idle pools of other sizes only hold processes
+        for size in [s for s in _pools if not _pool_users[s]]:
+            _pools.pop(size).shutdown(wait=False)
+        # spawn: each shard process builds its own engine instead of inheriting our sockets
+        pool = _pools[workers] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    _pool_users[workers] += 1
+    try:
+        yield pool
+    finally:
+        _pool_users[workers] -= 1
+
+
+def render_template(template: str, name: str, amount_cents: int, due_date: date, description: str) -> str:
+    return (
+        template
+        .replace("{{nome}}", name)
+        .replace("{{valor}}", f"R$ {amount_cents / 100:.2f}")
+        .replace("{{vencimento}}", due_date.strftime("%d/%m/%Y"))
+        .replace("{{descricao}}", description)
+    )
+
+
+async def claim_keys(db: AsyncSession, pairs: list[tuple[str, str]]) -> set[tuple[str, str]]:
+    """Insert NotificationLogKey rows; returns the pairs that were not already there."""
+    claimed: set[tuple[str, str]] = set()
+    for i in range(0, len(pairs), KEY_CHUNK):
+        chunk = pairs[i:i + KEY_CHUNK]
+        stmt = (
+            pg_insert(NotificationLogKey)
+            .values([{"chargeId": c, "stepId": s} for c, s in chunk])
+            .on_conflict_do_nothing()
+            .returning(NotificationLogKey.chargeId, NotificationLogKey.stepId)
+        )
+        claimed.update((await db.execute(stmt)).tuples())
+    return claimed
+
+
+async def _run_page(
+    db: AsyncSession, rows: list, buckets: list[DayBucket], now: datetime, notify: bool = True, commit: bool = True,
+) -> int:
+    """Evaluate one page of charges and commit. ``notify=False`` only refreshes their schedule."""
+    # Row layout: the charge columns, then one days_<i> per bucket
+    first = len(rows[0]) - len(buckets) if rows else 0
+    overdue: list[str] = []
+    candidates: list[tuple] = []
+    schedule: list[dict] = []
+    next_ids: list[str] = []
+    next_dates: list[date | None] = []
+    for row in rows:
+        days = row[first:]
+        pending = row.status == ChargeStatus.PENDING
+        if notify and days[0] > 0 and pending:
+            overdue.append(row.id)
+            pending = False
+        fires = upcoming_fires(days, buckets, include_today=not notify)
+        schedule.extend(
+            {"chargeId": row.id, "stepId": step.id, "fireDate": fire, "channel": step.channel}
+            for step, fire in fires
+        )
+        next_date = next_dunning_date(fires, days, buckets, pending)
+        if next_date != row.nextDunningDate:
+            next_ids.append(row.id)
+            next_dates.append(next_date)
+        if notify:
+            for bucket, d in zip(buckets, days):
+                for step in bucket.steps_by_offset.get(d, ()):
+                    candidates.append((row, step, bucket.today - timedelta(days=d)))
+
+    await replace_schedule(db, [row.id for row in rows], schedule)
+    if overdue:
+        # updatedAt stays: the next incremental run has no reason to re-read
+        # these, and the charge ETags follow the CHARGES counter instead
+        result = await db.execute(
+            update(Charge)
+            .where(in_array(Charge.id, overdue), Charge.status == ChargeStatus.PENDING)
+            .values(status=ChargeStatus.OVERDUE, updatedAt=Charge.updatedAt)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            await bump_version(db, CHARGES)
+    if next_ids:
+        await db.execute(SET_NEXT_DUNNING_DATE_SQL, {"ids": next_ids, "dates": next_dates})
+
+    claimed = await claim_keys(db, [(row.id, step.id) for row, step, _ in candidates]) if candidates else set()
+    logs = [
+        {
+            "id": cuid_generate(),
+            "chargeId": row.id,
+            "stepId": step.id,
+            "channel": step.channel,
+            "status": NotificationStatus.SENT,
+            "scheduledFor": now,
+            "sentAt": now,
+            "renderedMessage": render_template(step.template, row.customerName, row.amountCents, due_local, row.description),
+            "metaJson": json.dumps({"trigger": step.trigger, "offsetDays": step.offsetDays}),
+        }
+        for row, step, due_local in candidates
+        if (row.id, step.id) in claimed
+    ]
+    if logs:
+        await db.execute(insert(NotificationLog), logs)
+    if commit:
+        await db.commit()
+    return len(logs)
+
+
+def shard_filter(index: int, count: int):
+    # Masked instead of abs(): abs(hashtext) overflows for -2^31
+    return func.hashtext(Charge.customerId).op("&")(0x7FFFFFFF) % count == index
+
+
+def charges_filter(buckets: list[DayBucket], since: datetime | None) -> list:
+    """Open charges; with ``since``, only those due for evaluation or changed after it."""
+    conditions = [Charge.status.in_(OPEN_STATUSES)]
+    if since is not None:
+        horizon = max(b.today for b in buckets)
+        conditions.append(or_(Charge.nextDunningDate <= horizon, Charge.updatedAt > since))
+    return conditions
+
+
+async def run_pass(
+    db: AsyncSession,
+    now: datetime,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    shard: tuple[int, int] | None = None,
+    since: datetime | None = None,
+    notify: bool = True,
+    total: int = 0,
+    on_progress: ProgressCallback | None = None,
+) -> tuple[int, int, bool]:
+    """One in-process pass, optionally restricted to ``shard`` (index, count) and to changes after ``since``."""
+    # fresh: shard processes outlive runs and must see the régua the parent saw
+    buckets = day_buckets(await dunning_config.active_steps(fresh=True), now)
+    days_columns = [local_due_days(b.today, b.timezone).label(f"days_{i}") for i, b in enumerate(buckets)]
+    open_filter = charges_filter(buckets, since)
+    if shard:
+        open_filter.append(shard_filter(*shard))
+
+    processed = created = 0
+    last_id = ""
+    while True:
+        rows = (await db.execute(
+            select(
+                Charge.id,
+                Charge.dueDate,
+                Charge.status,
+                Charge.amountCents,
+                Charge.description,
+                Charge.nextDunningDate,
+                Customer.name.label("customerName"),
+                *days_columns,
+            )
+            .join(Customer, Customer.id == Charge.customerId)
+            .where(*open_filter, Charge.id > last_id)
+            .order_by(Charge.id)
+            .limit(batch_size)
+        )).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        created += await _run_page(db, rows, buckets, now, notify)
+        processed += len(rows)
+        if on_progress and not await on_progress(total, processed, created):
+            return processed, created, False
+    return processed, created, True
+
+
+async def _run_shard(
+    index: int, count: int, now: datetime, batch_size: int, since: datetime | None, notify: bool,
+) -> tuple[int, int]:
+    try:
+        async with async_session() as db:
+            processed, created, _ = await run_pass(
+                db, now, batch_size=batch_size, shard=(index, count), since=since, notify=notify,
+            )
+        return processed, created
+    finally:
+        # Pooled connections are bound to this asyncio.run() loop
+        await engine.dispose()
+
+
+def run_shard(
+    index: int, count: int, now: datetime, batch_size: int, since: datetime | None = None, notify: bool = True,
+) -> tuple[int, int]:
+    """Process-pool entry point: ``(processedCharges, notificationsCreated)`` for one shard."""
+    return asyncio.run(_run_shard(index, count, now, batch_size, since, notify))
+
+
+async def _run_sharded(
+    workers: int,
+    now: datetime,
+    batch_size: int,
+    since: datetime | None,
+    notify: bool,
+    total: int,
+    on_progress: ProgressCallback | None,
+) -> tuple[int, int, bool]:
+    # Several shards per process so progress and cancellation have a finer grain
+    count = workers * settings.DUNNING_SHARDS_PER_WORKER
+    with shard_pool(workers) as pool:
+        futures = [pool.submit(run_shard, i, count, now, batch_size, since, notify) for i in range(count)]
+        waiting = {asyncio.wrap_future(f) for f in futures}
+        processed = created = 0
+        completed = True
+        beat = time.monotonic()
+        try:
+            while waiting:
+                # A shard can outlast the job's stale window, so progress is also reported on a timer
+                timeout = None
+                if on_progress:
+                    timeout = max(0.0, beat + settings.DUNNING_JOB_HEARTBEAT_SECONDS - time.monotonic())
+                done, waiting = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for fut in done:
+                    if fut.cancelled():
+                        if completed:
+                            # Nobody else may cancel our shards; going on would lose its charges
+                            raise RuntimeError("dunning shard cancelled")
+                        continue
+                    p, c = fut.result()
+                    processed += p
+                    created += c
+                if not on_progress:
+                    continue
+                beat = time.monotonic()
+                # Still called once stopped: the running shards' heartbeat
+                if not await on_progress(total, processed, created) and completed:
+                    # Shards already running finish; the queued ones never start
+                    completed = False
+                    for f in futures:
+                        f.cancel()
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            raise
+    return processed, created, completed
+
+
+async def run_dunning(
+    db: AsyncSession,
+    now: datetime | None = None,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int | None = None,
+    incremental: bool | None = None,
+    notify: bool = True,
+    record_metrics: bool = True,
+    on_progress: ProgressCallback | None = None,
+) -> RunStats:
+    """Run every active step over the open charges.
+
+    Pages already committed stay committed when ``on_progress`` stops the
+    run early; the high-water mark only moves after a completed run, so the
+    next one picks up the rest. ``notify=False`` rebuilds the schedule
+    without sending anything or touching statuses; today's fires stay in the
+    schedule for the next real run. Simulated replays pass
+    ``record_metrics=False`` to stay out of the dunning metrics.
+    """
+    started = time.perf_counter()
+    if now is None:
+        # One instant for the whole run, shards included
+        now = await clock.now(fresh=True)
+    if workers is None:
+        workers = settings.DUNNING_RUN_WORKERS
+    if incremental is None:
+        incremental = settings.DUNNING_INCREMENTAL
+    run_started_at = (await db.execute(select(func.now()))).scalar_one()
+    # Logs are stamped with the real now, so this month's partition must exist
+    await ensure_upcoming_partitions(db)
+
+    buckets = day_buckets(await dunning_config.active_steps(fresh=True), now)
+    fingerprint = config_fingerprint(buckets)
+    today = buckets[0].today
+    state = await db.get(DunningRunState, 1)
+    since = None
+    if (
+        incremental
+        and state is not None
+        and state.lastRunStartedAt is not None
+        and state.configFingerprint == fingerprint
+        and state.lastRunDate is not None
+        and state.lastRunDate <= today
+    ):
+        since = state.lastRunStartedAt
+    total = (await db.execute(
+        select(func.count()).select_from(Charge).where(*charges_filter(buckets, since))
+    )).scalar_one()
+
+    if workers > 1:
+        # Release our connection for the shards' sake
+        await db.commit()
+        processed, created, completed = await _run_sharded(
+            workers, now, batch_size, since, notify, total, on_progress,
+        )
+    else:
+        processed, created, completed = await run_pass(
+            db, now, batch_size=batch_size, since=since, notify=notify, total=total, on_progress=on_progress,
+        )
+
+    if completed:
+        await prune_schedule(db, since)
+        if state is None:
+            state = DunningRunState(id=1)
+            db.add(state)
+        state.lastRunStartedAt = run_started_at
+        state.lastRunDate = today
+        state.configFingerprint = fingerprint
+        await db.commit()
+
+    if notify and record_metrics:
+        DUNNING_RUNS.inc()
+        DUNNING_RUN_DURATION.observe(time.perf_counter() - started)
+        DUNNING_NOTIFICATIONS.inc(amount=created)
+        DUNNING_CHARGES_PROCESSED.inc(amount=processed)
+        DUNNING_LAST_RUN_NOTIFICATIONS.set(created)
+    return RunStats(processed, created, completed, since is not None)
+
+
+async def refresh_schedule(db: AsyncSession, charge_ids: list[str]) -> None:
+    """Re-materialize the schedule of just these charges, e.g. right after they were created or edited.
+
+    Closed or deleted charges simply lose their rows. Does not commit: callers
+    run it in the transaction that wrote the charges.
+    """
+    if not charge_ids:
+        return
+    now = await clock.now()
+    buckets = day_buckets(await dunning_config.active_steps(), now)
+    await replace_schedule(db, charge_ids, [])
+    rows = (await db.execute(
+        select(
+            Charge.id,
+            Charge.status,
+            Charge.nextDunningDate,
+            *[local_due_days(b.today, b.timezone).label(f"days_{i}") for i, b in enumerate(buckets)],
+        ).where(in_array(Charge.id, charge_ids), Charge.status.in_(OPEN_STATUSES))
+    )).all()
+    if rows:
+        await _run_page(db, rows, buckets, now, notify=False, commit=False)
@@ -0,0 +1,127 @@
+"""Calendar math for the dunning régua.
+
+Steps fire on calendar days in their rule's timezone. "Today" is computed
+once per timezone (``DayBucket``), and charge due dates are turned into
+whole local days in SQL (``local_due_days``), so everything after that is
+integer arithmetic on day offsets.
+"""
+
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import Date, cast, func, literal
+
+from app.core.config import settings
+from app.models.charge import Charge
+from app.models.dunning import DunningStep
+
+logger = logging.getLogger("app.dunning")
+
+
+def local_today(now: datetime, tz: str) -> date:
+    """Calendar date in ``tz`` at ``now``; naive datetimes are UTC, as AppState and Prisma store them."""
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    return now.astimezone(ZoneInfo(tz)).date()
+
+
+def step_day_offset(step: DunningStep) -> int:
+    """Days since the due date (today - due) on which ``step`` fires."""
+    if step.trigger == "BEFORE_DUE":
+        return -step.offsetDays
+    if step.trigger == "AFTER_DUE":
+        return step.offsetDays
+    return 0
+
+
+def local_due_days(today: date, tz: str):
+    """SQL: ``today - dueDate`` in whole calendar days in ``tz``.
+
+    dueDate is a UTC ``timestamp without time zone``: tag it as UTC first,
+    then convert to ``tz`` wall time before taking the date.
+    """
+    due_local = func.timezone(tz, func.timezone("UTC", Charge.dueDate))
+    return literal(today, Date) - cast(due_local, Date)
+
+
+def local_day_window(day: date, tz: str) -> tuple[datetime, datetime]:
+    """Naive UTC ``[start, end)`` of calendar day ``day`` in ``tz``, for range scans on dueDate."""
+    zone = ZoneInfo(tz)
+    start, end = (
+        datetime.combine(d, time(), tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+        for d in (day, day + timedelta(days=1))
+    )
+    return start, end
+
+
+@dataclass
+class DayBucket:
+    """The steps of every rule sharing one timezone, keyed by their day offset."""
+
+    timezone: str
+    today: date
+    steps_by_offset: dict[int, list[DunningStep]] = field(default_factory=lambda: defaultdict(list))
+    offsets: list[int] = field(default_factory=list)
+
+
+def day_buckets(steps: list[DunningStep], now: datetime) -> list[DayBucket]:
+    """One bucket per timezone; the first is DUNNING_DEFAULT_TIMEZONE, which decides OVERDUE."""
+    buckets = {settings.DUNNING_DEFAULT_TIMEZONE: DayBucket(
+        settings.DUNNING_DEFAULT_TIMEZONE, local_today(now, settings.DUNNING_DEFAULT_TIMEZONE),
+    )}
+    for step in steps:
+        tz = step.rule.timezone or settings.DUNNING_DEFAULT_TIMEZONE
+        if tz not in buckets:
+            try:
+                buckets[tz] = DayBucket(tz, local_today(now, tz))
+            except (ZoneInfoNotFoundError, ValueError):
+                logger.warning("rule %s has unknown timezone %r, using %s", step.ruleId, tz, settings.DUNNING_DEFAULT_TIMEZONE)
+                tz = settings.DUNNING_DEFAULT_TIMEZONE
+        buckets[tz].steps_by_offset[step_day_offset(step)].append(step)
+    for bucket in buckets.values():
+        bucket.offsets = sorted(bucket.steps_by_offset)
+    return list(buckets.values())
+
+
+def config_fingerprint(buckets: list[DayBucket]) -> str:
+    """Changes whenever DunningSchedule would change: a step added, removed, moved, re-zoned or re-channeled."""
+    items = [
+        [b.timezone, sorted((s.id, offset, s.channel) for offset, steps in b.steps_by_offset.items() for s in steps)]
+        for b in buckets
+    ]
+    return hashlib.sha1(json.dumps(items).encode()).hexdigest()
+
+
+def upcoming_fires(days: list[int], buckets: list[DayBucket], include_today: bool = False) -> list[tuple[DunningStep, date]]:
+    """``(step, local fire date)`` for every step still ahead of a charge.
+
+    ``days[i]`` is today - due in ``buckets[i]``'s timezone. Today's fires
+    are left out unless ``include_today`` (the run handles them itself).
+    """
+    fires = []
+    for bucket, d in zip(buckets, days):
+        for offset in bucket.offsets:
+            if offset > d or (include_today and offset == d):
+                fire = bucket.today + timedelta(days=offset - d)
+                fires.extend((step, fire) for step in bucket.steps_by_offset[offset])
+    return fires
+
+
+def next_dunning_date(
+    fires: list[tuple[DunningStep, date]], days: list[int], buckets: list[DayBucket], pending: bool,
+) -> date | None:
+    """Earliest of ``fires`` and, for a PENDING charge, the day it turns OVERDUE.
+
+    Dates from different timezones can be a day apart; a charge picked up a
+    day early is just re-evaluated, never missed.
+    """
+    best = min((fire for _, fire in fires), default=None)
+    if pending:
+        overdue = buckets[0].today + timedelta(days=max(1 - days[0], 0))
+        best = overdue if best is None or overdue < best else best
+    return best
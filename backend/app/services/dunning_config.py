@@ -0,0 +1,86 @@
+"""Per-process cache of the régua configuration (every DunningRule with its steps).
+
+The whole configuration is a few rows, loaded in one joined query into
+detached objects that runs, step lists and rule screens share read-only.
+It is rebuilt when the ``dunning_config`` counter in ``CacheVersion`` moves:
+interactive reads check the counter at most every DUNNING_CONFIG_CACHE_SECONDS,
+dunning runs check it every time so a run never starts on an old régua.
+Edits published on the invalidation bus are seen at once, in every worker.
+"""
+
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.invalidation import Topic, bus
+from app.models.dunning import DunningRule, DunningStep
+from app.services.cache_versions import DUNNING_CONFIG, read_version
+
+
+class DunningConfigCache:
+    def __init__(self) -> None:
+        self._rules: list[DunningRule] | None = None
+        self._version: int | None = None
+        self._checked_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int | None:
+        """CacheVersion number the cached rules were loaded at."""
+        return self._version
+
+    def invalidate(self) -> None:
+        """Check the version on the next read."""
+        self._checked_at = None
+
+    def _stale(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= settings.DUNNING_CONFIG_CACHE_SECONDS
+
+    async def rules(self, fresh: bool = False) -> list[DunningRule]:
+        """Every rule, oldest first, each with ``steps`` loaded and every step's ``rule`` set."""
+        if fresh or self._stale():
+            async with self._lock:
+                if fresh or self._stale():
+                    await self._refresh()
+        return self._rules
+
+    async def _refresh(self) -> None:
+        async with async_session() as db:
+            # Version first: a change landing in between only costs another reload
+            version = await read_version(db, DUNNING_CONFIG)
+            if self._rules is None or version != self._version:
+                result = await db.execute(
+                    select(DunningRule)
+                    .options(joinedload(DunningRule.steps))
+                    .order_by(DunningRule.createdAt, DunningRule.id)
+                )
+                rules = list(result.unique().scalars().all())
+                for rule in rules:
+                    for step in rule.steps:
+                        set_committed_value(step, "rule", rule)
+                db.expunge_all()
+                self._rules, self._version = rules, version
+        self._checked_at = time.monotonic()
+
+    async def steps(self) -> list[DunningStep]:
+        """Every step, ordered by offsetDays."""
+        return sorted((s for r in await self.rules() for s in r.steps), key=lambda s: s.offsetDays)
+
+    async def active_steps(self, fresh: bool = False) -> list[DunningStep]:
+        """Enabled steps of active rules."""
+        return [s for r in await self.rules(fresh) if r.active for s in r.steps if s.enabled]
+
+    async def rule(self, rule_id: str) -> DunningRule | None:
+        return next((r for r in await self.rules() if r.id == rule_id), None)
+
+    async def step(self, step_id: str) -> DunningStep | None:
+        return next((s for r in await self.rules() for s in r.steps if s.id == step_id), None)
+
+
+dunning_config = DunningConfigCache()
+bus.subscribe(Topic.DUNNING_CONFIG, lambda event: dunning_config.invalidate())
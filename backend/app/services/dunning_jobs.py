@@ -0,0 +1,211 @@
+"""Background dunning runs backed by the ``DunningJob`` table.
+
+Workers claim the oldest QUEUED job with ``SELECT ... FOR UPDATE SKIP
+LOCKED``, so any number of them (inside uvicorn workers or as standalone
+``python -m app.services.dunning_jobs`` processes) can share the queue
+without double-claiming. Progress and a heartbeat are written after every
+page of charges (sharded runs: every shard, and at least every
+DUNNING_JOB_HEARTBEAT_SECONDS); the same UPDATE reads ``cancelRequested``,
+which is how a cancel reaches a running job. A RUNNING job whose heartbeat goes stale (its
+worker died) is put back in the queue; re-running is safe because pairs
+already notified are skipped through ``NotificationLogKey``.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.base import DunningJobStatus
+from app.models.dunning_job import DunningJob
+from app.services.dunning import DEFAULT_BATCH_SIZE, run_dunning
+
+logger = logging.getLogger("app.dunning_jobs")
+
+ACTIVE_STATUSES = (DunningJobStatus.QUEUED, DunningJobStatus.RUNNING)
+
+# Step/rule edits queue this to re-materialize DunningSchedule without sending anything
+SCHEDULE_REBUILD_PARAMS = {"full": True, "notify": False}
+
+
+async def enqueue_job(
+    db: AsyncSession, params: dict, dedupe: tuple[DunningJobStatus, ...] = ACTIVE_STATUSES,
+) -> DunningJob:
+    """Queue a job with ``params``, or return the oldest job with the same params in one of ``dedupe``. Commits.
+
+    Only equal params dedupe: a full run never folds into an incremental one,
+    nor a real run into a schedule rebuild that sends nothing.
+    """
+    params_json = json.dumps(params, sort_keys=True)
+    # Serializes concurrent enqueues so the dedupe check can't race
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext("dunning:enqueue"))))
+    job = (await db.execute(
+        select(DunningJob)
+        .where(DunningJob.status.in_(dedupe), DunningJob.paramsJson == params_json)
+        .order_by(DunningJob.createdAt)
+        .limit(1)
+    )).scalar_one_or_none()
+    if job is None:
+        job = DunningJob(paramsJson=params_json)
+        db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def enqueue_schedule_rebuild(db: AsyncSession) -> None:
+    # A job already waiting will see the new steps when it starts; a running one may not
+    await enqueue_job(db, SCHEDULE_REBUILD_PARAMS, dedupe=(DunningJobStatus.QUEUED,))
+
+
+async def claim_next(worker_id: str) -> DunningJob | None:
+    async with async_session() as db:
+        job = (await db.execute(
+            select(DunningJob)
+            .where(DunningJob.status == DunningJobStatus.QUEUED)
+            .order_by(DunningJob.createdAt)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )).scalar_one_or_none()
+        if job is None:
+            return None
+        job.status = DunningJobStatus.RUNNING
+        job.workerId = worker_id
+        job.startedAt = func.now()
+        job.heartbeatAt = func.now()
+        await db.commit()
+        return job
+
+
+async def requeue_stale() -> int:
+    """Put RUNNING jobs whose worker stopped heartbeating back in the queue."""
+    cutoff = func.now() - timedelta(seconds=settings.DUNNING_JOB_STALE_SECONDS)
+    async with async_session() as db:
+        result = await db.execute(
+            update(DunningJob)
+            .where(DunningJob.status == DunningJobStatus.RUNNING, DunningJob.heartbeatAt < cutoff)
+            .values(status=DunningJobStatus.QUEUED, workerId=None)
+        )
+        await db.commit()
+        return result.rowcount
+
+
+async def _finish(job_id: str, status: DunningJobStatus, error: str | None = None) -> None:
+    async with async_session() as db:
+        await db.execute(
+            update(DunningJob)
+            .where(DunningJob.id == job_id)
+            .values(status=status, error=error, finishedAt=func.now(), heartbeatAt=func.now())
+        )
+        await db.commit()
+
+
+async def execute_job(job: DunningJob) -> None:
+    params = json.loads(job.paramsJson or "{}")
+
+    async def on_progress(total: int, processed: int, created: int) -> bool:
+        async with async_session() as db:
+            cancel = (await db.execute(
+                update(DunningJob)
+                .where(DunningJob.id == job.id)
+                .values(
+                    totalCharges=total,
+                    processedCharges=processed,
+                    notificationsCreated=created,
+                    heartbeatAt=func.now(),
+                )
+                .returning(DunningJob.cancelRequested)
+            )).scalar_one()
+            await db.commit()
+        return not cancel
+
+    try:
+        async with async_session() as db:
+            stats = await run_dunning(
+                db,
+                batch_size=params.get("batchSize", DEFAULT_BATCH_SIZE),
+                workers=params.get("workers"),
+                incremental=False if params.get("full") else None,
+                notify=params.get("notify", True),
+                on_progress=on_progress,
+            )
+    except asyncio.CancelledError:
+        # Worker shutting down: hand the job to the next worker
+        async with async_session() as db:
+            await db.execute(
+                update(DunningJob)
+                .where(DunningJob.id == job.id)
+                .values(status=DunningJobStatus.QUEUED, workerId=None)
+            )
+            await db.commit()
+        raise
+    except Exception as exc:
+        logger.exception("dunning job %s failed", job.id)
+        await _finish(job.id, DunningJobStatus.FAILED, str(exc)[:2000])
+        return
+    await _finish(job.id, DunningJobStatus.SUCCEEDED if stats.completed else DunningJobStatus.CANCELED)
+
+
+class DunningWorker:
+    """Poll loop that claims and executes jobs, ``concurrency`` at a time."""
+
+    def __init__(self, concurrency: int | None = None, poll_seconds: float | None = None) -> None:
+        self.concurrency = concurrency or settings.DUNNING_WORKER_CONCURRENCY
+        self.poll_seconds = poll_seconds or settings.DUNNING_WORKER_POLL_SECONDS
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: list[asyncio.Task] = []
+
+    async def _loop(self, slot: int) -> None:
+        worker_id = f"{self.worker_id}:{slot}"
+        while True:
+            try:
+                if slot == 0:
+                    requeued = await requeue_stale()
+                    if requeued:
+                        logger.warning("requeued %d stale dunning job(s)", requeued)
+                job = await claim_next(worker_id)
+                if job is not None:
+                    await execute_job(job)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("dunning worker %s poll failed", worker_id)
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._loop(i)) for i in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_forever(self) -> None:
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Consome a fila de execuções da régua de cobrança.")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--poll-seconds", type=float, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(DunningWorker(args.concurrency, args.poll_seconds).run_forever())
+
+
+if __name__ == "__main__":
+    main()
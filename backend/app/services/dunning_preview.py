@@ -0,0 +1,99 @@
+"""What a dunning run would do right now, without writing anything.
+
+Same calendar as ``run_dunning``: a step at offset ``o`` in timezone ``tz``
+fires for open charges whose local due date is today - ``o``. Instead of
+computing that offset for every open charge, each (timezone, offset) becomes
+a UTC range on ``Charge.dueDate`` (indexed), and pairs already claimed in
+``NotificationLogKey`` are excluded with an anti-join, so a preview reads a
+few days' worth of charges whatever the size of the portfolio.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import exists, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.base import ChargeStatus
+from app.models.charge import Charge
+from app.models.customer import Customer
+from app.models.dunning import DunningStep
+from app.models.notification_log import NotificationLogKey
+from app.services.clock import clock
+from app.services.dunning import render_template
+from app.services.dunning_calendar import day_buckets, local_day_window
+from app.services.dunning_config import dunning_config
+from app.services.dunning_schedule import OPEN_STATUSES
+
+
+@dataclass
+class StepPreview:
+    step: DunningStep
+    timezone: str
+    count: int
+    samples: list[dict] = field(default_factory=list)
+
+
+@dataclass
+class DunningPreview:
+    now: datetime
+    overdue: int
+    steps: list[StepPreview]
+
+    @property
+    def by_channel(self) -> dict[str, int]:
+        totals: dict[str, int] = defaultdict(int)
+        for item in self.steps:
+            totals[item.step.channel.value] += item.count
+        return dict(totals)
+
+
+async def preview_dunning(db: AsyncSession, now: datetime | None = None, *, sample_size: int = 3) -> DunningPreview:
+    """Counts per step and up to ``sample_size`` rendered messages each. Runs in a READ ONLY transaction."""
+    # Must be the transaction's first statement
+    await db.execute(text("SET TRANSACTION READ ONLY"))
+    if now is None:
+        now = await clock.now()
+    buckets = day_buckets(await dunning_config.active_steps(), now)
+
+    # OVERDUE is decided in the default timezone (the first bucket), as in the run
+    overdue_before, _ = local_day_window(buckets[0].today, buckets[0].timezone)
+    overdue = (await db.execute(
+        select(func.count()).select_from(Charge)
+        .where(Charge.status == ChargeStatus.PENDING, Charge.dueDate < overdue_before)
+    )).scalar_one()
+
+    steps = []
+    for bucket in buckets:
+        for offset in bucket.offsets:
+            due_local = bucket.today - timedelta(days=offset)
+            start, end = local_day_window(due_local, bucket.timezone)
+            for step in bucket.steps_by_offset[offset]:
+                conditions = (
+                    Charge.status.in_(OPEN_STATUSES),
+                    Charge.dueDate >= start,
+                    Charge.dueDate < end,
+                    ~exists().where(NotificationLogKey.chargeId == Charge.id, NotificationLogKey.stepId == step.id),
+                )
+                count = (await db.execute(select(func.count()).select_from(Charge).where(*conditions))).scalar_one()
+                item = StepPreview(step, bucket.timezone, count)
+                if count and sample_size:
+                    rows = await db.execute(
+                        select(Charge.id, Charge.amountCents, Charge.description, Customer.name)
+                        .join(Customer, Customer.id == Charge.customerId)
+                        .where(*conditions)
+                        .order_by(Charge.id)
+                        .limit(sample_size)
+                    )
+                    item.samples = [
+                        {
+                            "chargeId": charge_id,
+                            "customerName": name,
+                            "renderedMessage": render_template(step.template, name, amount, due_local, description),
+                        }
+                        for charge_id, amount, description, name in rows.tuples()
+                    ]
+                steps.append(item)
+    await db.rollback()
+    return DunningPreview(now, overdue, steps)
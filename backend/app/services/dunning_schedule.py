@@ -0,0 +1,33 @@
+"""Writes to ``DunningSchedule``, the materialized list of upcoming fires.
+
+The run replaces a charge's rows every time it evaluates the charge, so
+the table follows both charge edits (through ``updatedAt``) and step edits
+(through the config fingerprint, which forces a full pass).
+"""
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import in_array
+from app.models.base import ChargeStatus
+from app.models.charge import Charge
+from app.models.dunning import DunningSchedule
+
+OPEN_STATUSES = (ChargeStatus.PENDING, ChargeStatus.OVERDUE)
+
+
+async def replace_schedule(db: AsyncSession, charge_ids: list[str], rows: list[dict]) -> None:
+    """Drop the schedule of ``charge_ids`` and write ``rows`` in its place. Does not commit."""
+    if charge_ids:
+        await db.execute(delete(DunningSchedule).where(in_array(DunningSchedule.chargeId, charge_ids)))
+    if rows:
+        await db.execute(insert(DunningSchedule), rows)
+
+
+async def prune_schedule(db: AsyncSession, since=None) -> int:
+    """Remove rows of charges that were paid or canceled (since ``since``, if given). Does not commit."""
+    closed = select(Charge.id).where(Charge.status.not_in(OPEN_STATUSES))
+    if since is not None:
+        closed = closed.where(Charge.updatedAt > since)
+    result = await db.execute(delete(DunningSchedule).where(DunningSchedule.chargeId.in_(closed)))
+    return result.rowcount
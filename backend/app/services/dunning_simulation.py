@@ -0,0 +1,89 @@
+"""Fast-forward: replay the daily dunning run over many simulated days in one call.
+
+Every day is an ordinary ``run_dunning`` at ``clock + k days``, all inside
+one REPEATABLE READ transaction on a dedicated connection. The run's
+per-page commits become savepoint releases, so at the end the whole replay
+is either rolled back (a what-if) or committed together with the advanced
+clock, leaving the same state as calling ``/api/simulate`` and
+``/api/dunning/run`` once per day.
+
+Day one reuses the last real run's high-water mark; from then on each day
+is incremental and only reads charges whose ``nextDunningDate`` arrived.
+Shards run in other processes and can't see the transaction, so the replay
+always runs in process.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.app_state import AppState
+from app.models.notification_log import NotificationLog
+from app.services.clock import clock
+from app.services.dunning import DEFAULT_BATCH_SIZE, run_dunning
+from app.services.dunning_calendar import local_today
+
+
+@dataclass
+class SimulatedDay:
+    date: date
+    now: datetime
+    processed: int
+    created: int
+    by_channel: dict[str, int]
+    incremental: bool
+
+
+async def fast_forward(
+    days: int, *, commit: bool = False, batch_size: int = DEFAULT_BATCH_SIZE,
+) -> tuple[datetime, list[SimulatedDay]]:
+    """Run ``days`` consecutive daily runs; returns the starting clock and one entry per day."""
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="REPEATABLE READ")
+        trans = await conn.begin()
+        db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+        try:
+            # To the millisecond, like the TIMESTAMP(3) columns: logs store scheduledFor = now
+            # exactly, or the per-channel count below would never match the real clock's now
+            start = await clock.now(fresh=True)
+            start = start.replace(microsecond=start.microsecond // 1000 * 1000)
+            timeline = []
+            for k in range(1, days + 1):
+                now = start + timedelta(days=k)
+                stats = await run_dunning(db, now, batch_size=batch_size, workers=1, record_metrics=False)
+                # Every log a run writes carries scheduledFor = its now (indexed)
+                by_channel = dict((await db.execute(
+                    select(NotificationLog.channel, func.count())
+                    .where(NotificationLog.scheduledFor == now)
+                    .group_by(NotificationLog.channel)
+                )).tuples())
+                timeline.append(SimulatedDay(
+                    date=local_today(now, settings.DUNNING_DEFAULT_TIMEZONE),
+                    now=now,
+                    processed=stats.processed,
+                    created=stats.created,
+                    by_channel={channel.value: count for channel, count in by_channel.items()},
+                    incremental=stats.incremental,
+                ))
+
+            if commit:
+                app_state = await db.get(AppState, 1)
+                if app_state is None:
+                    app_state = AppState(id=1)
+                    db.add(app_state)
+                app_state.simulatedNow = start + timedelta(days=days)
+                await db.commit()
+                await trans.commit()
+            else:
+                await trans.rollback()
+        except BaseException:
+            if trans.is_active:
+                await trans.rollback()
+            raise
+        finally:
+            await db.close()
+    return start, timeline
@@ -0,0 +1,162 @@
+"""Monthly partition maintenance for NotificationLog.
+
+Creates partitions ahead of time and moves months older than
+``LOG_RETENTION_MONTHS`` out of the database: each one is detached, copied to
+a gzip'd CSV under ``LOG_ARCHIVE_DIR`` with a JSON manifest next to it, and
+dropped. ``NotificationLogKey`` is left alone, so run_dunning still knows
+which (charge, step) pairs were already notified after their logs are gone.
+
+The API also creates the upcoming partitions at startup and at the start of
+every dunning run (``ensure_upcoming_partitions``), so logs don't pile up in
+the default partition when the cron stops. Archiving is cron only:
+
+    python -m app.services.log_retention
+    python -m app.services.log_retention --dry-run
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import asyncpg_dsn, settings, to_asyncpg_url
+
+PARTITION_NAME = re.compile(r"^NotificationLog_p(\d{4})(\d{2})$")
+
+PARTITIONS_SQL = """
+SELECT c.relname, c.relispartition
+FROM pg_class c
+WHERE c.relkind = 'r' AND c.relname LIKE 'NotificationLog\\_p%'
+ORDER BY c.relname
+"""
+
+# A no-op lookup per month once the partitions exist
+UPCOMING_PARTITIONS_SQL = text("""
+SELECT notification_log_ensure_partition(CAST(date_trunc('month', now()) + n * interval '1 month' AS date))
+FROM generate_series(0, :ahead) n
+""")
+
+
+def add_months(month: date, n: int) -> date:
+    y, m = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def partition_month(name: str) -> date | None:
+    match = PARTITION_NAME.match(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+async def ensure_partitions(conn, today: date, ahead: int) -> list[str]:
+    """Create this month's partition and the next ``ahead`` ones."""
+    current = today.replace(day=1)
+    return [
+        await conn.fetchval("SELECT notification_log_ensure_partition($1)", add_months(current, n))
+        for n in range(ahead + 1)
+    ]
+
+
+async def ensure_upcoming_partitions(db: AsyncSession, ahead: int | None = None) -> None:
+    """Same as ``ensure_partitions`` for the database's current month, on a session; doesn't commit."""
+    await db.execute(UPCOMING_PARTITIONS_SQL, {"ahead": settings.LOG_PARTITIONS_AHEAD if ahead is None else ahead})
+
+
+async def archive_partition(conn, name: str, attached: bool, archive_dir: Path) -> dict:
+    """Detach ``name``, dump it to ``<name>.csv.gz`` and drop it.
+
+    The dump is written to a temp file and renamed only after it is complete,
+    so a crash never leaves a truncated archive behind; a partition detached
+    by a crashed run is picked up again on the next one.
+    """
+    if attached:
+        await conn.execute(f'ALTER TABLE "NotificationLog" DETACH PARTITION "{name}"')
+
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    target = archive_dir / f"{name}.csv.gz"
+    partial = target.with_suffix(".gz.partial")
+    with gzip.open(partial, "wb", compresslevel=6) as f:
+        result = await conn.copy_from_table(name, output=f, format="csv", header=True)
+    rows = int(result.split()[-1])
+
+    digest = hashlib.sha256()
+    with open(partial, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    os.replace(partial, target)
+
+    manifest = {
+        "table": "NotificationLog",
+        "partition": name,
+        "month": partition_month(name).isoformat(),
+        "rows": rows,
+        "file": target.name,
+        "bytes": target.stat().st_size,
+        "sha256": digest.hexdigest(),
+        "archivedAt": datetime.now(timezone.utc).isoformat(),
+    }
+    (archive_dir / f"{name}.json").write_text(json.dumps(manifest, indent=2) + "\n")
+
+    await conn.execute(f'DROP TABLE "{name}"')
+    return manifest
+
+
+async def run(
+    dsn: str,
+    retention_months: int,
+    ahead: int,
+    archive_dir: Path,
+    today: date | None = None,
+    dry_run: bool = False,
+) -> dict:
+    import asyncpg
+
+    today = today or datetime.now(timezone.utc).date()
+    cutoff = add_months(today.replace(day=1), -retention_months)
+
+    conn = await asyncpg.connect(asyncpg_dsn(dsn))
+    try:
+        expired = [
+            (r["relname"], r["relispartition"])
+            for r in await conn.fetch(PARTITIONS_SQL)
+            if (month := partition_month(r["relname"])) is not None and month < cutoff
+        ]
+        if dry_run:
+            return {"cutoff": cutoff.isoformat(), "created": [], "archived": [name for name, _ in expired]}
+
+        created = await ensure_partitions(conn, today, ahead)
+        archived = [await archive_partition(conn, name, attached, archive_dir) for name, attached in expired]
+    finally:
+        await conn.close()
+    return {"cutoff": cutoff.isoformat(), "created": created, "archived": archived}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cria partições futuras e arquiva as antigas do NotificationLog.")
+    parser.add_argument("--retention-months", type=int, default=settings.LOG_RETENTION_MONTHS)
+    parser.add_argument("--ahead", type=int, default=settings.LOG_PARTITIONS_AHEAD)
+    parser.add_argument("--archive-dir", default=settings.LOG_ARCHIVE_DIR)
+    parser.add_argument("--dsn", help="Padrão: DIRECT_URL/DATABASE_URL do .env")
+    parser.add_argument("--dry-run", action="store_true", help="Só lista as partições que seriam arquivadas")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(
+        # DETACH/DROP need a real session, not a PgBouncer transaction-pooled one
+        args.dsn or to_asyncpg_url(settings.DIRECT_URL or settings.DATABASE_URL),
+        args.retention_months,
+        args.ahead,
+        Path(args.archive_dir),
+        dry_run=args.dry_run,
+    ))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
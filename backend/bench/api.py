@@ -0,0 +1,228 @@
+"""End-to-end API benchmark.
+
+Boots ``app.main:app`` under uvicorn in a background thread, optionally loads
+a synthetic dataset first, then drives each hot endpoint at a fixed
+concurrency and writes latency percentiles, throughput and DB queries per
+request as JSON. With ``--baseline`` the run is compared against a stored
+result and the process exits non-zero on regression.
+
+``--load`` truncates every table first, so it only runs against a database
+named explicitly with ``--database-url``; the API under test then uses that
+same database instead of the one in ``.env``.
+
+    python -m bench.api --preset 10k --load --database-url postgresql://localhost/bench --out bench/result.json
+    python -m bench.api --baseline bench/baseline.json --tolerance 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+ENDPOINTS: list[tuple[str, str, str, dict | None]] = [
+    ("charges", "GET", "/api/charges", None),
+    ("customers", "GET", "/api/customers", None),
+    ("app-state", "GET", "/api/app-state", None),
+    ("logs", "GET", "/api/logs", None),
+    ("dunning-run", "POST", "/api/dunning/run", None),
+    ("chat", "POST", "/api/chat", {"message": "Como está a inadimplência da rede?"}),
+]
+
+
+@dataclass
+class QueryCounter:
+    count: int = 0
+
+    def __call__(self, *args) -> None:
+        self.count += 1
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: list[float], errors: int, wall: float, queries: int) -> dict:
+    latencies.sort()
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "throughput_rps": round(total / wall, 2) if wall > 0 else 0.0,
+        "queries_per_request": round(queries / total, 2) if total else 0.0,
+    }
+
+
+async def drive(client, method: str, path: str, body: dict | None, requests: int, concurrency: int) -> tuple[list[float], int, float]:
+    latencies: list[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - started
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def start_server(port: int):
+    import uvicorn
+
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 15
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("uvicorn não subiu")
+        time.sleep(0.05)
+    return server, thread
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+    from sqlalchemy import event
+
+    from app.core.database import engine
+
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+
+    selected = [e for e in ENDPOINTS if not args.endpoints or e[0] in args.endpoints]
+    results: dict[str, dict] = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        for name, method, path, body in selected:
+            await drive(client, method, path, body, args.warmup, min(args.concurrency, args.warmup or 1))
+            counter.count = 0
+            latencies, errors, wall = await drive(client, method, path, body, args.requests, args.concurrency)
+            results[name] = summarize(latencies, errors, wall, counter.count)
+            print(f"{name:<12} p50={results[name]['p50_ms']:>8}ms p95={results[name]['p95_ms']:>8}ms "
+                  f"p99={results[name]['p99_ms']:>8}ms rps={results[name]['throughput_rps']:>8} "
+                  f"q/req={results[name]['queries_per_request']}", file=sys.stderr)
+
+    return {
+        "meta": {
+            "customers": args.customers,
+            "charges": args.charges,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "endpoints": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Endpoints whose p95 grew or throughput dropped by more than ``tolerance``."""
+    regressions = []
+    for name, cur in current["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {cur['p95_ms']}ms")
+        if base["throughput_rps"] and cur["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['throughput_rps']} -> {cur['throughput_rps']} rps")
+        if cur["queries_per_request"] > base["queries_per_request"]:
+            regressions.append(f"{name}: queries/req {base['queries_per_request']} -> {cur['queries_per_request']}")
+    return regressions
+
+
+def main() -> None:
+    from app.data.synthetic import PRESETS
+
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end da API.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="10k")
+    parser.add_argument("--customers", type=int)
+    parser.add_argument("--charges", type=int)
+    parser.add_argument("--load", action="store_true", help="Apaga tudo e recarrega o dataset sintético antes de medir")
+    parser.add_argument("--database-url", help="Banco do benchmark (obrigatório com --load); padrão: o do .env")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Requisições medidas por endpoint")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--endpoints", nargs="*", help=f"Subconjunto de: {', '.join(e[0] for e in ENDPOINTS)}")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--out", help="Grava o resultado em JSON neste arquivo")
+    parser.add_argument("--baseline", help="Compara com um resultado anterior")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava o resultado como novo baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    if args.load and not args.database_url:
+        parser.error("--load executa TRUNCATE em todas as tabelas; informe o banco com --database-url")
+
+    customers, charges = PRESETS[args.preset]
+    args.customers = args.customers or customers
+    args.charges = args.charges or charges
+    args.base_url = f"http://127.0.0.1:{args.port}"
+
+    # /api/chat must hit the mock reply, never the real LLM
+    os.environ["ANTHROPIC_API_KEY"] = ""
+    if args.database_url:
+        # Before app.core.config is imported, so the served app and the loader agree
+        os.environ["DIRECT_URL"] = os.environ["DATABASE_URL"] = args.database_url
+        os.environ["DB_PGBOUNCER"] = "false"
+        os.environ["READ_DATABASE_URL"] = ""
+    from app.core.config import settings
+
+    settings.ANTHROPIC_API_KEY = ""
+
+    if args.load:
+        from app.data.synthetic import SyntheticSpec, load
+
+        spec = SyntheticSpec(customers=args.customers, charges=args.charges)
+        asyncio.run(load(spec, settings.async_database_url, truncate=True))
+
+    server, thread = start_server(args.port)
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    output = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    if args.save_baseline and args.baseline:
+        with open(args.baseline, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if args.baseline and not args.save_baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressões:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Throughput of the FEBRABAN boleto engine.
+
+Correctness (check digits against a naive implementation, the due-factor
+wrap, round trips) lives in tests/test_febraban.py.
+
+    python -m bench.boleto --count 500000 --min-rate 100000
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import date
+
+from app.services.febraban import BoletoEncoder
+
+
+def throughput(encoder: BoletoEncoder, count: int) -> float:
+    due = date(2026, 3, 18)
+    started = time.perf_counter()
+    for i in range(count):
+        encoder.encode(due, 10_000 + i, i)
+    return count / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark do gerador de linha digitável / código de barras.")
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--min-rate", type=float, help="Sai com erro abaixo deste número de códigos/s")
+    args = parser.parse_args()
+
+    encoder = BoletoEncoder("237", "1234", "09", "0012345")
+    result = {"codes": args.count, "codes_per_second": round(throughput(encoder, args.count))}
+    print(json.dumps(result, indent=2))
+
+    if args.min_rate and result["codes_per_second"] < args.min_rate:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Dunning run throughput by number of worker processes.
+
+Each measurement starts from the same state: the notification logs and
+their keys are truncated, then ``run_dunning`` runs at the synthetic
+dataset's "today" with the given number of shard processes. Destructive —
+point it at a benchmark database.
+
+    python -m app.data.synthetic --preset 5m --truncate
+    python -m bench.dunning --workers 1 2 4 8 --out bench/dunning.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from sqlalchemy import text
+
+from app.core.database import async_session
+from app.data.synthetic import SyntheticSpec
+from app.services.dunning import DEFAULT_BATCH_SIZE, run_dunning
+
+
+async def measure(workers: int, batch_size: int) -> dict:
+    async with async_session() as db:
+        await db.execute(text('TRUNCATE "NotificationLog", "NotificationLogKey"'))
+        await db.commit()
+        started = time.perf_counter()
+        stats = await run_dunning(
+            db, SyntheticSpec().today, batch_size=batch_size, workers=workers, incremental=False,
+        )
+        elapsed = time.perf_counter() - started
+    processed = stats.processed
+    return {
+        "workers": workers,
+        "charges": processed,
+        "notifications": stats.created,
+        "seconds": round(elapsed, 2),
+        "charges_per_second": round(processed / elapsed) if elapsed else 0,
+    }
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    results = []
+    for workers in args.workers:
+        result = await measure(workers, args.batch_size)
+        if results:
+            result["speedup"] = round(result["charges_per_second"] / results[0]["charges_per_second"], 2)
+        results.append(result)
+        print(json.dumps(result), file=sys.stderr)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark da régua de cobrança por número de processos.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--out", help="Grava o resultado em JSON neste arquivo")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
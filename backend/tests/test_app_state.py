@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.core.database import get_read_db
+from app.main import app
+from app.routers import charges, customers
+from app.services.clock import clock
+
+
+class FakeSession:
+    """Answers the version query, then ``fail_after`` more statements before raising."""
+
+    def __init__(self, fail_after: int | None = None) -> None:
+        self.fail_after = fail_after
+        self.statements = 0
+
+    async def execute(self, stmt):
+        self.statements += 1
+        if self.fail_after is not None and self.statements > self.fail_after + 1:
+            raise ConnectionError("database went away")
+
+        class Result:
+            def one(self):
+                return datetime(2026, 3, 1, 9), 7
+
+            def scalar(self):
+                return 10
+
+        return Result()
+
+
+@pytest.fixture
+def client():
+    with clock.override(datetime(2026, 3, 18, 12)):
+        yield TestClient(app, raise_server_exceptions=False)
+    app.dependency_overrides.pop(get_read_db, None)
+
+
+def use_session(session: FakeSession) -> None:
+    async def override():
+        yield session
+
+    app.dependency_overrides[get_read_db] = override
+
+
+def test_payload_is_served_with_an_etag_and_revalidates(client):
+    use_session(FakeSession())
+    response = client.get("/api/app-state")
+    assert response.status_code == 200
+    assert response.json()["stats"]["total"] == 10
+    etag = response.headers["etag"]
+
+    session = FakeSession()
+    use_session(session)
+    response = client.get("/api/app-state", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert session.statements == 1
+
+
+def test_fallback_payload_gets_no_etag(client):
+    use_session(FakeSession(fail_after=1))
+    response = client.get("/api/app-state")
+    assert response.status_code == 200
+    assert response.json()["isSimulated"] is False
+    assert "etag" not in response.headers
+
+
+@pytest.mark.anyio
+async def test_list_etags_do_not_count_rows():
+    sql = []
+
+    class Recorder(FakeSession):
+        async def execute(self, stmt):
+            sql.append(str(stmt.compile(dialect=asyncpg.dialect())))
+            return await super().execute(stmt)
+
+    await charges.charges_etag(Recorder())
+    await customers.customers_etag(Recorder())
+    assert len(sql) == 2 and not any("count(" in s for s in sql)
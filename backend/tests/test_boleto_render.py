@@ -0,0 +1,74 @@
+import io
+import os
+import zipfile
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import date, datetime
+
+import pytest
+
+from app.routers import boletos
+from app.services.boleto_render import BoletoDoc, RenderCache, render
+from app.services.febraban import BoletoEncoder
+
+ENCODER = BoletoEncoder("237", "1234", "09", "0012345")
+
+
+def make_doc(i: int) -> BoletoDoc:
+    code, linha = ENCODER.encode(date(2026, 4, 18), 10_000 + i, i)
+    return BoletoDoc(
+        boletoId=f"bol{i}", chargeId=f"chg{i}", linhaDigitavel=linha, barcodeValue=code,
+        amountCents=10_000 + i, dueDate=datetime(2026, 4, 18), description="Royalties",
+        customerName="Franquia Centro", customerDoc="12345678000199", beneficiario="Cobrança Fácil",
+        createdAt=datetime(2026, 3, 18),
+    )
+
+
+class NoPool(Executor):
+    def submit(self, fn, *args, **kwargs):
+        raise AssertionError("everything should have come from the cache")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = RenderCache(tmp_path, 1 << 20, 1 << 30)
+    monkeypatch.setattr(boletos, "cache", cache)
+    monkeypatch.setattr(boletos, "BATCH_CHUNK", 2)
+    return cache
+
+
+async def collect(stream) -> list[bytes]:
+    return [part async for part in stream]
+
+
+@pytest.mark.anyio
+async def test_zip_is_streamed_a_chunk_at_a_time_in_order(cache):
+    docs = [make_doc(i) for i in range(5)]
+    with ThreadPoolExecutor(2) as pool:
+        parts = await collect(boletos.zip_stream(docs, "png", pool, ahead=2))
+
+    # Three chunks of entries, then the central directory
+    assert len(parts) == 4 and all(parts)
+    with zipfile.ZipFile(io.BytesIO(b"".join(parts))) as zf:
+        assert zf.namelist() == [f"boleto-chg{i}.png" for i in range(5)]
+        assert zf.read("boleto-chg3.png") == render(docs[3], "png")
+
+    # Second pass is all cache hits
+    again = await collect(boletos.zip_stream(docs, "png", NoPool(), ahead=2))
+    assert b"".join(again) == b"".join(parts)
+
+
+def test_prune_drops_the_least_recently_used_files(tmp_path):
+    cache = RenderCache(tmp_path, 0, 250)
+    assert cache.prune_due
+    for i, key in enumerate(["aa1", "bb2", "cc3"]):
+        cache.put(key, "pdf", b"x" * 100)
+        os.utime(cache._path(key, "pdf"), (1_000 + i, 1_000 + i))
+    # A disk hit makes aa1 the most recent
+    assert cache.get("aa1", "pdf") == b"x" * 100
+
+    assert cache.prune() == 1
+    assert cache.get("bb2", "pdf") is None
+    assert cache.get("aa1", "pdf") and cache.get("cc3", "pdf")
+    assert not cache.prune_due
+    cache.put("dd4", "pdf", b"x" * 25)
+    assert cache.prune_due
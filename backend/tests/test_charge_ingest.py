@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.services.charge_ingest import validate_charges
+
+
+class RecordingSession:
+    def __init__(self, known: list[str]) -> None:
+        self.known = known
+        self.compiled = []
+
+    async def execute(self, stmt):
+        self.compiled.append(stmt.compile(dialect=asyncpg.dialect()))
+        known = self.known
+
+        class Result:
+            def scalars(self):
+                return iter(known)
+
+        return Result()
+
+
+def charge(customer_id: str) -> dict:
+    return {"customerId": customer_id, "description": "Royalties", "amountCents": 100, "dueDate": "2026-04-18"}
+
+
+@pytest.mark.anyio
+async def test_customer_lookup_binds_one_parameter_past_the_asyncpg_limit():
+    ids = [f"cus{i}" for i in range(40_000)]
+    db = RecordingSession(known=ids[:-1])
+    result = await validate_charges(db, [charge(cid) for cid in ids])
+
+    [compiled] = db.compiled
+    assert len(compiled.params) == 1
+    assert sorted(next(iter(compiled.params.values()))) == sorted(ids)
+    assert len(result.rows) == 39_999
+    assert result.errors == [(39_999, "Cliente não encontrado: cus39999")]
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.invalidation import Invalidation, Topic, bus
+from app.services import clock as clock_module
+from app.services.clock import Clock, clock
+
+
+class FakeAppState:
+    """Counts the AppState reads a Clock makes."""
+
+    def __init__(self, simulated: datetime | None) -> None:
+        self.simulated = simulated
+        self.reads = 0
+
+    def session(self):
+        store = self
+
+        class Session:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                pass
+
+            async def execute(self, stmt):
+                store.reads += 1
+                value = store.simulated
+
+                class Result:
+                    def scalar_one_or_none(self):
+                        return value
+
+                return Result()
+
+        return Session()
+
+
+@pytest.fixture
+def app_state(monkeypatch):
+    store = FakeAppState(datetime(2026, 3, 1, 12))
+    monkeypatch.setattr(clock_module, "async_session", store.session)
+    monkeypatch.setattr(clock_module.settings, "APP_CLOCK_CACHE_SECONDS", 3600.0)
+    return store
+
+
+@pytest.mark.anyio
+async def test_override_pins_now_without_reading(app_state):
+    pinned = datetime(2030, 1, 2, 3, 4)
+    with clock.override(pinned):
+        assert await clock.now() == pinned
+        assert await clock.now(fresh=True) == pinned
+        assert await clock.simulated() == pinned
+    assert app_state.reads == 0
+
+
+@pytest.mark.anyio
+async def test_overrides_nest_and_restore(app_state):
+    outer, inner = datetime(2030, 1, 1), datetime(2031, 1, 1)
+    c = Clock()
+    with c.override(outer):
+        with c.override(inner):
+            assert await c.now() == inner
+        assert await c.now() == outer
+    assert await c.now() == app_state.simulated
+
+
+@pytest.mark.anyio
+async def test_simulated_instant_is_cached_until_invalidated(app_state):
+    c = Clock()
+    assert await c.now() == datetime(2026, 3, 1, 12)
+    app_state.simulated = datetime(2026, 3, 2, 12)
+    assert await c.now() == datetime(2026, 3, 1, 12)
+    assert app_state.reads == 1
+
+    assert await c.now(fresh=True) == datetime(2026, 3, 2, 12)
+    app_state.simulated = datetime(2026, 3, 3, 12)
+    c.invalidate()
+    assert await c.now() == datetime(2026, 3, 3, 12)
+    assert app_state.reads == 3
+
+
+@pytest.mark.anyio
+async def test_set_simulated_spares_the_next_read(app_state):
+    c = Clock()
+    c.set_simulated(None)
+    before = datetime.utcnow()
+    assert await c.now() >= before
+    assert await c.simulated() is None
+    assert app_state.reads == 0
+
+
+@pytest.mark.anyio
+async def test_app_state_event_drops_the_shared_clock(app_state, monkeypatch):
+    monkeypatch.setattr(clock, "_simulated", None)
+    monkeypatch.setattr(clock, "_checked_at", None)
+    await clock.now()
+    app_state.simulated = datetime(2026, 4, 1)
+    bus.dispatch(Invalidation(Topic.APP_STATE, (), "other:1"))
+    assert await clock.now() == datetime(2026, 4, 1)
+    assert app_state.reads == 2
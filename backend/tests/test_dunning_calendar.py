@@ -0,0 +1,164 @@
+"""Local-day math of the régua around midnight in São Paulo and around DST changes."""
+
+import logging
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services.dunning_calendar import (
+    day_buckets,
+    local_day_window,
+    local_today,
+    next_dunning_date,
+    upcoming_fires,
+)
+
+BRT = "America/Sao_Paulo"
+NEW_YORK = "America/New_York"
+
+
+@pytest.fixture(autouse=True)
+def default_timezone(monkeypatch):
+    monkeypatch.setattr(settings, "DUNNING_DEFAULT_TIMEZONE", BRT)
+
+
+def make_step(step_id: str, trigger: str, offset_days: int, tz: str | None = None):
+    rule = SimpleNamespace(timezone=tz)
+    return SimpleNamespace(
+        id=step_id, ruleId=f"rule-{tz}", rule=rule, trigger=trigger, offsetDays=offset_days, channel="EMAIL",
+    )
+
+
+@pytest.mark.parametrize(
+    ("now", "today"),
+    [
+        # Naive datetimes are UTC; BRT is UTC-3 all year since 2019
+        (datetime(2026, 3, 18, 2, 59, 59), date(2026, 3, 17)),
+        (datetime(2026, 3, 18, 3, 0), date(2026, 3, 18)),
+        (datetime(2026, 3, 18, 0, 30, tzinfo=timezone(timedelta(hours=-3))), date(2026, 3, 18)),
+        (datetime(2026, 3, 17, 23, 59, tzinfo=timezone(timedelta(hours=-3))), date(2026, 3, 17)),
+    ],
+)
+def test_local_today_turns_at_brt_midnight(now, today):
+    assert local_today(now, BRT) == today
+
+
+def test_local_day_window_is_utc_midnight_plus_three():
+    assert local_day_window(date(2026, 3, 18), BRT) == (datetime(2026, 3, 18, 3), datetime(2026, 3, 19, 3))
+
+
+@pytest.mark.parametrize(
+    ("tz", "day", "window"),
+    [
+        # Spring forward: a 23-hour day
+        (NEW_YORK, date(2026, 3, 8), (datetime(2026, 3, 8, 5), datetime(2026, 3, 9, 4))),
+        # Fall back: a 25-hour day
+        (NEW_YORK, date(2026, 11, 1), (datetime(2026, 11, 1, 4), datetime(2026, 11, 2, 5))),
+        # Brazil's last DST start skipped 00:00; the day began at 01:00 -02, still 03:00 UTC
+        (BRT, date(2018, 11, 4), (datetime(2018, 11, 4, 3), datetime(2018, 11, 5, 2))),
+    ],
+)
+def test_local_day_window_across_dst(tz, day, window):
+    assert local_day_window(day, tz) == window
+
+
+@pytest.mark.parametrize(
+    ("now", "today"),
+    [
+        (datetime(2026, 3, 8, 4, 59), date(2026, 3, 7)),
+        (datetime(2026, 3, 8, 5, 0), date(2026, 3, 8)),
+        # After the change midnight is 04:00 UTC
+        (datetime(2026, 3, 9, 3, 59), date(2026, 3, 8)),
+        (datetime(2026, 3, 9, 4, 0), date(2026, 3, 9)),
+    ],
+)
+def test_local_today_across_dst(now, today):
+    assert local_today(now, NEW_YORK) == today
+
+
+def test_windows_tile_the_timeline():
+    for tz in (BRT, NEW_YORK):
+        day = date(2026, 1, 1)
+        for _ in range(366):
+            start, end = local_day_window(day, tz)
+            assert local_today(start, tz) == day
+            assert local_today(end - timedelta(microseconds=1), tz) == day
+            assert local_day_window(day + timedelta(days=1), tz)[0] == end
+            day += timedelta(days=1)
+
+
+def test_buckets_put_the_default_timezone_first():
+    steps = [make_step("tokyo", "ON_DUE", 0, "Asia/Tokyo"), make_step("brt", "AFTER_DUE", 3, BRT)]
+    # 02:00 UTC: still the 17th in São Paulo, already the 18th in Tokyo
+    buckets = day_buckets(steps, datetime(2026, 3, 18, 2))
+    assert [(b.timezone, b.today) for b in buckets] == [(BRT, date(2026, 3, 17)), ("Asia/Tokyo", date(2026, 3, 18))]
+    assert buckets[0].offsets == [3]
+    assert buckets[1].offsets == [0]
+
+
+def test_default_bucket_exists_without_steps():
+    buckets = day_buckets([], datetime(2026, 3, 18, 3))
+    assert [(b.timezone, b.today, b.offsets) for b in buckets] == [(BRT, date(2026, 3, 18), [])]
+
+
+def test_unknown_timezone_falls_back_to_default(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.dunning"):
+        buckets = day_buckets([make_step("x", "BEFORE_DUE", 5, "Mars/Olympus")], datetime(2026, 3, 18, 3))
+    assert [b.timezone for b in buckets] == [BRT]
+    assert buckets[0].offsets == [-5]
+    assert "Mars/Olympus" in caplog.text
+
+
+def test_step_offsets_are_today_minus_due():
+    steps = [
+        make_step("d-5", "BEFORE_DUE", 5),
+        make_step("d0", "ON_DUE", 0),
+        make_step("d+7", "AFTER_DUE", 7),
+    ]
+    bucket = day_buckets(steps, datetime(2026, 3, 18, 3))[0]
+    assert bucket.offsets == [-5, 0, 7]
+    assert [s.id for s in bucket.steps_by_offset[-5]] == ["d-5"]
+
+
+@pytest.mark.parametrize(
+    ("now", "fires_today"),
+    [
+        # Due on the 18th (local); one second before BRT midnight it is still D-1
+        (datetime(2026, 3, 18, 2, 59, 59), "d-1"),
+        (datetime(2026, 3, 18, 3, 0), "d0"),
+    ],
+)
+def test_the_step_due_today_changes_at_brt_midnight(now, fires_today):
+    steps = [make_step("d-1", "BEFORE_DUE", 1), make_step("d0", "ON_DUE", 0)]
+    bucket = day_buckets(steps, now)[0]
+    d = (bucket.today - date(2026, 3, 18)).days
+    assert [s.id for s in bucket.steps_by_offset[d]] == [fires_today]
+
+
+def test_upcoming_fires_and_next_date():
+    steps = [make_step("d-5", "BEFORE_DUE", 5), make_step("d0", "ON_DUE", 0), make_step("d+3", "AFTER_DUE", 3)]
+    buckets = day_buckets(steps, datetime(2026, 3, 17, 12))
+    # Due 2026-03-23 local: six days ahead
+    days = [-6]
+    fires = upcoming_fires(days, buckets)
+    assert [(s.id, fire) for s, fire in fires] == [
+        ("d-5", date(2026, 3, 18)),
+        ("d0", date(2026, 3, 23)),
+        ("d+3", date(2026, 3, 26)),
+    ]
+    assert next_dunning_date(fires, days, buckets, pending=True) == date(2026, 3, 18)
+
+
+def test_today_is_left_to_the_run_unless_asked():
+    buckets = day_buckets([make_step("d0", "ON_DUE", 0)], datetime(2026, 3, 17, 12))
+    assert upcoming_fires([0], buckets) == []
+    assert [fire for _, fire in upcoming_fires([0], buckets, include_today=True)] == [date(2026, 3, 17)]
+
+
+def test_pending_charge_without_fires_is_due_back_when_it_turns_overdue():
+    buckets = day_buckets([], datetime(2026, 3, 17, 12))
+    assert next_dunning_date([], [-2], buckets, pending=True) == date(2026, 3, 20)
+    assert next_dunning_date([], [4], buckets, pending=True) == date(2026, 3, 17)
+    assert next_dunning_date([], [-2], buckets, pending=False) is None
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.models.base import DunningJobStatus
+from app.models.dunning_job import DunningJob
+from app.services import dunning_jobs
+
+
+class FakeSession:
+    """Records statements; the dedupe lookup finds ``existing``."""
+
+    def __init__(self, existing: DunningJob | None = None) -> None:
+        self.existing = existing
+        self.statements = []
+        self.added = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt.compile(dialect=asyncpg.dialect()))
+        existing = self.existing
+
+        class Result:
+            def scalar_one_or_none(self):
+                return existing
+
+        return Result()
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, obj):
+        pass
+
+
+@pytest.mark.anyio
+async def test_lookup_is_restricted_to_equal_params():
+    db = FakeSession()
+    await dunning_jobs.enqueue_job(db, {"notify": True, "full": False, "batchSize": 2000, "workers": None})
+    lookup = db.statements[-1]
+    canonical = json.dumps({"batchSize": 2000, "full": False, "notify": True, "workers": None})
+    assert '"DunningJob"."paramsJson" = ' in str(lookup)
+    assert canonical in lookup.params.values()
+    assert db.added[0].paramsJson == canonical
+
+
+@pytest.mark.anyio
+async def test_params_are_canonical_whatever_the_key_order():
+    first, second = FakeSession(), FakeSession()
+    await dunning_jobs.enqueue_job(first, {"full": True, "notify": False})
+    await dunning_jobs.enqueue_job(second, {"notify": False, "full": True})
+    assert first.added[0].paramsJson == second.added[0].paramsJson
+
+
+@pytest.mark.anyio
+async def test_existing_job_is_returned_instead_of_a_new_one():
+    job = DunningJob(id="job1", paramsJson="{}")
+    db = FakeSession(existing=job)
+    assert await dunning_jobs.enqueue_job(db, {}) is job
+    assert db.added == []
+
+
+@pytest.mark.anyio
+async def test_schedule_rebuild_only_dedupes_queued_rebuilds():
+    db = FakeSession()
+    await dunning_jobs.enqueue_schedule_rebuild(db)
+    lookup = db.statements[-1]
+    assert json.dumps(dunning_jobs.SCHEDULE_REBUILD_PARAMS, sort_keys=True) in lookup.params.values()
+    assert [DunningJobStatus.QUEUED] in lookup.params.values()
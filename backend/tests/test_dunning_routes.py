@@ -0,0 +1,65 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import get_db, get_read_db
+from app.main import app
+
+
+class EmptySession:
+    """Every lookup finds nothing."""
+
+    def __init__(self) -> None:
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+
+        class Result:
+            def scalar_one_or_none(self):
+                return None
+
+            def mappings(self):
+                return []
+
+        return Result()
+
+
+@pytest.fixture
+def db():
+    session = EmptySession()
+
+    async def override():
+        yield session
+
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = override
+    yield session
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(app)
+
+
+def test_unknown_forecast_channel_is_a_422(client, db):
+    response = client.get("/api/dunning/forecast/items", params={"fireDate": "2026-03-18", "channel": "FAX"})
+    assert response.status_code == 422
+    assert not db.statements
+
+
+@pytest.mark.parametrize("channel", ["EMAIL", "all"])
+def test_known_forecast_channels_are_accepted(client, channel):
+    response = client.get("/api/dunning/forecast/items", params={"fireDate": "2026-03-18", "channel": channel})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+@pytest.mark.parametrize("method, path, body", [
+    ("PATCH", "/api/dunning-steps/missing", {"enabled": False}),
+    ("DELETE", "/api/dunning-steps/missing", None),
+    ("PATCH", "/api/dunning-rules/missing", {"active": False}),
+    ("DELETE", "/api/dunning-rules/missing", None),
+])
+def test_missing_steps_and_rules_are_a_404(client, method, path, body):
+    response = client.request(method, path, json=body)
+    assert response.status_code == 404
@@ -0,0 +1,103 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.base import Channel
+from app.services import dunning_simulation
+from app.services.clock import clock
+from app.services.dunning import RunStats
+
+
+def stored(value: datetime) -> datetime:
+    """What a TIMESTAMP(3) column keeps: rounded to the millisecond."""
+    return datetime.min + round((value - datetime.min) / timedelta(milliseconds=1)) * timedelta(milliseconds=1)
+
+
+class FakeDatabase:
+    """The replay's connection and session; runs "insert" logs the way Postgres would store them."""
+
+    def __init__(self) -> None:
+        self.logs: list[tuple[datetime, Channel]] = []
+        self.committed = self.rolled_back = False
+
+    # engine
+    def connect(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def execution_options(self, **options):
+        return self
+
+    async def begin(self):
+        db = self
+
+        class Transaction:
+            is_active = True
+
+            async def commit(self):
+                db.committed = True
+
+            async def rollback(self):
+                db.rolled_back = True
+
+        return Transaction()
+
+    # session
+    def session(self, **kwargs):
+        return self
+
+    async def execute(self, stmt):
+        when = next(v for v in stmt.compile().params.values() if isinstance(v, datetime))
+        counts = Counter(channel for at, channel in self.logs if at == when)
+
+        class Result:
+            def tuples(self):
+                return counts.items()
+
+        return Result()
+
+    async def close(self):
+        pass
+
+    async def run_dunning(self, db, now, **kwargs):
+        self.logs += [(stored(now), Channel.EMAIL), (stored(now), Channel.EMAIL), (stored(now), Channel.SMS)]
+        return RunStats(processed=5, created=3, completed=True, incremental=True)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(dunning_simulation, "engine", database)
+    monkeypatch.setattr(dunning_simulation, "AsyncSession", database.session)
+    monkeypatch.setattr(dunning_simulation, "run_dunning", database.run_dunning)
+    return database
+
+
+@pytest.mark.anyio
+async def test_channels_are_counted_for_a_clock_with_microseconds(database):
+    with clock.override(datetime(2026, 3, 18, 12, 0, 0, 123_789)):
+        start, timeline = await dunning_simulation.fast_forward(2)
+
+    assert start == datetime(2026, 3, 18, 12, 0, 0, 123_000)
+    assert [day.now for day in timeline] == [start + timedelta(days=1), start + timedelta(days=2)]
+    assert [day.by_channel for day in timeline] == [{"EMAIL": 2, "SMS": 1}] * 2
+    assert [day.created for day in timeline] == [3, 3]
+    assert database.rolled_back and not database.committed
+
+
+def test_fast_forward_endpoint_reports_channels_per_day(database):
+    with clock.override(datetime(2026, 3, 18, 12, 0, 0, 999_999)):
+        response = TestClient(app).post("/api/simulate/fast-forward", json={"days": 3})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["committed"] is False and body["notificationsCreated"] == 9
+    assert [day["byChannel"] for day in body["days"]] == [{"EMAIL": 2, "SMS": 1}] * 3
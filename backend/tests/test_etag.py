@@ -0,0 +1,38 @@
+from starlette.requests import Request
+
+from app.core.etag import not_modified, weak_etag
+
+
+def make_request(if_none_match: str | None = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_weak_etag_is_stable_and_depends_on_every_part():
+    assert weak_etag("charges", 1, 2) == weak_etag("charges", 1, 2)
+    assert weak_etag("charges", 1, 2) != weak_etag("charges", 1, 3)
+    assert weak_etag("charges").startswith('W/"')
+
+
+def test_matching_tag_gets_a_304():
+    etag = weak_etag("x")
+    response = not_modified(make_request(f'"other", {etag}'), etag)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == "no-cache"
+
+
+def test_comparison_is_weak():
+    assert not_modified(make_request('W/"abc"'), '"abc"') is not None
+    assert not_modified(make_request('"abc"'), 'W/"abc"') is not None
+    assert not_modified(make_request("*"), '"abc"') is not None
+
+
+def test_other_tags_or_no_header_get_the_body():
+    assert not_modified(make_request('"abd"'), '"abc"') is None
+    assert not_modified(make_request(), '"abc"') is None
+
+
+def test_cache_control_is_passed_through():
+    response = not_modified(make_request('"abc"'), '"abc"', "private, no-cache")
+    assert response.headers["cache-control"] == "private, no-cache"
@@ -0,0 +1,108 @@
+"""FEBRABAN numbering against a naive digit-by-digit reading of the rules."""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.febraban import (
+    MAX_AMOUNT_CENTS,
+    BoletoEncoder,
+    barcode,
+    barcode_from_linha,
+    due_factor,
+    linha_digitavel,
+    mod10,
+    mod11,
+)
+
+ENCODER = BoletoEncoder("237", "1234", "09", "0012345")
+
+
+def naive_mod10(digits: str) -> int:
+    total, weight = 0, 2
+    for c in reversed(digits):
+        p = int(c) * weight
+        total += p // 10 + p % 10
+        weight = 3 - weight
+    return (10 - total % 10) % 10
+
+
+def naive_mod11(digits: str) -> int:
+    total, weight = 0, 2
+    for c in reversed(digits):
+        total += int(c) * weight
+        weight = 2 if weight == 9 else weight + 1
+    dv = 11 - total % 11
+    return 1 if dv in (0, 10, 11) else dv
+
+
+def random_cases(count: int, seed: int = 237):
+    rng = random.Random(seed)
+    for _ in range(count):
+        due = date(2000, 7, 3) + timedelta(days=rng.randint(0, 20_000))
+        amount = rng.choice((0, 1, MAX_AMOUNT_CENTS, rng.randint(0, MAX_AMOUNT_CENTS)))
+        yield due, amount, rng.randint(0, 10**11 - 1)
+
+
+def test_check_digits_match_naive_rules():
+    rng = random.Random(237)
+    for _ in range(5_000):
+        digits = "".join(rng.choice("0123456789") for _ in range(rng.randint(1, 43)))
+        assert mod10(digits) == naive_mod10(digits)
+        digits43 = "".join(rng.choice("0123456789") for _ in range(43))
+        assert mod11(digits43) == naive_mod11(digits43)
+
+
+@pytest.mark.parametrize(
+    ("due", "factor"),
+    [
+        (date(2000, 7, 3), 1000),
+        (date(2025, 2, 21), 9999),
+        # The factor wraps instead of growing to five digits
+        (date(2025, 2, 22), 1000),
+        (date(2025, 2, 23), 1001),
+    ],
+)
+def test_due_factor(due, factor):
+    assert due_factor(due) == factor
+
+
+def test_due_factor_rejects_dates_before_the_range():
+    with pytest.raises(ValueError):
+        due_factor(date(2000, 7, 2))
+
+
+def test_encoded_boletos_follow_the_layout():
+    for due, amount, nosso in random_cases(20_000):
+        code, linha = ENCODER.encode(due, amount, nosso)
+        digits = linha.replace(".", "").replace(" ", "")
+        assert len(code) == 44 and len(digits) == 47
+        assert code[4] == str(naive_mod11(code[:4] + code[5:]))
+        assert int(code[5:9]) == due_factor(due)
+        assert int(code[9:19]) == amount
+        assert int(code[25:36]) == nosso
+        for start, dv in ((0, 9), (10, 20), (21, 31)):
+            assert digits[dv] == str(naive_mod10(digits[start:dv]))
+        assert barcode_from_linha(linha) == code
+
+
+def test_encoder_agrees_with_the_generic_functions():
+    for due, amount, nosso in random_cases(1_000, seed=1):
+        code, linha = ENCODER.encode(due, amount, nosso)
+        assert code == barcode("237", due, amount, f"123409{nosso:011d}00123450")
+        assert linha == linha_digitavel(code)
+
+
+def test_linha_with_a_wrong_digit_is_rejected():
+    _, linha = ENCODER.encode(date(2026, 3, 18), 12_345, 42)
+    for i, c in enumerate(linha):
+        if c.isdigit():
+            with pytest.raises(ValueError):
+                barcode_from_linha(linha[:i] + str((int(c) + 1) % 10) + linha[i + 1:])
+
+
+@pytest.mark.parametrize(("amount", "nosso"), [(-1, 0), (MAX_AMOUNT_CENTS + 1, 0), (0, 10**11)])
+def test_out_of_range_values_are_rejected(amount, nosso):
+    with pytest.raises(ValueError):
+        ENCODER.encode(date(2026, 3, 18), amount, nosso)
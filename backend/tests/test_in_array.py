@@ -0,0 +1,22 @@
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.core.database import in_array
+from app.models.charge import Charge
+from app.models.dunning import DunningSchedule
+
+
+def compile_asyncpg(stmt):
+    return stmt.compile(dialect=asyncpg.dialect())
+
+
+def test_binds_one_array_parameter_for_any_number_of_ids():
+    ids = [f"c{i}" for i in range(50_000)]
+    compiled = compile_asyncpg(select(Charge.id).where(in_array(Charge.id, ids)))
+    assert "= ANY ($1::TEXT[])" in str(compiled)
+    assert list(compiled.params.values()) == [ids]
+
+
+def test_works_in_deletes():
+    compiled = compile_asyncpg(delete(DunningSchedule).where(in_array(DunningSchedule.chargeId, ("a", "b"))))
+    assert str(compiled).endswith('"DunningSchedule"."chargeId" = ANY ($1::TEXT[])')
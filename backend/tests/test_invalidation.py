@@ -0,0 +1,276 @@
+"""Invalidation bus, LISTEN reconnects and the version-checked régua cache."""
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg as asyncpg_dialect
+
+from app.core import invalidation
+from app.core.invalidation import Invalidation, InvalidationBus, InvalidationListener, Topic
+from app.models.dunning import DunningRule, DunningStep
+from app.services import dunning_config as dunning_config_module
+from app.services.dunning_config import DunningConfigCache
+
+
+def collecting_bus(*topics: Topic) -> tuple[InvalidationBus, list[Invalidation]]:
+    bus = InvalidationBus()
+    seen: list[Invalidation] = []
+    for topic in topics:
+        bus.subscribe(topic, seen.append)
+    return bus, seen
+
+
+def test_payload_round_trip():
+    event = Invalidation(Topic.APP_STATE, ("a", "b"), "host:1")
+    assert Invalidation.from_payload(event.to_payload()) == event
+
+
+def test_oversized_key_list_becomes_everything():
+    event = Invalidation(Topic.APP_STATE, tuple(f"charge-{i:06d}" for i in range(2_000)), "host:1")
+    payload = event.to_payload()
+    assert len(payload) < invalidation.MAX_PAYLOAD
+    assert Invalidation.from_payload(payload).keys == ()
+
+
+def test_failing_handler_does_not_stop_the_others():
+    bus, seen = collecting_bus()
+
+    def broken(event):
+        raise RuntimeError("boom")
+
+    bus.subscribe(Topic.APP_STATE, broken)
+    bus.subscribe(Topic.APP_STATE, seen.append)
+    bus.dispatch(Invalidation(Topic.APP_STATE, ("a",)))
+    assert [e.keys for e in seen] == [("a",)]
+
+
+def test_dispatch_all_reaches_every_topic_with_no_keys():
+    bus, seen = collecting_bus(Topic.DUNNING_CONFIG, Topic.APP_STATE)
+    bus.dispatch_all()
+    assert sorted((e.topic.value, e.keys) for e in seen) == [("app_state", ()), ("dunning_config", ())]
+
+
+@pytest.mark.anyio
+async def test_publish_dispatches_here_and_notifies_the_others(monkeypatch):
+    bus, seen = collecting_bus(Topic.DUNNING_CONFIG)
+    statements, transactions = [], []
+
+    class Engine:
+        @asynccontextmanager
+        async def begin(self):
+            transactions.append("begin")
+            yield self
+            transactions.append("commit")
+
+        async def execute(self, stmt):
+            statements.append(stmt.compile(dialect=asyncpg_dialect.dialect()))
+
+    monkeypatch.setattr(invalidation, "engine", Engine())
+    await bus.publish(Topic.DUNNING_CONFIG, ["step1"])
+    assert [e.keys for e in seen] == [("step1",)]
+    assert "pg_notify" in str(statements[0])
+    channel, payload = statements[0].params.values()
+    assert channel == invalidation.CHANNEL
+    assert json.loads(payload) == {"topic": "dunning_config", "keys": ["step1"], "origin": bus.origin}
+    # Its own transaction: nothing of the caller's is committed along with it
+    assert transactions == ["begin", "commit"]
+
+
+def test_listener_dispatches_other_origins_only():
+    bus, seen = collecting_bus(Topic.APP_STATE)
+    listener = InvalidationListener(bus, dsn="postgresql://unused")
+    listener._on_notify(None, 1, invalidation.CHANNEL, Invalidation(Topic.APP_STATE, ("x",), bus.origin).to_payload())
+    listener._on_notify(None, 1, invalidation.CHANNEL, Invalidation(Topic.APP_STATE, ("y",), "other:2").to_payload())
+    listener._on_notify(None, 1, invalidation.CHANNEL, "not json")
+    listener._on_notify(None, 1, invalidation.CHANNEL, json.dumps({"topic": "nope"}))
+    assert [e.keys for e in seen] == [("y",)]
+
+
+class FakeConnection:
+    """Its keepalive query fails after ``alive`` successes, like a dropped socket."""
+
+    def __init__(self, alive: int) -> None:
+        self.alive = alive
+        self.listeners = []
+        self.terminated = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners.append((channel, callback))
+
+    async def execute(self, query):
+        if self.alive <= 0:
+            raise ConnectionResetError("connection lost")
+        self.alive -= 1
+
+    def terminate(self):
+        self.terminated = True
+
+
+@pytest.mark.anyio
+async def test_listener_reconnects_and_treats_the_gap_as_everything_changed(monkeypatch):
+    monkeypatch.setattr(invalidation, "KEEPALIVE_SECONDS", 0.001)
+    monkeypatch.setattr(invalidation, "MIN_BACKOFF_SECONDS", 0.001)
+    connections = [FakeConnection(alive=1), FakeConnection(alive=10_000)]
+    attempts = []
+
+    async def connect(dsn):
+        attempts.append(dsn)
+        if len(attempts) == 2:
+            raise OSError("database restarting")
+        return connections.pop(0)
+
+    monkeypatch.setattr(invalidation.asyncpg, "connect", connect)
+    bus, seen = collecting_bus(Topic.APP_STATE)
+    listener = InvalidationListener(bus, dsn="postgresql://db/app")
+    listener.start()
+    try:
+        for _ in range(1_000):
+            if listener.connects == 2:
+                break
+            await asyncio.sleep(0.001)
+    finally:
+        await listener.stop()
+
+    # Connected, dropped, one failed attempt, connected again
+    assert listener.connects == 2
+    assert attempts == ["postgresql://db/app"] * 3
+    # Nothing is dispatched on the first connect; everything after the reconnect
+    assert [(e.topic, e.keys) for e in seen] == [(Topic.APP_STATE, ())]
+    assert not listener.connected.is_set()
+
+
+@pytest.mark.anyio
+async def test_listener_terminates_the_connection_it_drops(monkeypatch):
+    monkeypatch.setattr(invalidation, "KEEPALIVE_SECONDS", 0.001)
+    conn = FakeConnection(alive=0)
+
+    async def connect(dsn):
+        return conn
+
+    monkeypatch.setattr(invalidation.asyncpg, "connect", connect)
+    listener = InvalidationListener(InvalidationBus(), dsn="postgresql://db/app")
+    with pytest.raises(ConnectionResetError):
+        await listener._listen(reconnect=False)
+    assert conn.terminated
+    assert conn.listeners[0][0] == invalidation.CHANNEL
+
+
+@pytest.mark.anyio
+@pytest.mark.skipif(not os.environ.get("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL não definido")
+async def test_notify_reaches_a_listener_on_postgres():
+    import asyncpg
+
+    dsn = os.environ["TEST_DATABASE_URL"]
+    bus, seen = collecting_bus(Topic.APP_STATE)
+    listener = InvalidationListener(bus, dsn=dsn)
+    listener.start()
+    try:
+        await asyncio.wait_for(listener.connected.wait(), 10)
+        conn = await asyncpg.connect(dsn)
+        try:
+            payload = Invalidation(Topic.APP_STATE, ("f1",), "other:1").to_payload()
+            await conn.execute("SELECT pg_notify($1, $2)", invalidation.CHANNEL, payload)
+        finally:
+            await conn.close()
+        for _ in range(100):
+            if seen:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await listener.stop()
+    assert [e.keys for e in seen] == [("f1",)]
+
+
+class FakeConfigStore:
+    """Stands in for the database behind DunningConfigCache: a CacheVersion counter and the rules."""
+
+    def __init__(self) -> None:
+        self.version = 1
+        self.loads = 0
+        self.name = "Régua padrão"
+
+    def rules(self) -> list[DunningRule]:
+        rule = DunningRule(id="r1", name=self.name, active=True, timezone="America/Sao_Paulo")
+        rule.steps = [DunningStep(id="s1", ruleId="r1", trigger="ON_DUE", offsetDays=0, channel="EMAIL", enabled=True)]
+        return [rule]
+
+    def session(self):
+        store = self
+
+        class Session:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                pass
+
+            async def execute(self, stmt):
+                store.loads += 1
+                rules = store.rules()
+
+                class Result:
+                    def unique(self):
+                        return self
+
+                    def scalars(self):
+                        return self
+
+                    def all(self):
+                        return rules
+
+                return Result()
+
+            def expunge_all(self):
+                pass
+
+        return Session()
+
+
+@pytest.fixture
+def config_store(monkeypatch):
+    store = FakeConfigStore()
+
+    async def read_version(db, name):
+        return store.version
+
+    monkeypatch.setattr(dunning_config_module, "async_session", store.session)
+    monkeypatch.setattr(dunning_config_module, "read_version", read_version)
+    monkeypatch.setattr(dunning_config_module.settings, "DUNNING_CONFIG_CACHE_SECONDS", 3600.0)
+    return store
+
+
+@pytest.mark.anyio
+async def test_config_cache_reloads_only_when_the_version_moves(config_store):
+    cache = DunningConfigCache()
+    assert [r.name for r in await cache.rules()] == ["Régua padrão"]
+    assert cache.version == 1
+    assert (await cache.step("s1")).rule.id == "r1"
+
+    # Within the check interval nothing is read, even if the database changed
+    config_store.name = "Régua nova"
+    config_store.version = 2
+    assert [r.name for r in await cache.rules()] == ["Régua padrão"]
+
+    # A run always checks; the counter moved, so the rules are reloaded
+    assert [r.name for r in await cache.rules(fresh=True)] == ["Régua nova"]
+    assert (cache.version, config_store.loads) == (2, 2)
+
+    # Same counter: checked, not reloaded
+    await cache.rules(fresh=True)
+    assert config_store.loads == 2
+
+
+@pytest.mark.anyio
+async def test_bus_event_makes_the_next_read_check_the_version(config_store):
+    cache = DunningConfigCache()
+    bus = InvalidationBus()
+    bus.subscribe(Topic.DUNNING_CONFIG, lambda event: cache.invalidate())
+    await cache.rules()
+
+    config_store.name = "Régua editada em outro worker"
+    config_store.version = 2
+    bus.dispatch(Invalidation(Topic.DUNNING_CONFIG, ("s1",), "other:2"))
+    assert [r.name for r in await cache.rules()] == ["Régua editada em outro worker"]
@@ -0,0 +1,168 @@
+"""Read-your-writes routing between the primary and the read replica."""
+
+import time
+
+import pytest
+from starlette.requests import Request
+
+from app.core import database, middleware
+from app.core.config import settings
+from app.core.database import LAST_WRITE_COOKIE, ReplicaLagMonitor, query_stats
+
+
+def make_request(headers: dict[str, str] | None = None) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+class FakeConnection:
+    def __init__(self, lag: float) -> None:
+        self.lag = lag
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+    async def execute(self, statement):
+        lag = self.lag
+
+        class Result:
+            def scalar(self):
+                return lag
+
+        return Result()
+
+
+class FakeEngine:
+    def __init__(self, lag: float | None = None) -> None:
+        self.lag = lag
+        self.connects = 0
+
+    def connect(self):
+        self.connects += 1
+        if self.lag is None:
+            raise OSError("connection refused")
+        return FakeConnection(self.lag)
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """A configured replica whose health the test decides."""
+    primary, replica_session = object(), object()
+    monkeypatch.setattr(database, "async_session", primary)
+    monkeypatch.setattr(database, "read_session", replica_session)
+    state = {"healthy": True}
+
+    async def healthy():
+        return state["healthy"]
+
+    monkeypatch.setattr(database.replica_lag, "healthy", healthy)
+    return primary, replica_session, state
+
+
+def test_wrote_recently_reads_header_and_cookie():
+    now = f"{time.time():.3f}"
+    assert database.wrote_recently(make_request({"x-last-write": now}))
+    assert database.wrote_recently(make_request({"cookie": f"{LAST_WRITE_COOKIE}={now}"}))
+
+
+def test_wrote_recently_expires_and_ignores_garbage():
+    stale = f"{time.time() - settings.READ_YOUR_WRITES_SECONDS - 1:.3f}"
+    assert not database.wrote_recently(make_request({"x-last-write": stale}))
+    assert not database.wrote_recently(make_request({"x-last-write": "ontem"}))
+    assert not database.wrote_recently(make_request())
+
+
+@pytest.mark.anyio
+async def test_reads_go_to_a_caught_up_replica(replica):
+    primary, replica_session, _ = replica
+    assert await database.read_session_factory(make_request()) is replica_session
+
+
+@pytest.mark.anyio
+async def test_recent_writer_reads_from_primary(replica):
+    primary, _, _ = replica
+    request = make_request({"x-last-write": f"{time.time():.3f}"})
+    assert await database.read_session_factory(request) is primary
+
+
+@pytest.mark.anyio
+async def test_lagging_replica_falls_back_to_primary(replica):
+    primary, _, state = replica
+    state["healthy"] = False
+    assert await database.read_session_factory(make_request()) is primary
+
+
+@pytest.mark.anyio
+async def test_no_replica_reads_from_primary(monkeypatch):
+    monkeypatch.setattr(database, "read_session", None)
+    assert await database.read_session_factory(make_request()) is database.async_session
+
+
+@pytest.mark.anyio
+async def test_lag_monitor_compares_lag_with_threshold(monkeypatch):
+    monkeypatch.setattr(settings, "READ_REPLICA_MAX_LAG_SECONDS", 5.0)
+    monitor = ReplicaLagMonitor()
+    monkeypatch.setattr(database, "read_engine", FakeEngine(lag=2.0))
+    assert await monitor.healthy()
+
+    monitor = ReplicaLagMonitor()
+    monkeypatch.setattr(database, "read_engine", FakeEngine(lag=30.0))
+    assert not await monitor.healthy()
+    assert monitor.lag_seconds == 30.0
+
+
+@pytest.mark.anyio
+async def test_lag_monitor_treats_unreachable_replica_as_lagging(monkeypatch):
+    monitor = ReplicaLagMonitor()
+    monkeypatch.setattr(database, "read_engine", FakeEngine(lag=None))
+    assert not await monitor.healthy()
+    assert monitor.lag_seconds == float("inf")
+
+
+@pytest.mark.anyio
+async def test_lag_monitor_checks_at_most_once_per_interval(monkeypatch):
+    monkeypatch.setattr(settings, "READ_REPLICA_CHECK_INTERVAL_SECONDS", 60.0)
+    engine = FakeEngine(lag=0.0)
+    monkeypatch.setattr(database, "read_engine", engine)
+    monitor = ReplicaLagMonitor()
+    for _ in range(5):
+        assert await monitor.healthy()
+    assert engine.connects == 1
+
+
+async def run_middleware(writes: int) -> dict[bytes, bytes]:
+    async def app(scope, receive, send):
+        query_stats.get().writes = writes
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    scope = {"type": "http", "method": "POST", "path": "/x", "headers": [], "app": None, "route": None}
+    await middleware.QueryTimingMiddleware(app)(scope, receive, send)
+    return dict(sent[0]["headers"])
+
+
+@pytest.mark.anyio
+async def test_writes_stamp_the_response(monkeypatch):
+    monkeypatch.setattr(middleware, "read_engine", FakeEngine())
+    headers = await run_middleware(writes=1)
+    stamp = headers[b"x-last-write"].decode()
+    assert headers[b"set-cookie"].decode().startswith(f"{LAST_WRITE_COOKIE}={stamp};")
+    assert database.wrote_recently(make_request({"x-last-write": stamp}))
+
+
+@pytest.mark.anyio
+async def test_reads_are_not_stamped(monkeypatch):
+    monkeypatch.setattr(middleware, "read_engine", FakeEngine())
+    headers = await run_middleware(writes=0)
+    assert b"x-last-write" not in headers
@@ -0,0 +1,141 @@
+import asyncio
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+
+from app.services import dunning
+
+
+@pytest.fixture(autouse=True)
+def no_pools(monkeypatch):
+    monkeypatch.setattr(dunning, "_pools", {})
+    monkeypatch.setattr(dunning, "_pool_users", dunning.Counter())
+    yield
+    for pool in dunning._pools.values():
+        pool.shutdown(wait=False)
+
+
+def test_runs_of_another_size_leave_a_busy_pool_alone():
+    with dunning.shard_pool(2) as first:
+        with dunning.shard_pool(3) as second:
+            assert second is not first
+            assert not first._shutdown_thread
+        with dunning.shard_pool(2) as again:
+            assert again is first
+
+
+def test_idle_pools_are_shut_down_when_another_size_is_needed():
+    with dunning.shard_pool(2) as first:
+        pass
+    with dunning.shard_pool(3):
+        assert first._shutdown_thread
+        assert list(dunning._pools) == [3]
+
+
+class FakePool:
+    def __init__(self, results):
+        self.futures = []
+        self.results = results
+
+    def submit(self, fn, i, *args):
+        future = Future()
+        self.futures.append(future)
+        if self.results[i] is None:
+            future.cancel()
+        else:
+            future.set_result(self.results[i])
+        return future
+
+
+def use_pool(monkeypatch, pool):
+    @contextmanager
+    def shard_pool(workers):
+        yield pool
+
+    monkeypatch.setattr(dunning, "shard_pool", shard_pool)
+    monkeypatch.setattr(dunning.settings, "DUNNING_SHARDS_PER_WORKER", 2)
+
+
+async def run_sharded(on_progress=None):
+    return await dunning._run_sharded(1, datetime(2026, 3, 18, 12), 100, None, True, 10, on_progress)
+
+
+@pytest.mark.anyio
+async def test_shard_results_are_summed(monkeypatch):
+    use_pool(monkeypatch, FakePool([(3, 1), (4, 2)]))
+    assert await run_sharded() == (7, 3, True)
+
+
+@pytest.mark.anyio
+async def test_a_cancelled_shard_fails_the_run(monkeypatch):
+    use_pool(monkeypatch, FakePool([(3, 1), None]))
+    with pytest.raises(RuntimeError):
+        await run_sharded()
+
+
+@pytest.mark.anyio
+async def test_stopping_early_is_not_completed(monkeypatch):
+    use_pool(monkeypatch, FakePool([(3, 1), (4, 2)]))
+
+    async def stop(total, processed, created):
+        return False
+
+    processed, created, completed = await run_sharded(stop)
+    assert not completed
+
+
+class SlowPool:
+    """Shards that only finish when ``release`` is set, long after the heartbeat interval."""
+
+    def __init__(self, release: asyncio.Event) -> None:
+        self.release = release
+        self.futures = []
+
+    def submit(self, fn, i, *args):
+        future = Future()
+        self.futures.append(future)
+        asyncio.get_running_loop().create_task(self._finish(future))
+        return future
+
+    async def _finish(self, future):
+        await self.release.wait()
+        if not future.cancelled():
+            future.set_result((5, 1))
+
+
+@pytest.mark.anyio
+async def test_heartbeat_keeps_going_while_a_shard_outlasts_the_stale_window(monkeypatch):
+    release = asyncio.Event()
+    use_pool(monkeypatch, SlowPool(release))
+    monkeypatch.setattr(dunning.settings, "DUNNING_JOB_HEARTBEAT_SECONDS", 0.01)
+    beats = []
+
+    async def on_progress(total, processed, created):
+        beats.append(processed)
+        if len(beats) == 5:
+            release.set()
+        return True
+
+    assert await run_sharded(on_progress) == (10, 2, True)
+    # Several beats before any shard was done
+    assert beats[:5] == [0] * 5
+
+
+@pytest.mark.anyio
+async def test_a_cancel_seen_on_a_heartbeat_stops_the_queued_shards(monkeypatch):
+    release = asyncio.Event()
+    pool = SlowPool(release)
+    use_pool(monkeypatch, pool)
+    monkeypatch.setattr(dunning.settings, "DUNNING_JOB_HEARTBEAT_SECONDS", 0.01)
+    beats = []
+
+    async def on_progress(total, processed, created):
+        beats.append(processed)
+        if len(beats) == 3:
+            release.set()
+        return False
+
+    assert await run_sharded(on_progress) == (0, 0, False)
+    assert all(f.cancelled() for f in pool.futures)
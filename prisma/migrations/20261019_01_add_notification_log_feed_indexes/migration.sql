@@ -0,0 +1,5 @@
+-- CreateIndex
+CREATE INDEX "NotificationLog_createdAt_id_idx" ON "NotificationLog"("createdAt", "id");
+
+-- CreateIndex
+CREATE INDEX "NotificationLog_status_channel_createdAt_idx" ON "NotificationLog"("status", "channel", "createdAt");
@@ -0,0 +1,95 @@
+-- NotificationLog becomes a table partitioned by month on "createdAt".
+-- Postgres requires the partition key in every unique constraint, so the
+-- primary key is now ("id", "createdAt") and the one-log-per-(charge, step)
+-- guarantee moves to the small, unpartitioned "NotificationLogKey" table.
+-- Old partitions are detached and archived by app/services/log_retention.py.
+
+-- Helper: create the monthly partition that contains "month" if missing
+CREATE OR REPLACE FUNCTION notification_log_ensure_partition(month DATE) RETURNS TEXT AS $$
+DECLARE
+    start_at DATE := date_trunc('month', month)::DATE;
+    name TEXT := 'NotificationLog_p' || to_char(start_at, 'YYYYMM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF "NotificationLog" FOR VALUES FROM (%L) TO (%L)',
+        name, start_at, (start_at + INTERVAL '1 month')::DATE
+    );
+    RETURN name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- RenameTable
+ALTER TABLE "NotificationLog" RENAME TO "NotificationLog_legacy";
+ALTER TABLE "NotificationLog_legacy" RENAME CONSTRAINT "NotificationLog_pkey" TO "NotificationLog_legacy_pkey";
+ALTER TABLE "NotificationLog_legacy" DROP CONSTRAINT "NotificationLog_chargeId_fkey";
+ALTER TABLE "NotificationLog_legacy" DROP CONSTRAINT "NotificationLog_stepId_fkey";
+DROP INDEX "NotificationLog_chargeId_idx";
+DROP INDEX "NotificationLog_stepId_idx";
+DROP INDEX "NotificationLog_scheduledFor_idx";
+DROP INDEX "NotificationLog_createdAt_id_idx";
+DROP INDEX "NotificationLog_status_channel_createdAt_idx";
+DROP INDEX "NotificationLog_chargeId_stepId_key";
+
+-- CreateTable
+CREATE TABLE "NotificationLog" (
+    "id" TEXT NOT NULL,
+    "chargeId" TEXT NOT NULL,
+    "stepId" TEXT NOT NULL,
+    "channel" "Channel" NOT NULL,
+    "status" "NotificationStatus" NOT NULL,
+    "scheduledFor" TIMESTAMP(3) NOT NULL,
+    "sentAt" TIMESTAMP(3),
+    "renderedMessage" TEXT NOT NULL,
+    "metaJson" TEXT NOT NULL,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "NotificationLog_pkey" PRIMARY KEY ("id", "createdAt")
+) PARTITION BY RANGE ("createdAt");
+
+-- Rows outside every monthly partition land here; it should stay empty
+CREATE TABLE "NotificationLog_default" PARTITION OF "NotificationLog" DEFAULT;
+
+-- CreateTable
+CREATE TABLE "NotificationLogKey" (
+    "chargeId" TEXT NOT NULL,
+    "stepId" TEXT NOT NULL,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "NotificationLogKey_pkey" PRIMARY KEY ("chargeId", "stepId")
+);
+
+-- CreateIndex
+CREATE INDEX "NotificationLog_chargeId_stepId_idx" ON "NotificationLog"("chargeId", "stepId");
+CREATE INDEX "NotificationLog_stepId_idx" ON "NotificationLog"("stepId");
+CREATE INDEX "NotificationLog_scheduledFor_idx" ON "NotificationLog"("scheduledFor");
+CREATE INDEX "NotificationLog_createdAt_id_idx" ON "NotificationLog"("createdAt", "id");
+CREATE INDEX "NotificationLog_status_channel_createdAt_idx" ON "NotificationLog"("status", "channel", "createdAt");
+CREATE INDEX "NotificationLogKey_stepId_idx" ON "NotificationLogKey"("stepId");
+
+-- AddForeignKey
+ALTER TABLE "NotificationLog" ADD CONSTRAINT "NotificationLog_chargeId_fkey" FOREIGN KEY ("chargeId") REFERENCES "Charge"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+ALTER TABLE "NotificationLog" ADD CONSTRAINT "NotificationLog_stepId_fkey" FOREIGN KEY ("stepId") REFERENCES "DunningStep"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+ALTER TABLE "NotificationLogKey" ADD CONSTRAINT "NotificationLogKey_chargeId_fkey" FOREIGN KEY ("chargeId") REFERENCES "Charge"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+ALTER TABLE "NotificationLogKey" ADD CONSTRAINT "NotificationLogKey_stepId_fkey" FOREIGN KEY ("stepId") REFERENCES "DunningStep"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- Partitions for existing data plus three months ahead
+DO $$
+DECLARE
+    month DATE := date_trunc('month', COALESCE((SELECT min("createdAt") FROM "NotificationLog_legacy"), now()))::DATE;
+BEGIN
+    WHILE month <= (date_trunc('month', now()) + INTERVAL '3 months')::DATE LOOP
+        PERFORM notification_log_ensure_partition(month);
+        month := (month + INTERVAL '1 month')::DATE;
+    END LOOP;
+END $$;
+
+-- MoveData
+INSERT INTO "NotificationLog" SELECT
+    "id", "chargeId", "stepId", "channel", "status", "scheduledFor", "sentAt", "renderedMessage", "metaJson", "createdAt"
+FROM "NotificationLog_legacy";
+
+INSERT INTO "NotificationLogKey" ("chargeId", "stepId", "createdAt")
+SELECT "chargeId", "stepId", min("createdAt") FROM "NotificationLog_legacy" GROUP BY "chargeId", "stepId";
+
+-- DropTable
+DROP TABLE "NotificationLog_legacy";
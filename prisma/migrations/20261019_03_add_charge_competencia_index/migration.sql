@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX "Charge_competencia_customerId_categoria_idx" ON "Charge"("competencia", "customerId", "categoria");
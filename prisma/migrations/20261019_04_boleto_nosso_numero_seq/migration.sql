@@ -0,0 +1,2 @@
+-- "Nosso número" for FEBRABAN boletos (11 digits), see backend/app/services/boleto.py
+CREATE SEQUENCE IF NOT EXISTS "Boleto_nossoNumero_seq" START WITH 1 MAXVALUE 99999999999 NO CYCLE;
@@ -0,0 +1,24 @@
+-- CreateEnum
+CREATE TYPE "DunningJobStatus" AS ENUM ('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', 'CANCELED');
+
+-- CreateTable
+CREATE TABLE "DunningJob" (
+    "id" TEXT NOT NULL,
+    "status" "DunningJobStatus" NOT NULL DEFAULT 'QUEUED',
+    "paramsJson" TEXT NOT NULL DEFAULT '{}',
+    "totalCharges" INTEGER NOT NULL DEFAULT 0,
+    "processedCharges" INTEGER NOT NULL DEFAULT 0,
+    "notificationsCreated" INTEGER NOT NULL DEFAULT 0,
+    "cancelRequested" BOOLEAN NOT NULL DEFAULT false,
+    "error" TEXT,
+    "workerId" TEXT,
+    "heartbeatAt" TIMESTAMP(3),
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "startedAt" TIMESTAMP(3),
+    "finishedAt" TIMESTAMP(3),
+
+    CONSTRAINT "DunningJob_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "DunningJob_status_createdAt_idx" ON "DunningJob"("status", "createdAt");
@@ -0,0 +1,15 @@
+-- AlterTable
+ALTER TABLE "Charge" ADD COLUMN "nextDunningDate" DATE;
+
+-- CreateIndex
+CREATE INDEX "Charge_nextDunningDate_idx" ON "Charge"("nextDunningDate");
+
+-- CreateTable
+CREATE TABLE "DunningRunState" (
+    "id" INTEGER NOT NULL DEFAULT 1,
+    "lastRunStartedAt" TIMESTAMP(3),
+    "lastRunDate" DATE,
+    "configFingerprint" TEXT,
+
+    CONSTRAINT "DunningRunState_pkey" PRIMARY KEY ("id")
+);
@@ -0,0 +1,24 @@
+-- CreateTable
+CREATE TABLE "DunningSchedule" (
+    "chargeId" TEXT NOT NULL,
+    "stepId" TEXT NOT NULL,
+    "fireDate" DATE NOT NULL,
+    "channel" "Channel" NOT NULL,
+
+    CONSTRAINT "DunningSchedule_pkey" PRIMARY KEY ("chargeId","stepId")
+);
+
+-- CreateIndex
+CREATE INDEX "DunningSchedule_fireDate_idx" ON "DunningSchedule"("fireDate");
+
+-- CreateIndex
+CREATE INDEX "DunningSchedule_stepId_idx" ON "DunningSchedule"("stepId");
+
+-- AddForeignKey
+ALTER TABLE "DunningSchedule" ADD CONSTRAINT "DunningSchedule_chargeId_fkey" FOREIGN KEY ("chargeId") REFERENCES "Charge"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "DunningSchedule" ADD CONSTRAINT "DunningSchedule_stepId_fkey" FOREIGN KEY ("stepId") REFERENCES "DunningStep"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- Existing charges get their rows from the first full dunning run; this forces one
+DELETE FROM "DunningRunState";
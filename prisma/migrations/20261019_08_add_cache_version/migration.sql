@@ -0,0 +1,31 @@
+-- Change counters for the backend's in-process caches, see
+-- backend/app/services/cache_versions.py. Triggers bump them, so writes from
+-- any client (the Next.js API, seeds, COPY loads) invalidate the caches too.
+
+-- CreateTable
+CREATE TABLE "CacheVersion" (
+    "name" TEXT NOT NULL,
+    "version" BIGINT NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "CacheVersion_pkey" PRIMARY KEY ("name")
+);
+
+-- Statement trigger: bumps the counter named by its first argument
+CREATE OR REPLACE FUNCTION cache_version_bump() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO "CacheVersion" ("name", "version", "updatedAt")
+    VALUES (TG_ARGV[0], 1, CURRENT_TIMESTAMP)
+    ON CONFLICT ("name") DO UPDATE
+    SET "version" = "CacheVersion"."version" + 1, "updatedAt" = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- CreateTrigger
+CREATE TRIGGER "DunningRule_cache_version"
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "DunningRule"
+    FOR EACH STATEMENT EXECUTE FUNCTION cache_version_bump('dunning_config');
+CREATE TRIGGER "DunningStep_cache_version"
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "DunningStep"
+    FOR EACH STATEMENT EXECUTE FUNCTION cache_version_bump('dunning_config');
@@ -0,0 +1,9 @@
+-- max("updatedAt") backs the ETags of GET /api/charges, /api/customers and
+-- /api/app-state (backend/app/core/etag.py) and the incremental dunning run's
+-- "changed since" filter; both become index lookups.
+
+-- CreateIndex
+CREATE INDEX "Charge_updatedAt_idx" ON "Charge"("updatedAt");
+
+-- CreateIndex
+CREATE INDEX "Customer_updatedAt_idx" ON "Customer"("updatedAt");
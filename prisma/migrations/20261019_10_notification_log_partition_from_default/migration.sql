@@ -0,0 +1,37 @@
+-- notification_log_ensure_partition() used CREATE TABLE ... PARTITION OF,
+-- which fails once the default partition holds a row of that month. The new
+-- month is now built as a plain table, the month's rows are moved into it
+-- out of the default partition and it is attached afterwards. The app calls
+-- this at startup and at the start of every dunning run, so in practice the
+-- move only happens after downtime.
+CREATE OR REPLACE FUNCTION notification_log_ensure_partition(month DATE) RETURNS TEXT AS $$
+DECLARE
+    start_at DATE := date_trunc('month', month)::DATE;
+    end_at DATE := (date_trunc('month', month) + INTERVAL '1 month')::DATE;
+    name TEXT := 'NotificationLog_p' || to_char(start_at, 'YYYYMM');
+BEGIN
+    IF to_regclass(format('%I', name)) IS NOT NULL THEN
+        RETURN name;
+    END IF;
+
+    -- Concurrent callers wait here, then see the partition the first one made
+    PERFORM pg_advisory_xact_lock(hashtext('notification_log_ensure_partition'));
+    IF to_regclass(format('%I', name)) IS NOT NULL THEN
+        RETURN name;
+    END IF;
+
+    -- No new row of this month may reach the default partition until the attach
+    LOCK TABLE "NotificationLog_default" IN ACCESS EXCLUSIVE MODE;
+    EXECUTE format('CREATE TABLE %I (LIKE "NotificationLog" INCLUDING DEFAULTS)', name);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM "NotificationLog_default" WHERE "createdAt" >= %L AND "createdAt" < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        start_at, end_at, name
+    );
+    EXECUTE format(
+        'ALTER TABLE "NotificationLog" ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        name, start_at, end_at
+    );
+    RETURN name;
+END;
+$$ LANGUAGE plpgsql;
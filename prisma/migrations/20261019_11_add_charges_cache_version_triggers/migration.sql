@@ -0,0 +1,16 @@
+-- The polled charge/customer/app-state ETags fingerprint max("updatedAt"),
+-- which the updatedAt indexes answer from one index edge. Deletes don't move
+-- it and boletos have no updatedAt, so those bump the "charges" counter in
+-- CacheVersion instead of every poll counting the tables. Statement triggers:
+-- one counter write per statement, however many rows it touches.
+
+-- CreateTrigger
+CREATE TRIGGER "Charge_charges_cache_version"
+    AFTER DELETE OR TRUNCATE ON "Charge"
+    FOR EACH STATEMENT EXECUTE FUNCTION cache_version_bump('charges');
+CREATE TRIGGER "Customer_charges_cache_version"
+    AFTER DELETE OR TRUNCATE ON "Customer"
+    FOR EACH STATEMENT EXECUTE FUNCTION cache_version_bump('charges');
+CREATE TRIGGER "Boleto_charges_cache_version"
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "Boleto"
+    FOR EACH STATEMENT EXECUTE FUNCTION cache_version_bump('charges');
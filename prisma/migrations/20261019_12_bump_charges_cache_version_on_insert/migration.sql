@@ -0,0 +1,12 @@
+-- Inserted charges and customers can carry an "updatedAt" below the current
+-- max: it is the inserting transaction's start (or the app's clock), and an
+-- older transaction may commit after a newer one. The polled ETags would not
+-- move, so inserts bump the "charges" counter as well.
+
+-- CreateTrigger
+CREATE TRIGGER "Charge_insert_charges_cache_version"
+    AFTER INSERT ON "Charge"
+    FOR EACH STATEMENT EXECUTE FUNCTION cache_version_bump('charges');
+CREATE TRIGGER "Customer_insert_charges_cache_version"
+    AFTER INSERT ON "Customer"
+    FOR EACH STATEMENT EXECUTE FUNCTION cache_version_bump('charges');